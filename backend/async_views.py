@@ -0,0 +1,132 @@
+"""
+Base class for native async JSON endpoints.
+
+DRF's APIView is synchronous, so under ASGI every request to it occupies a
+thread from the sync-to-async pool. These views run on the event loop and
+reach the database only through Django's async ORM (``aget``, ``acount``,
+``async for``), so a slow client costs a coroutine, not a thread.
+"""
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.settings import api_settings
+
+from users.authentication import USER_CACHE, CachedJWTAuthentication
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    CachedJWTAuthentication whose user lookup, on a cache miss, uses the
+    async ORM. Users built from token claims defer the fields the claims
+    leave out, which async views must not read.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        # Signature and expiry checks are pure CPU
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Async twin of CachedJWTAuthentication.get_user()."""
+        user_id = self.get_user_id(validated_token)
+        key, user = self.get_cached_user(user_id, validated_token)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise exceptions.AuthenticationFailed("User not found", code='user_not_found')
+            caches[USER_CACHE].set(key, user)
+        self.check_user(user, validated_token)
+        return user
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of a DRF view: JWT authentication, DRF permission
+    classes (staff-only unless a subclass sets its own) and DRF-shaped JSON
+    errors. Subclasses implement ``async def get()`` and return
+    ``self.respond(data)``. Permissions see only the user's token claims, so
+    they must not read other user fields.
+    """
+    authentication_class = AsyncJWTAuthentication
+    permission_classes = [IsAdminUser]
+    renderer_class = JSONRenderer
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authentication_class()
+        try:
+            result = await authenticator.aauthenticate(request)
+        except exceptions.APIException as exc:
+            return self.error(exc.detail, exc.status_code, authenticator.authenticate_header(request))
+        if result is None:
+            return self.error(
+                "Authentication credentials were not provided.", 401, authenticator.authenticate_header(request)
+            )
+        request.user, request.auth = result
+        for permission_class in self.permission_classes:
+            if not permission_class().has_permission(request, self):
+                return self.error("You do not have permission to perform this action.", 403)
+
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.error(exc.detail, exc.status_code)
+
+    def respond(self, data, status=200):
+        return HttpResponse(self.renderer_class().render(data), status=status, content_type='application/json')
+
+    def error(self, detail, status, authenticate_header=None):
+        if not isinstance(detail, (dict, list)):
+            detail = {'detail': detail}
+        response = self.respond(detail, status)
+        if authenticate_header and status == 401:
+            response['WWW-Authenticate'] = authenticate_header
+        return response
+
+    # ------------------------- Page number pagination -------------------------
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    async def paginate(self, queryset, represent):
+        """
+        Same payload as DRF's PageNumberPagination: one ``acount()`` and one
+        page query, with ``represent`` applied to each row.
+        """
+        page_size = self.get_page_size()
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise exceptions.NotFound("Invalid page.")
+        count = await queryset.acount()
+        last_page = max(1, -(-count // page_size))
+        if page < 1 or page > last_page:
+            raise exceptions.NotFound("Invalid page.")
+
+        offset = (page - 1) * page_size
+        results = [represent(row) async for row in queryset[offset:offset + page_size]]
+
+        url = self.request.build_absolute_uri()
+        next_link = replace_query_param(url, 'page', page + 1) if page < last_page else None
+        previous_link = None
+        if page > 1:
+            previous_link = replace_query_param(url, 'page', page - 1) if page > 2 else remove_query_param(url, 'page')
+        return {'count': count, 'next': next_link, 'previous': previous_link, 'results': results}
@@ -0,0 +1,247 @@
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.serializers import BaseSerializer
+
+
+class DirtyFieldsMixin:
+    """
+    Snapshot concrete field values when an instance is loaded or saved, so
+    change detection happens in memory instead of re-reading the row.
+
+    ``save()`` on an existing instance becomes a single UPDATE limited to the
+    changed columns (plus ``auto_now`` fields) unless the caller passes its own
+    ``update_fields``. Deferred fields are never loaded just to compare them.
+    Use DirtyFieldsManager so rows from ``bulk_create()`` get a snapshot too;
+    a saved instance without one counts every loaded field as changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_fields(fields)
+
+    def snapshot_fields(self, fields=None):
+        """Record current values, for all loaded fields or only ``fields``."""
+        snapshot = getattr(self, '_field_snapshot', None)
+        if fields is None or snapshot is None:
+            snapshot = self._field_snapshot = {}
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                snapshot[field.attname] = self.__dict__[field.attname]
+
+    def get_dirty_fields(self):
+        """
+        Return ``{field_name: original_value}`` for fields changed since the
+        snapshot. A deferred field that was assigned without being loaded
+        counts as changed, with an original value of ``None``, and so does
+        every field of a saved instance that has no snapshot at all.
+        """
+        snapshot = getattr(self, '_field_snapshot', None)
+        if snapshot is None:
+            if self._state.adding:
+                return {}
+            # Saved without a snapshot: nothing is known to be unchanged
+            snapshot = {}
+        dirty = {}
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in snapshot:
+                dirty[field.name] = None
+            elif self.__dict__[field.attname] != snapshot[field.attname]:
+                dirty[field.name] = snapshot[field.attname]
+        return dirty
+
+    def has_changed(self, field_name):
+        return field_name in self.get_dirty_fields()
+
+    def get_original(self, field_name):
+        attname = self._meta.get_field(field_name).attname
+        return getattr(self, '_field_snapshot', {}).get(attname, getattr(self, attname))
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and getattr(self, '_field_snapshot', None) is not None
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not args
+        ):
+            update_fields = list(self.get_dirty_fields())
+            update_fields += [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in update_fields
+            ]
+            kwargs['update_fields'] = update_fields
+
+        super().save(*args, **kwargs)
+        self.snapshot_fields(kwargs.get('update_fields'))
+
+
+class DirtyFieldsManager(models.Manager):
+    """Manager for DirtyFieldsMixin models: ``bulk_create()`` snapshots the rows it inserts."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        for obj in objs:
+            obj.snapshot_fields()
+        return objs
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for DRF list and detail views, derived from
+    ``last_modified_field``. Validators come from one cheap query (the row's
+    timestamp, or ``Max`` plus ``Count`` over the filtered list), so a
+    matching ``If-None-Match``/``If-Modified-Since`` gets a 304 without any
+    rows being fetched or serialized.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_validator_values(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            # Same lookup as get_object(), but only the timestamp is read
+            queryset = self.filter_queryset(self.get_queryset()).order_by()
+            filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            last_modified = queryset.filter(**filter_kwargs).values_list(self.last_modified_field, flat=True).first()
+            if last_modified is None:
+                raise Http404
+            return last_modified, (self.kwargs[lookup_url_kwarg],)
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        values = queryset.aggregate(last_modified=Max(self.last_modified_field), total=Count('pk'))
+        return values['last_modified'], (values['total'],)
+
+    def get_etag(self, last_modified, parts):
+        # The representation also depends on the renderer (JSON vs browsable)
+        values = (last_modified and last_modified.isoformat(), *parts, self.request.accepted_renderer.format)
+        key = ':'.join(map(str, values))
+        return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+    def get(self, request, *args, **kwargs):
+        last_modified, parts = self.get_validator_values()
+        etag = self.get_etag(last_modified, parts)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+def parse_field_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin for ``?fields=a,b``, ``?exclude=c`` and ``?expand=x`` on
+    GET requests. ``expandable_fields`` maps a field name to the
+    ``(serializer class, kwargs)`` that replaces it when expanded. Views pass
+    their queryset through ``narrow_queryset()`` so the SQL column list
+    shrinks along with the payload.
+    """
+    expandable_fields = {}
+
+    @staticmethod
+    def sparse_params(request):
+        """``(fields or None, exclude, expand)`` requested by ``request``."""
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None, set(), set()
+        params = getattr(request, 'query_params', request.GET)
+        fields = parse_field_list(params.get('fields')) or None
+        return fields, parse_field_list(params.get('exclude')), parse_field_list(params.get('expand'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, exclude, expand = self.sparse_params(self.context.get('request'))
+        for name in expand & set(self.expandable_fields):
+            serializer_class, serializer_kwargs = self.expandable_fields[name]
+            self.fields[name] = serializer_class(**serializer_kwargs)
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in exclude:
+                self.fields.pop(name)
+
+    @classmethod
+    def narrow_queryset(cls, queryset, request):
+        """
+        Restrict ``queryset`` with only()/select_related() to the columns the
+        requested fields read. Left unchanged when nothing was requested or
+        a field is not backed by a plain model column.
+        """
+        fields, exclude, expand = cls.sparse_params(request)
+        if fields is None and not exclude and not expand:
+            return queryset
+        key = (cls, fields and frozenset(fields), frozenset(exclude), frozenset(expand))
+        if key not in SPARSE_COLUMNS:
+            if len(SPARSE_COLUMNS) >= SPARSE_COLUMNS_MAX:
+                SPARSE_COLUMNS.clear()
+            # Building the serializer's fields is the expensive part; do it once per fieldset
+            SPARSE_COLUMNS[key] = cls.sparse_columns(queryset.model, request)
+        if SPARSE_COLUMNS[key] is None:
+            return queryset
+        columns, related = SPARSE_COLUMNS[key]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    @classmethod
+    def sparse_columns(cls, model, request):
+        """``(only() columns, select_related() names)``, or None if not narrowable."""
+        columns, related = [model._meta.pk.name], []
+        for field in cls(context={'request': request}).fields.values():
+            if isinstance(field, BaseSerializer):
+                if field.source == '*' or any(child.source == '*' for child in field.fields.values()):
+                    return None
+                related.append(field.source)
+                columns.append(field.source)
+                columns.extend(f'{field.source}__{child.source}' for child in field.fields.values())
+                continue
+            path = field.source_attrs
+            if not path or not all(is_model_field(model, path)):
+                return None
+            if len(path) > 1:
+                related.append(path[0])
+                columns.append(path[0])
+            columns.append('__'.join(path))
+        return tuple(dict.fromkeys(columns)), tuple(dict.fromkeys(related))
+
+
+# (serializer class, fields, exclude, expand) -> sparse_columns() result
+SPARSE_COLUMNS = {}
+SPARSE_COLUMNS_MAX = 256
+
+
+def is_model_field(model, path):
+    """Yield, per step of ``path``, whether it names a concrete model field."""
+    for name in path:
+        if model is None:
+            yield False
+            return
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            yield False
+            return
+        yield field.concrete
+        model = field.related_model
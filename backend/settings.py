@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 from decouple import config
@@ -46,7 +47,7 @@ INSTALLED_APPS = [
     'leads',
     'django_filters',
     'tasks',
-    
+    'outbox',
 ]
 
 MIDDLEWARE = [
@@ -130,7 +131,7 @@ STATIC_URL = 'static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
 
     'DEFAULT_FILTER_BACKENDS': (
@@ -143,6 +144,79 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+CACHES = {
+    # Shared by the workers on one host; holds the lead list generation tokens
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(Path(tempfile.gettempdir()) / 'crm_backend_cache')),
+    },
+    # Per-process LRU of rendered lead list pages (leads.cache)
+    'lead_lists': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lead-lists',
+        'TIMEOUT': config('LEAD_LIST_CACHE_TIMEOUT', cast=int, default=300),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('LEAD_LIST_CACHE_MAX_ENTRIES', cast=int, default=1000),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    # Per-process LRU of users resolved from JWTs (users.authentication)
+    'auth_users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-users',
+        'TIMEOUT': config('AUTH_USER_CACHE_TIMEOUT', cast=int, default=300),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('AUTH_USER_CACHE_MAX_ENTRIES', cast=int, default=1000),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+# Lead full-text search backend (dotted path). Leave unset to pick SQLite FTS5
+# or PostgreSQL tsvector from the database vendor.
+LEAD_SEARCH_BACKEND = config('LEAD_SEARCH_BACKEND', default=None)
+
+# Calling code assumed for lead phone numbers stored without one
+LEAD_DEFAULT_COUNTRY_CODE = config('LEAD_DEFAULT_COUNTRY_CODE', default='91')
+
+# Automatic lead assignment (leads.assignment). Strategy used for new leads
+# created without an assignee: round_robin, least_open or weighted_team;
+# leave unset to keep manual assignment.
+LEAD_ASSIGNMENT_STRATEGY = config('LEAD_ASSIGNMENT_STRATEGY', default=None)
+# Relative share of leads per User.team for weighted_team; unlisted teams
+# weigh 1 and a weight of 0 takes a team out of rotation.
+LEAD_ASSIGNMENT_TEAM_WEIGHTS = {}
+
+# Seconds a computed staff workload report (users.workload) is reused;
+# writes to leads, tasks or users retire it sooner
+STAFF_WORKLOAD_CACHE_TIMEOUT = config('STAFF_WORKLOAD_CACHE_TIMEOUT', cast=int, default=60)
+
+# Shared secret WhatsApp/Instagram/automation webhooks send in the
+# X-Webhook-Token header (leads.ingest). Webhooks are refused while unset.
+LEAD_WEBHOOK_SECRET = config('LEAD_WEBHOOK_SECRET', default='')
+
+# Transactional outbox relay (outbox.relay). Each sink keeps its own
+# offset; run `manage.py relay_outbox <name>` per sink.
+OUTBOX_SINKS = {
+    'file': {
+        'BACKEND': 'outbox.relay.FileSink',
+        'OPTIONS': {'path': config('OUTBOX_FILE_PATH', default=str(BASE_DIR / 'outbox.jsonl'))},
+    },
+}
+OUTBOX_HTTP_URL = config('OUTBOX_HTTP_URL', default='')
+OUTBOX_HTTP_AUTHORIZATION = config('OUTBOX_HTTP_AUTHORIZATION', default='')
+if OUTBOX_HTTP_URL:
+    OUTBOX_SINKS['http'] = {
+        'BACKEND': 'outbox.relay.HTTPSink',
+        'OPTIONS': {
+            'url': OUTBOX_HTTP_URL,
+            'headers': {'Authorization': OUTBOX_HTTP_AUTHORIZATION} if OUTBOX_HTTP_AUTHORIZATION else {},
+        },
+    }
+# How long the relay waits for a skipped event id to commit before taking it
+# for a rolled-back insert
+OUTBOX_RELAY_GAP_SECONDS = config('OUTBOX_RELAY_GAP_SECONDS', cast=int, default=3600)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(
         minutes=config('ACCESS_TOKEN_LIFETIME', cast=int, default=60)
@@ -0,0 +1,20 @@
+# ASGI profile: gunicorn -c deploy/gunicorn_asgi.py backend.asgi:application
+#
+# Uvicorn workers run the native async views (api/async/...) on the event
+# loop, so slow clients hold a coroutine instead of a thread. Sync DRF views
+# still work but each request borrows a thread from asgiref's pool, so keep
+# the thread-heavy endpoints on the WSGI profile if they dominate traffic.
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Thousands of idle or slow keep-alive connections per worker are cheap here
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+# Recycle workers now and then to bound memory growth
+max_requests = 10000
+max_requests_jitter = 1000
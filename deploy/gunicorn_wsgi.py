@@ -0,0 +1,16 @@
+# WSGI profile: gunicorn -c deploy/gunicorn_wsgi.py backend.wsgi:application
+#
+# Threaded sync workers; every in-flight request, including one stuck
+# writing to a slow client, holds a thread until it finishes.
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('THREADS', 8))
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+max_requests = 10000
+max_requests_jitter = 1000
@@ -0,0 +1,104 @@
+import heapq
+
+from django.db.models import F, Q
+
+from . import remarks
+from .models import ProcessingUpdate, RemarkHistory
+
+
+class ActivitySource:
+    """
+    One history table feeding the activity feed. Rows are read newest first
+    with ``changed_by`` joined in, using the (lead, time) index for a lead's
+    feed and the time index for the global one.
+    """
+
+    def __init__(self, kind, model, time_field, details):
+        self.kind = kind
+        self.model = model
+        self.time_field = time_field
+        self.details = details
+
+    def keyset_filter(self, rank, position):
+        """Rows that sort after ``position`` = (time, source rank, id) in descending order."""
+        time, position_rank, position_id = position
+        if rank < position_rank:
+            return Q(**{f'{self.time_field}__lte': time})
+        if rank > position_rank:
+            return Q(**{f'{self.time_field}__lt': time})
+        return Q(**{f'{self.time_field}__lt': time}) | Q(**{self.time_field: time, 'id__lt': position_id})
+
+    def columns(self):
+        return self.details
+
+    def decode(self, rows):
+        return rows
+
+    def rows(self, rank, lead_id=None, position=None, limit=10):
+        queryset = self.model.objects.all()
+        if lead_id is not None:
+            queryset = queryset.filter(lead_id=lead_id)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(rank, position))
+        queryset = queryset.order_by(f'-{self.time_field}', '-id').values(
+            'id',
+            'lead_id',
+            'changed_by_id',
+            self.time_field,
+            *self.columns(),
+            changed_by_name=F('changed_by__username'),
+        )
+        for row in self.decode(list(queryset[:limit])):
+            yield {
+                'type': self.kind,
+                'id': row['id'],
+                'lead': row['lead_id'],
+                'timestamp': row[self.time_field],
+                'changed_by': row['changed_by_id'],
+                'changed_by_name': row['changed_by_name'],
+                'details': {field: row[field] for field in self.details},
+                'rank': rank,
+            }
+
+
+class RemarkActivitySource(ActivitySource):
+    """Remark edits, rebuilt from their delta chains with one more query per page."""
+
+    def columns(self):
+        return ('version', 'previous_delta', 'new_delta')
+
+    def decode(self, rows):
+        return remarks.decode_values(self.model, rows)
+
+
+# Task updates are not linked to leads yet; add a source here once they are
+ACTIVITY_SOURCES = (
+    ActivitySource('processing_update', ProcessingUpdate, 'timestamp', ('status', 'notes')),
+    RemarkActivitySource('remark', RemarkHistory, 'changed_at', ('previous_remarks', 'new_remarks')),
+)
+
+
+def position_of(item):
+    return item['timestamp'], item['rank'], item['id']
+
+
+class ActivityFeed:
+    """
+    Newest-first merge of every activity source for one lead (or all leads).
+
+    A page reads at most ``limit`` rows from each source, one query per
+    source, and k-way merges them, so the cost does not grow with the
+    length of the history.
+    """
+
+    def __init__(self, lead_id=None, sources=ACTIVITY_SOURCES):
+        self.lead_id = lead_id
+        self.sources = sources
+
+    def page(self, position=None, limit=10):
+        streams = [
+            list(source.rows(rank, self.lead_id, position, limit))
+            for rank, source in enumerate(self.sources)
+        ]
+        merged = heapq.merge(*streams, key=position_of, reverse=True)
+        return [item for item, _ in zip(merged, range(limit))]
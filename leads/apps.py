@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class LeadsConfig(AppConfig):
     name = 'leads'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import install_search_backend, uninstall_search_backend
+        pre_migrate.connect(uninstall_search_backend, sender=self)
+        post_migrate.connect(install_search_backend, sender=self)
@@ -0,0 +1,136 @@
+"""
+Hot/cold archiving of closed leads.
+
+Leads whose processing closed (COMPLETED or REJECTED) more than N days ago
+are copied, with their ProcessingUpdate and RemarkHistory rows, into the
+``ArchivedLead`` tables and then removed from the hot tables. Each batch
+is one transaction, so an interrupted run leaves every lead either fully
+hot or fully archived. Archived leads keep counting towards the funnel
+summary; closed leads never count towards assignee load.
+"""
+import datetime
+
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from outbox import events as outbox
+from outbox.models import OutboxEvent
+from . import cache, funnel
+from .models import (
+    ArchivedLead,
+    ArchivedProcessingUpdate,
+    ArchivedRemarkHistory,
+    DuplicateCandidate,
+    Lead,
+    LeadIngestEvent,
+    ProcessingUpdate,
+    RemarkHistory,
+)
+
+
+DEFAULT_BATCH_SIZE = 500
+
+# Hot table -> archive table, parents first
+ARCHIVED_MODELS = (
+    (Lead, ArchivedLead),
+    (ProcessingUpdate, ArchivedProcessingUpdate),
+    (RemarkHistory, ArchivedRemarkHistory),
+)
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def closed_leads(older_than_days):
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    return Lead.objects.filter(
+        processing_status__in=funnel.CLOSED_PROCESSING_STATUSES,
+        processing_status_date__lt=cutoff,
+    )
+
+
+# ------------------------- Archiving -------------------------
+def archive_closed_leads(older_than_days, batch_size=DEFAULT_BATCH_SIZE, limit=None):
+    """
+    Archive leads closed more than ``older_than_days`` ago, ``batch_size``
+    leads per transaction, and return how many were moved. Concurrent runs
+    skip each other's locked rows where the database supports it.
+    """
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        with transaction.atomic():
+            lead_ids = list(
+                closed_leads(older_than_days).select_for_update(skip_locked=True)
+                .order_by('id').values_list('id', flat=True)[:size]
+            )
+            if not lead_ids:
+                break
+            archive_batch(lead_ids)
+        total += len(lead_ids)
+    return total
+
+
+def archive_batch(lead_ids):
+    """Move ``lead_ids`` and their history; must run inside a transaction."""
+    now = timezone.now()
+    ArchivedLead.objects.bulk_create([
+        ArchivedLead(**row, archived_at=now)
+        for row in Lead.objects.filter(pk__in=lead_ids).order_by().values(*columns(Lead))
+    ])
+    for model, archive_model in ARCHIVED_MODELS[1:]:
+        rows = list(model.objects.filter(lead_id__in=lead_ids).order_by().values(*columns(model)))
+        archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+        # Raw DELETEs: per-row post_delete handlers would record a delete event
+        # per row and take the leads out of the funnel summary, which keeps
+        # counting them once archived
+        model.objects.filter(lead_id__in=lead_ids)._raw_delete(model.objects.db)
+        # Remark history has no outbox stream; tracked history leaves it as archived
+        if issubclass(model, outbox.OutboxMixin):
+            outbox.record_removed(model, [row['id'] for row in rows], OutboxEvent.ARCHIVED)
+
+    DuplicateCandidate.objects.filter(lead_id__in=lead_ids).delete()
+    DuplicateCandidate.objects.filter(candidate_id__in=lead_ids).delete()
+    LeadIngestEvent.objects.filter(lead_id__in=lead_ids).update(lead=None)
+    Lead.objects.filter(pk__in=lead_ids)._raw_delete(Lead.objects.db)
+    outbox.record_removed(Lead, lead_ids, OutboxEvent.ARCHIVED)
+    cache.invalidate(Lead._meta.db_table)
+
+
+# ------------------------- Reporting -------------------------
+def table_stats(using='default'):
+    """
+    ``{table: {'rows': n, 'index_bytes': n or None}}`` for the hot and cold
+    tables. Index sizes come from ``pg_indexes_size`` on PostgreSQL and the
+    ``dbstat`` virtual table on SQLite builds that include it.
+    """
+    connection = connections[using]
+    stats = {}
+    for hot_model, archive_model in ARCHIVED_MODELS:
+        for model in (hot_model, archive_model):
+            table = model._meta.db_table
+            stats[table] = {
+                'rows': model.objects.using(using).count(),
+                'index_bytes': index_bytes(connection, table),
+            }
+    return stats
+
+
+def index_bytes(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_indexes_size(%s::regclass)', [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    'SELECT COALESCE(SUM(pgsize), 0) FROM dbstat '
+                    'WHERE name IN (SELECT name FROM sqlite_master WHERE type = %s AND tbl_name = %s)',
+                    ['index', table],
+                )
+            except DatabaseError:
+                # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+                return None
+            return cursor.fetchone()[0]
+    return None
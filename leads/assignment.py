@@ -0,0 +1,158 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from outbox import events as outbox
+from users.models import User
+from . import cache, funnel
+from .models import Lead, LeadAssignmentLoad
+
+
+ELIGIBLE_ROLES = ('ADM_MANAGER', 'ADM_EXEC')
+
+STRATEGY_ROUND_ROBIN = 'round_robin'
+STRATEGY_LEAST_OPEN = 'least_open'
+STRATEGY_WEIGHTED_TEAM = 'weighted_team'
+
+MAX_BULK_ASSIGN = 5000
+
+
+# ------------------------- Strategies -------------------------
+# Each strategy takes the locked load rows (with ``team`` attached) and the
+# number of leads, and returns one load row per lead in assignment order.
+def round_robin(loads, count):
+    queue = sorted(loads, key=lambda load: (load.rotation, load.user_id))
+    return [queue[index % len(queue)] for index in range(count)]
+
+
+def least_open(loads, count):
+    heap = [(load.open_leads, load.rotation, load.user_id, load) for load in loads]
+    heapq.heapify(heap)
+    picks = []
+    for _ in range(count):
+        open_leads, rotation, user_id, load = heapq.heappop(heap)
+        picks.append(load)
+        heapq.heappush(heap, (open_leads + 1, rotation, user_id, load))
+    return picks
+
+
+def weighted_team(loads, count):
+    """Split leads between teams by weight, then least-open within a team."""
+    weights = getattr(settings, 'LEAD_ASSIGNMENT_TEAM_WEIGHTS', {})
+    teams = defaultdict(list)
+    for load in loads:
+        if weights.get(load.team, 1) > 0:
+            teams[load.team].append(load)
+    if not teams:
+        return []
+
+    members = {}
+    heap = []
+    for team, team_loads in teams.items():
+        members[team] = [(load.open_leads, load.rotation, load.user_id, load) for load in team_loads]
+        heapq.heapify(members[team])
+        team_open = sum(load.open_leads for load in team_loads)
+        heap.append(((team_open + 1) / weights.get(team, 1), team, team_open))
+    heapq.heapify(heap)
+
+    picks = []
+    for _ in range(count):
+        _, team, team_open = heapq.heappop(heap)
+        open_leads, rotation, user_id, load = heapq.heappop(members[team])
+        picks.append(load)
+        heapq.heappush(members[team], (open_leads + 1, rotation, user_id, load))
+        team_open += 1
+        heapq.heappush(heap, ((team_open + 1) / weights.get(team, 1), team, team_open))
+    return picks
+
+
+STRATEGIES = {
+    STRATEGY_ROUND_ROBIN: round_robin,
+    STRATEGY_LEAST_OPEN: least_open,
+    STRATEGY_WEIGHTED_TEAM: weighted_team,
+}
+
+
+# ------------------------- Assignment -------------------------
+def lock_loads():
+    """
+    Lock the load row of every eligible user, creating missing ones. Rows
+    are locked in user id order so concurrent imports queue up instead of
+    deadlocking, and each sees the counts left by the one before it.
+    """
+    teams = dict(
+        User.objects.filter(role__in=ELIGIBLE_ROLES, is_active=True).values_list('id', 'team')
+    )
+    LeadAssignmentLoad.objects.bulk_create(
+        [LeadAssignmentLoad(user_id=user_id) for user_id in teams], ignore_conflicts=True
+    )
+    loads = list(LeadAssignmentLoad.objects.select_for_update().filter(user_id__in=teams).order_by('user_id'))
+    for load in loads:
+        load.team = teams[load.user_id]
+    return loads
+
+
+def assign(leads, strategy=STRATEGY_LEAST_OPEN):
+    """
+    Set ``assigned_to``/``assigned_date`` on ``leads`` in memory. Must run in
+    the transaction that saves them: the load rows stay locked until the
+    funnel hooks have counted the new assignments. Returns the leads that
+    got an assignee (none when no user is eligible).
+    """
+    loads = lock_loads()
+    if not loads or not leads:
+        return []
+    picks = STRATEGIES[strategy](loads, len(leads))
+
+    now = timezone.now()
+    rotation = max(load.rotation for load in loads) + 1
+    for position, (lead, load) in enumerate(zip(leads, picks)):
+        lead.assigned_to_id = load.user_id
+        lead.assigned_date = now
+        load.rotation = rotation + position
+    LeadAssignmentLoad.objects.bulk_update(set(picks), ['rotation'])
+    return leads[:len(picks)]
+
+
+def next_assignee(strategy=STRATEGY_LEAST_OPEN):
+    """Pick the assignee for a single new lead (same locking rules as assign())."""
+    lead = Lead()
+    return lead.assigned_to_id if assign([lead], strategy) else None
+
+
+def assign_existing(lead_ids, strategy=STRATEGY_LEAST_OPEN):
+    """
+    Assign already stored, unassigned leads. One locking SELECT, one
+    ``bulk_update`` and one counter UPDATE per funnel group and assignee.
+    Returns the ids of the leads that were assigned.
+    """
+    columns = ['id', *(Lead._meta.get_field(field).attname for field in funnel.FUNNEL_FIELDS)]
+    with transaction.atomic():
+        leads = list(
+            Lead.objects.select_for_update()
+            .filter(pk__in=lead_ids, assigned_to__isnull=True)
+            .order_by('id')
+            .only(*columns)
+        )
+        before = [funnel.lead_key(lead) for lead in leads]
+        assigned = assign(leads, strategy)
+        if not assigned:
+            return []
+
+        now = assigned[0].assigned_date
+        for lead in assigned:
+            lead.updated_at = now
+        Lead.objects.bulk_update(assigned, ['assigned_to', 'assigned_date', 'updated_at'], batch_size=1000)
+
+        deltas = Counter()
+        for key, lead in zip(before, assigned):
+            deltas[key] -= 1
+            deltas[funnel.lead_key(lead)] += 1
+        funnel.apply_deltas(deltas)
+        outbox.record_changed(assigned, ['assigned_to', 'assigned_date', 'updated_at'])
+        cache.invalidate(Lead._meta.db_table)
+
+    return [lead.pk for lead in assigned]
@@ -0,0 +1,99 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import exceptions
+
+from backend.async_views import AsyncAPIView
+from .filters import LeadFilter
+from .models import Lead, LeadStatus, ProcessingUpdate, Program
+from .permissions import CanAccessLeads, lead_scope
+from .renderers import FastJSONRenderer
+from .search import get_search_backend
+from .serializers import LeadDetailSerializer, LeadListSerializer, ProcessingUpdateSerializer
+from .views import LeadListView
+
+
+# ------------------------- Async Lead List View -------------------------
+class AsyncLeadListView(AsyncAPIView):
+    """
+    Async twin of LeadListView: the same equality filters, ``?search=``,
+    ``?ordering=``, sparse fieldsets and page-number payload, served
+    without tying up a thread while the client reads the response.
+    """
+    renderer_class = FastJSONRenderer
+    serializer_class = LeadListSerializer
+    permission_classes = [CanAccessLeads]
+    filterset_fields = LeadFilter.Meta.fields
+    ordering_fields = LeadListView.ordering_fields
+    ordering = LeadListView.ordering
+
+    def filter_queryset(self, queryset):
+        params = self.request.GET
+        for field in self.filterset_fields:
+            value = params.get(field)
+            if value in (None, ''):
+                continue
+            if field == 'assigned_to' and not value.isdigit():
+                raise exceptions.ValidationError({field: ["Select a valid choice."]})
+            if field == 'status':
+                # Joined rather than resolved through the lookup cache, which may need a sync reload
+                queryset = queryset.filter(status__code=value.strip())
+                continue
+            # The sync view's form field, which checks choices without the database
+            try:
+                value = LeadFilter.base_filters[field].field.clean(value)
+            except DjangoValidationError as error:
+                raise exceptions.ValidationError({field: error.messages})
+            queryset = queryset.filter(**{field: value})
+
+        terms = params.get('search', '').replace(',', ' ').split()
+        ordering = [
+            term for term in map(str.strip, params.get('ordering', '').split(','))
+            if term.lstrip('-') in self.ordering_fields
+        ]
+        if terms:
+            backend = get_search_backend(queryset.db)
+            queryset = backend.search(queryset, terms)
+            if backend.ranked and not ordering:
+                return queryset.order_by('-search_rank', *self.ordering)
+        return queryset.order_by(*(ordering or self.ordering))
+
+    async def get(self, request):
+        lookups = self.serializer_class.row_lookups(request)
+        queryset = self.serializer_class.values_queryset(self.filter_queryset(Lead.objects.filter(lead_scope(request.user))), lookups)
+        data = await self.paginate(queryset, lambda row: row)
+        for field, model in self.serializer_class.lookup_models.items():
+            if field in lookups:
+                await model.awarm(row[lookups[field]] for row in data['results'])
+        data['results'] = [self.serializer_class.represent_row(row, lookups) for row in data['results']]
+        return self.respond(data)
+
+
+# ------------------------- Async Lead Detail View -------------------------
+class AsyncLeadDetailView(AsyncAPIView):
+    renderer_class = FastJSONRenderer
+    serializer_class = LeadDetailSerializer
+    permission_classes = [CanAccessLeads]
+
+    async def get(self, request, pk):
+        queryset = self.serializer_class.narrow_queryset(Lead.objects.filter(lead_scope(request.user)), request)
+        try:
+            lead = await queryset.aget(pk=pk)
+        except Lead.DoesNotExist:
+            raise exceptions.NotFound("No Lead matches the given query.")
+        # Related fields render from the loaded ids (or select_related rows)
+        # and status/program from the lookup caches, loaded here if needed
+        await LeadStatus.awarm([lead.__dict__.get('status_id')])
+        await Program.awarm([lead.__dict__.get('program_id')])
+        return self.respond(self.serializer_class(lead, context={'request': request}).data)
+
+
+# ------------------------- Async Lead Processing Timeline View -------------------------
+class AsyncLeadProcessingTimelineView(AsyncAPIView):
+    renderer_class = FastJSONRenderer
+    serializer_class = ProcessingUpdateSerializer
+    permission_classes = [CanAccessLeads]
+
+    async def get(self, request, lead_id):
+        scope = lead_scope(request.user, prefix='lead__')
+        queryset = ProcessingUpdate.objects.filter(scope, lead_id=lead_id).order_by('-timestamp')
+        data = await self.paginate(queryset, lambda update: self.serializer_class(update).data)
+        return self.respond(data)
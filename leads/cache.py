@@ -0,0 +1,116 @@
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date
+from rest_framework.response import Response
+
+
+# Generation tokens live in the shared 'default' cache so that every worker
+# sees a bump immediately; cached pages live in a per-process LRU cache.
+GENERATION_CACHE = 'default'
+GENERATION_KEY = 'generation:{table}'
+
+# Hits and misses since this process started
+stats = Counter()
+
+
+def get_generation(table):
+    generation = caches[GENERATION_CACHE].get(GENERATION_KEY.format(table=table))
+    if generation is None:
+        generation = bump_generation(table)
+    return generation
+
+
+def bump_generation(table):
+    """
+    Start a new generation now. A unique token is written instead of an
+    increment so that concurrent bumps can never leave the old value behind.
+    """
+    generation = time.time_ns()
+    caches[GENERATION_CACHE].set(GENERATION_KEY.format(table=table), generation, None)
+    return generation
+
+
+def invalidate(table, using=None):
+    """
+    Bump ``table``'s generation now and, inside a transaction, again once
+    it commits: readers that cached pre-commit rows in between used the
+    intermediate generation, which the second bump retires.
+    """
+    bump_generation(table)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_generation(table), using=using)
+
+
+def hit_ratio():
+    total = stats['hit'] + stats['miss']
+    return stats['hit'] / total if total else None
+
+
+def cache_key(request, table, generation, scope=''):
+    """
+    Normalized query: parameter order and repeated blanks don't split the
+    cache. ``scope`` separates users who see different rows.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    query = '&'.join(f'{name}={value}' for name, value in params)
+    return f'{table}:{generation}:{scope}:{request.accepted_renderer.format}:{request.get_host()}{request.path}?{query}'
+
+
+class ResponseCacheMixin:
+    """
+    Serve repeated GETs of a list view from cache. Entries are keyed on the
+    normalized query string and the generation of ``cache_table``, which
+    writes bump, so a hit never needs the database and a write is visible to
+    the next request. Conditional requests are answered from the cached
+    validators. Views whose rows depend on the user return a key part from
+    ``get_cache_scope()``. Set ``response_cache_alias = None`` to opt out.
+    """
+    response_cache_alias = 'lead_lists'
+    cache_table = None
+    cached_formats = ('json',)
+
+    def get_cache_scope(self):
+        return ''
+
+    def get(self, request, *args, **kwargs):
+        if self.response_cache_alias is None or request.accepted_renderer.format not in self.cached_formats:
+            return super().get(request, *args, **kwargs)
+
+        cache = caches[self.response_cache_alias]
+        # Read the generation before the rows: a write racing this request
+        # leaves the result under a generation nobody asks for any more
+        key = cache_key(request, self.cache_table, get_generation(self.cache_table), self.get_cache_scope())
+        entry = cache.get(key)
+        if entry is not None:
+            stats['hit'] += 1
+            data, etag, last_modified = entry
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = Response(data)
+                if etag:
+                    response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        stats['miss'] += 1
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            last_modified = response.get('Last-Modified')
+            cache.set(key, (
+                response.data,
+                response.get('ETag'),
+                parse_http_date(last_modified) if last_modified else None,
+            ))
+        response['X-Cache'] = 'MISS'
+        return response
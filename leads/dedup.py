@@ -0,0 +1,183 @@
+"""
+Duplicate lead detection and merging.
+
+Leads carry canonical ``phone_normalized`` (E.164) and ``email_normalized``
+columns plus a phonetic ``name_key``. Candidates are found by blocking:
+leads sharing a blocking key land in the same bucket, buckets are unioned
+into clusters, and no pairwise comparison over the whole table is needed.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from outbox import events as outbox
+
+from . import remarks
+from .models import DuplicateCandidate, Lead, ProcessingUpdate, RemarkHistory
+
+
+REASON_PHONE = 'phone'
+REASON_EMAIL = 'email'
+REASON_NAME_PHONE = 'name_phone'
+
+# Fields copied from a duplicate when the primary lead has no value
+MERGE_FILL_FIELDS = (
+    'email', 'program', 'remarks', 'location', 'custom_source', 'processing_notes',
+    'documents_received', 'assigned_to', 'assigned_date', 'processing_executive', 'registration_date',
+)
+
+
+# ------------------------- Blocking -------------------------
+def blocking_keys(phone_normalized, email_normalized, name_key):
+    keys = []
+    if phone_normalized:
+        keys.append((REASON_PHONE, phone_normalized))
+    if email_normalized:
+        keys.append((REASON_EMAIL, email_normalized))
+    if name_key:
+        keys.append((REASON_NAME_PHONE, name_key))
+    return keys
+
+
+# ------------------------- Clustering -------------------------
+class DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def groups(self):
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+def find_clusters(queryset=None, chunk_size=5000):
+    """
+    Scan leads once and return ``(clusters, pairs)``. Each lead is joined
+    to the first lead seen with the same blocking key, so work is linear in
+    the number of leads. ``pairs`` maps ``(lead_id, candidate_id)`` to the
+    blocking reason.
+    """
+    queryset = Lead.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list('id', 'phone_normalized', 'email_normalized', 'name_key')
+
+    first_seen = {}
+    pairs = {}
+    clusters = DisjointSet()
+    for lead_id, phone, email, key in rows.iterator(chunk_size=chunk_size):
+        for block in blocking_keys(phone, email, key):
+            anchor = first_seen.setdefault(block, lead_id)
+            if anchor != lead_id:
+                clusters.union(anchor, lead_id)
+                pairs.setdefault((anchor, lead_id), block[0])
+    return clusters.groups(), pairs
+
+
+def find_candidates(leads):
+    """
+    Incremental detection for newly arrived leads: indexed lookups on the
+    canonical columns instead of a table scan. Returns the same
+    ``{(lead_id, candidate_id): reason}`` mapping as find_clusters().
+    """
+    leads = [lead for lead in leads if lead.pk]
+    if not leads:
+        return {}
+    phones = {lead.phone_normalized for lead in leads if lead.phone_normalized}
+    emails = {lead.email_normalized for lead in leads if lead.email_normalized}
+    keys = {lead.name_key for lead in leads if lead.name_key}
+
+    index = {}
+    matches = Lead.objects.filter(
+        Q(phone_normalized__in=phones) | Q(email_normalized__in=emails) | Q(name_key__in=keys)
+    ).values_list('id', 'phone_normalized', 'email_normalized', 'name_key')
+    for lead_id, phone, email, key in matches:
+        for block in blocking_keys(phone, email, key):
+            index.setdefault(block, set()).add(lead_id)
+
+    pairs = {}
+    for lead in leads:
+        for block in blocking_keys(lead.phone_normalized, lead.email_normalized, lead.name_key):
+            for other_id in index.get(block, ()):
+                if other_id != lead.pk:
+                    pairs.setdefault((min(lead.pk, other_id), max(lead.pk, other_id)), block[0])
+    return pairs
+
+
+def record_candidates(pairs):
+    """Store candidate pairs, ignoring ones already recorded."""
+    DuplicateCandidate.objects.bulk_create(
+        [
+            DuplicateCandidate(lead_id=lead_id, candidate_id=candidate_id, reason=reason)
+            for (lead_id, candidate_id), reason in pairs.items()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def detect_duplicates(leads):
+    record_candidates(find_candidates(leads))
+
+
+def candidate_clusters():
+    """Clusters built from the recorded (unresolved) candidate pairs."""
+    clusters = DisjointSet()
+    for lead_id, candidate_id in DuplicateCandidate.objects.values_list('lead_id', 'candidate_id'):
+        clusters.union(lead_id, candidate_id)
+    return clusters.groups()
+
+
+# ------------------------- Merging -------------------------
+def merge_leads(primary, duplicate_ids, changed_by=None):
+    """
+    Fold ``duplicate_ids`` into ``primary``: their ProcessingUpdate rows are
+    repointed, their RemarkHistory is appended to the primary's chain, blank
+    fields on the primary are filled from the duplicates (oldest first), and
+    the duplicates are deleted.
+    """
+    duplicate_ids = [lead_id for lead_id in dict.fromkeys(duplicate_ids) if lead_id != primary.pk]
+
+    with transaction.atomic():
+        primary = Lead.objects.select_for_update().get(pk=primary.pk)
+        duplicates = list(
+            Lead.objects.select_for_update().filter(pk__in=duplicate_ids).order_by('created_at', 'id')
+        )
+        if not duplicates:
+            return primary, []
+
+        merged_ids = [duplicate.pk for duplicate in duplicates]
+        moved_updates = ProcessingUpdate.objects.filter(lead_id__in=merged_ids)
+        outbox.record_updated(ProcessingUpdate, list(moved_updates.values_list('id', flat=True)), {'lead': primary})
+        moved_updates.update(lead=primary)
+        remarks.move(merged_ids, primary)
+
+        previous_remarks = primary.remarks
+        for duplicate in duplicates:
+            for field in MERGE_FILL_FIELDS:
+                attname = Lead._meta.get_field(field).attname
+                if getattr(primary, attname) in (None, '') and getattr(duplicate, attname) not in (None, ''):
+                    setattr(primary, attname, getattr(duplicate, attname))
+
+        # Unique phone/email values must leave the table before the primary takes them
+        for duplicate in duplicates:
+            duplicate.delete()
+        primary.save()
+
+        if primary.remarks != previous_remarks:
+            RemarkHistory.objects.create(
+                lead=primary,
+                previous_remarks=previous_remarks,
+                new_remarks=primary.remarks,
+                changed_by=changed_by
+            )
+
+    return primary, merged_ids
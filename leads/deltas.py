@@ -0,0 +1,110 @@
+"""
+Delta encoding for remark history.
+
+Each lead's remark edits form a chain of versions 1, 2, 3, ... Every
+version stores two deltas: ``previous_delta`` rebuilds the remarks before
+the edit from the previous version's new remarks, and ``new_delta``
+rebuilds the remarks after the edit from those. Every
+``CHECKPOINT_INTERVAL`` versions ``previous_delta`` holds the full text
+instead, so any version is rebuilt from at most that many rows.
+
+A delta is one of:
+
+- ``None``: the value is NULL
+- ``[]``: the value equals the base
+- ``[prefix, text, suffix]``: the base's first ``prefix`` and last
+  ``suffix`` characters around ``text``
+
+Remarks are mostly appended to or edited in one place, so a single
+prefix/suffix hunk captures a typical edit and costs O(n) to compute.
+"""
+CHECKPOINT_INTERVAL = 16
+
+
+def is_checkpoint(version):
+    return (version - 1) % CHECKPOINT_INTERVAL == 0
+
+
+def checkpoint_of(version):
+    """The checkpoint version a chain has to be read from to rebuild ``version``."""
+    return version - (version - 1) % CHECKPOINT_INTERVAL
+
+
+def self_contained(delta):
+    """Whether ``delta`` rebuilds its value without the base."""
+    return delta is None or (len(delta) == 3 and delta[0] == 0 and delta[2] == 0)
+
+
+def common_prefix_length(first, second):
+    # Binary search over slice comparisons: C-speed on long remarks
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(first, second, limit):
+    low, high = 0, min(len(first), len(second), limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[len(first) - middle:] == second[len(second) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff(base, value):
+    if value is None:
+        return None
+    if value == base:
+        return []
+    base = base or ''
+    prefix = common_prefix_length(base, value)
+    suffix = common_suffix_length(base, value, min(len(base), len(value)) - prefix)
+    return [prefix, value[prefix:len(value) - suffix], suffix]
+
+
+def patch(base, delta):
+    if delta is None:
+        return None
+    if not delta:
+        return base
+    prefix, text, suffix = delta
+    base = base or ''
+    return base[:prefix] + text + (base[len(base) - suffix:] if suffix else '')
+
+
+def encode(version, last_new, previous, new):
+    """``(previous_delta, new_delta)`` for one edit, given the prior version's new remarks."""
+    # Checkpoints diff against nothing, which stores the full text
+    previous_delta = diff(None if is_checkpoint(version) else last_new, previous)
+    return previous_delta, diff(previous, new)
+
+
+def encode_chain(edits, version=0, last_new=None):
+    """
+    Encode ``(previous, new)`` pairs appended to a chain whose last version
+    is ``version`` with new remarks ``last_new``; yields
+    ``(version, previous_delta, new_delta)``.
+    """
+    for previous, new in edits:
+        version += 1
+        yield (version, *encode(version, last_new, previous, new))
+        last_new = new
+
+
+def decode_chain(deltas, last_new=None):
+    """
+    Rebuild ``(previous, new)`` for consecutive ``(previous_delta,
+    new_delta)`` pairs, starting after a version whose new remarks were
+    ``last_new`` (or at a self-contained version).
+    """
+    for previous_delta, new_delta in deltas:
+        previous = patch(last_new, previous_delta)
+        last_new = patch(previous, new_delta)
+        yield previous, last_new
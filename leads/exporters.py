@@ -0,0 +1,76 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+EXPORT_FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv',
+    FORMAT_NDJSON: 'application/x-ndjson',
+}
+
+# (column name, ORM lookup); the assigned user's name, status code and program name are joined in SQL
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('name', 'name'),
+    ('phone', 'phone'),
+    ('email', 'email'),
+    ('status', 'status__code'),
+    ('priority', 'priority'),
+    ('program', 'program__name'),
+    ('source', 'source'),
+    ('custom_source', 'custom_source'),
+    ('location', 'location'),
+    ('processing_status', 'processing_status'),
+    ('document_status', 'document_status'),
+    ('assigned_to', 'assigned_to__username'),
+    ('assigned_date', 'assigned_date'),
+    ('remarks', 'remarks'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Stream plain tuples from the database without building model instances."""
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in iter_rows(queryset):
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def iter_ndjson(queryset):
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    for row in iter_rows(queryset):
+        yield json.dumps(dict(zip(columns, map(format_value, row)))) + '\n'
+
+
+def stream_export(queryset, file_format, filename='leads'):
+    rows = iter_csv(queryset) if file_format == FORMAT_CSV else iter_ndjson(queryset)
+    response = StreamingHttpResponse(rows, content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,77 @@
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters
+
+from .models import ArchivedLead, Lead, LeadStatus
+from .search import LikeSearchBackend, get_search_backend
+
+
+class LookupFilter(django_filters.CharFilter):
+    """Filter a ``LookupTable`` foreign key by its string form, e.g. ``?status=ENQUIRY``."""
+
+    def __init__(self, lookup_model, **kwargs):
+        # FilterSets set ``model`` to the filtered model
+        self.lookup_model = lookup_model
+        super().__init__(**kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        row = self.lookup_model.resolve(value)
+        if row is None:
+            return qs.none()
+        return qs.filter(**{f'{self.field_name}_id': row.pk})
+
+
+class LeadFilter(django_filters.FilterSet):
+    status = LookupFilter(LeadStatus)
+
+    class Meta:
+        model = Lead
+        fields = ['priority', 'status', 'source', 'processing_status', 'assigned_to']
+
+
+class ArchivedLeadFilter(LeadFilter):
+    class Meta(LeadFilter.Meta):
+        model = ArchivedLead
+
+
+class LeadFilterBackend(DjangoFilterBackend):
+    """
+    Picks the FilterSet by queryset model, so the lead list can run the same
+    query string over ``ArchivedLead`` when it includes the archive.
+    """
+    filtersets = {Lead: LeadFilter, ArchivedLead: ArchivedLeadFilter}
+
+    def get_filterset_class(self, view, queryset=None):
+        return self.filtersets[queryset.model]
+
+
+class LeadSearchFilter(filters.SearchFilter):
+    """
+    Same ``?search=`` API as DRF's SearchFilter, served by the configured
+    full-text backend. Ranked backends annotate ``search_rank`` and order by
+    relevance unless the client asks for an explicit ``?ordering=``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        # The full-text indexes only cover leads_lead; the archive is matched with LIKE
+        backend = get_search_backend(queryset.db) if queryset.model is Lead else LikeSearchBackend()
+        queryset = backend.search(queryset, terms)
+        if backend.ranked:
+            queryset = queryset.order_by('-search_rank', *(getattr(view, 'ordering', None) or ()))
+        return queryset
+
+
+class LeadOrderingFilter(filters.OrderingFilter):
+    """Leaves relevance ordering in place when no ordering was requested."""
+
+    def filter_queryset(self, request, queryset, view):
+        if self.ordering_param not in request.query_params and 'search_rank' in queryset.query.extra_select:
+            return queryset
+        return super().filter_queryset(request, queryset, view)
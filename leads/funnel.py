@@ -0,0 +1,170 @@
+from collections import Counter
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, F
+
+from .models import ArchivedLead, Lead, LeadAssignmentLoad, LeadFunnelCount, LeadStatus
+
+
+# Lead fields that make up a funnel group, in LeadFunnelCount column order
+FUNNEL_FIELDS = ('status', 'source', 'priority', 'processing_status', 'assigned_to')
+FUNNEL_COLUMNS = ('status_id', 'source', 'priority', 'processing_status', 'assigned_to_id')
+UNASSIGNED = 0
+
+# A lead counts towards its assignee's load until processing closes it
+CLOSED_PROCESSING_STATUSES = ('COMPLETED', 'REJECTED')
+
+
+def funnel_key(values):
+    """Build a group key from ``{lead field name: value}`` (FKs as ids)."""
+    key = [values[field] for field in FUNNEL_FIELDS]
+    key[-1] = key[-1] or UNASSIGNED
+    return tuple(key)
+
+
+def lead_key(lead):
+    return funnel_key({field: getattr(lead, Lead._meta.get_field(field).attname) for field in FUNNEL_FIELDS})
+
+
+def original_lead_key(lead):
+    """Group key of the row as it was loaded, from DirtyFieldsMixin's snapshot."""
+    return funnel_key({field: lead.get_original(field) for field in FUNNEL_FIELDS})
+
+
+def add_counts(model, key_columns, column, deltas, defaults=None):
+    """
+    Add each ``{key: delta}`` to ``column`` of the ``model`` row whose
+    ``key_columns`` equal ``key``, creating missing rows (with
+    ``defaults``). One ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and
+    PostgreSQL, so a write touching several groups costs a single query.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    defaults = defaults or {}
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        for key, delta in deltas.items():
+            add_count(model, dict(zip(key_columns, key)), column, delta, defaults)
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = [quote(model._meta.get_field(name).column) for name in (*key_columns, *defaults, column)]
+    target = names[-1]
+    row = f"({', '.join(['%s'] * len(names))})"
+    params = [value for key, delta in deltas.items() for value in (*key, *defaults.values(), delta)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES {', '.join([row] * len(deltas))} "
+            f"ON CONFLICT ({', '.join(names[:len(key_columns)])}) "
+            f"DO UPDATE SET {target} = {table}.{target} + excluded.{target}",
+            params,
+        )
+
+
+def add_count(model, lookup, column, delta, defaults):
+    """One row at a time, for backends without ``ON CONFLICT``."""
+    if model.objects.filter(**lookup).update(**{column: F(column) + delta}):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **{column: delta})
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**lookup).update(**{column: F(column) + delta})
+
+
+def load_deltas(deltas):
+    """Fold group deltas into ``{assignee id: open lead delta}``."""
+    loads = Counter()
+    for key, delta in deltas.items():
+        processing_status, user_id = key[-2:]
+        if user_id != UNASSIGNED and processing_status not in CLOSED_PROCESSING_STATUSES:
+            loads[user_id] += delta
+    return loads
+
+
+def apply_deltas(deltas):
+    """
+    Apply a ``Counter`` of ``{key: delta}``: one upsert for the touched
+    groups and, if any assignee's open lead count changed, one for those.
+    """
+    add_counts(LeadFunnelCount, FUNNEL_COLUMNS, 'count', deltas)
+    add_counts(
+        LeadAssignmentLoad, ('user_id',), 'open_leads',
+        {(user_id,): delta for user_id, delta in load_deltas(deltas).items()},
+        defaults={'rotation': 0},
+    )
+
+
+def record_created(leads):
+    """Count leads inserted through bulk paths that bypass model signals."""
+    apply_deltas(Counter(lead_key(lead) for lead in leads))
+
+
+def record_moved(rows, changes):
+    """
+    Count a bulk ``QuerySet.update()``: ``rows`` are the pre-update values
+    of each lead's funnel fields and ``changes`` the fields being set.
+    """
+    deltas = Counter()
+    for row in rows:
+        before = funnel_key(row)
+        after = funnel_key({**row, **changes})
+        if before != after:
+            deltas[before] -= 1
+            deltas[after] += 1
+    apply_deltas(deltas)
+
+
+def reassign_user(user_id):
+    """
+    Move a user's groups to the unassigned bucket; Lead.assigned_to is
+    SET_NULL by a bulk UPDATE that sends no Lead signals.
+    """
+    deltas = Counter()
+    for group in LeadFunnelCount.objects.filter(assigned_to_id=user_id):
+        key = tuple(getattr(group, column) for column in FUNNEL_COLUMNS)
+        deltas[key] -= group.count
+        deltas[key[:-1] + (UNASSIGNED,)] += group.count
+    apply_deltas(deltas)
+
+
+def compute_groups():
+    """Exact group counts straight from leads_lead and the lead archive."""
+    groups = Counter()
+    for model in (Lead, ArchivedLead):
+        rows = model.objects.order_by().values(*FUNNEL_FIELDS).annotate(total=Count('id'))
+        for row in rows:
+            groups[funnel_key(row)] += row['total']
+    return groups
+
+
+def compute_loads(groups=None):
+    """Exact open lead counts per assignee, derived from group counts."""
+    loads = load_deltas(compute_groups() if groups is None else groups)
+    return Counter({user_id: count for user_id, count in loads.items() if count})
+
+
+def stored_groups():
+    return Counter({
+        tuple(getattr(group, column) for column in FUNNEL_COLUMNS): group.count
+        for group in LeadFunnelCount.objects.all()
+    })
+
+
+def summarize(groups):
+    """Roll group counts up into per-dimension totals for the dashboard."""
+    summary = {'total': 0, **{field: Counter() for field in FUNNEL_FIELDS}}
+    for key, count in groups.items():
+        if count <= 0:
+            continue
+        summary['total'] += count
+        for field, value in zip(FUNNEL_FIELDS, key):
+            summary[field][value] += count
+    # Groups hold status ids; the dashboard reports status codes
+    summary['status'] = Counter({LeadStatus.display(pk): count for pk, count in summary['status'].items()})
+    for field in FUNNEL_FIELDS:
+        summary[field] = dict(summary[field].most_common())
+    return summary
@@ -0,0 +1,200 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from outbox import events as outbox
+
+from . import assignment, cache, dedup, funnel
+from .models import Lead, ProcessingUpdate
+from .serializers import LeadImportSerializer
+
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+IMPORT_FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+ROW_ACCEPTED = 'accepted'
+ROW_DUPLICATE = 'duplicate'
+ROW_INVALID = 'invalid'
+
+
+def detect_format(filename, default=FORMAT_CSV):
+    """Guess the import format from a file name extension."""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return FORMAT_JSONL
+    if name.endswith('.csv'):
+        return FORMAT_CSV
+    return default
+
+
+def iter_rows(stream, file_format):
+    """
+    Yield ``(row_number, data)`` pairs from a binary or text stream without
+    reading the whole input into memory. Malformed JSON lines are yielded
+    with ``data=None`` so they can be reported as invalid.
+    """
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if file_format == FORMAT_CSV:
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # Empty cells fall back to model defaults instead of failing choices
+            yield row_number, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+
+    row_number = 0
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        yield row_number, data if isinstance(data, dict) else None
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LeadImporter:
+    """
+    Set-based bulk lead import.
+
+    Each chunk is validated in memory, checked for existing phone/email
+    values with one ``IN`` query and inserted with ``bulk_create``; leads
+    that start past PENDING get their initial ``ProcessingUpdate`` rows with
+    a second ``bulk_create``, as LeadCreateView writes them. Funnel
+    counts are adjusted once per group touched by the chunk, and possible
+    duplicates of the new leads are looked up with one indexed query. With
+    an ``assignment_strategy`` the chunk is spread over the admission team
+    before it is inserted.
+    """
+    chunk_size = 1000
+    # Chunk inserts tried before falling back to one row at a time
+    max_attempts = 3
+    initial_notes = "Initial status on lead import"
+
+    def __init__(self, user=None, chunk_size=None, assignment_strategy=None):
+        self.user = user
+        self.assignment_strategy = assignment_strategy
+        if chunk_size:
+            self.chunk_size = chunk_size
+        self.report = []
+        self.summary = {ROW_ACCEPTED: 0, ROW_DUPLICATE: 0, ROW_INVALID: 0}
+
+    def run(self, stream, file_format=FORMAT_CSV):
+        for chunk in chunked(iter_rows(stream, file_format), self.chunk_size):
+            self.import_chunk(chunk)
+        return {'summary': self.summary, 'rows': self.report}
+
+    def import_chunk(self, rows):
+        results, valid = [], []
+        for row_number, data in rows:
+            if data is None:
+                results.append((row_number, ROW_INVALID, {'errors': {'non_field_errors': ['Malformed row.']}}))
+                continue
+            serializer = LeadImportSerializer(data=data)
+            if not serializer.is_valid():
+                results.append((row_number, ROW_INVALID, {'errors': serializer.errors}))
+                continue
+            valid.append((row_number, serializer.validated_data))
+
+        if valid:
+            results.extend(self.insert_with_retries(valid))
+
+        for row_number, row_status, extra in sorted(results, key=lambda result: result[0]):
+            self.summary[row_status] += 1
+            self.report.append({'row': row_number, 'status': row_status, **extra})
+
+    def insert_with_retries(self, valid):
+        """
+        insert_chunk(), run again while a concurrent writer inserts one of
+        the chunk's phones/emails between the IN check and the insert (each
+        run re-checks against the fresh table). After ``max_attempts`` the
+        rows go in one at a time, so a row that keeps failing is reported
+        invalid on its own instead of failing the chunk.
+        """
+        for _ in range(self.max_attempts):
+            try:
+                return self.insert_chunk(valid)
+            except IntegrityError:
+                continue
+
+        results = []
+        for row in valid:
+            try:
+                results.extend(self.insert_chunk([row]))
+            except IntegrityError as exc:
+                results.append((row[0], ROW_INVALID, {'errors': {'non_field_errors': [str(exc)]}}))
+        return results
+
+    def insert_chunk(self, valid):
+        phones = {data['phone'] for _, data in valid}
+        emails = {data['email'] for _, data in valid if data.get('email')}
+
+        existing = Lead.objects.filter(Q(phone__in=phones) | Q(email__in=emails)).values_list('phone', 'email')
+        # Earlier chunks are already in the table; these sets also catch
+        # repeats within the current chunk.
+        existing_phones, existing_emails = set(), set()
+        for phone, email in existing:
+            existing_phones.add(phone)
+            if email:
+                existing_emails.add(email)
+
+        pending, duplicates = [], []
+        for row_number, data in valid:
+            email = data.get('email')
+            if data['phone'] in existing_phones:
+                duplicates.append((row_number, 'phone'))
+                continue
+            if email and email in existing_emails:
+                duplicates.append((row_number, 'email'))
+                continue
+            existing_phones.add(data['phone'])
+            if email:
+                existing_emails.add(email)
+            lead = Lead(**data)
+            # bulk_create skips save(), which normally fills these
+            lead.refresh_dedup_keys()
+            pending.append((row_number, lead))
+
+        with transaction.atomic():
+            if self.assignment_strategy:
+                assignment.assign([lead for _, lead in pending], self.assignment_strategy)
+            leads = Lead.objects.bulk_create([lead for _, lead in pending])
+            updates = ProcessingUpdate.objects.bulk_create([
+                ProcessingUpdate(
+                    lead=lead,
+                    status=lead.processing_status,
+                    changed_by=self.user,
+                    processing_executive_id=lead.processing_executive_id,
+                    notes=self.initial_notes,
+                )
+                for lead in leads
+                if lead.processing_status != 'PENDING'
+            ])
+            # bulk_create sends no post_save, so count the new leads here
+            funnel.record_created(leads)
+            outbox.record_created([*leads, *updates])
+            dedup.detect_duplicates(leads)
+            cache.invalidate(Lead._meta.db_table)
+
+        results = [(row_number, ROW_DUPLICATE, {'field': field}) for row_number, field in duplicates]
+        for row_number, lead in pending:
+            results.append((row_number, ROW_ACCEPTED, {'lead_id': lead.pk}))
+        return results
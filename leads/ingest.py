@@ -0,0 +1,231 @@
+"""
+Webhook lead ingestion.
+
+The webhook view only appends the raw payload to ``LeadIngestEvent`` and
+answers 202, so callers never wait on lead validation, lookups or history
+writes. ``drain()`` later takes the pending events in id order, a batch at
+a time, turns each payload into contacts and upserts them by canonical
+phone: known numbers get their ``program``/``remarks`` updated with one
+``bulk_update``, new numbers are inserted with one ``bulk_create``.
+"""
+import hmac
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from outbox import events as outbox
+from . import assignment, cache, dedup, funnel
+from .models import Lead, LeadIngestEvent, Program, RemarkHistory
+from .normalization import NON_DIGITS, normalize_email, normalize_phone
+
+
+INGEST_SOURCES = {value.lower(): value for value, _ in LeadIngestEvent.SOURCE_CHOICES}
+
+DEFAULT_BATCH_SIZE = 500
+
+# Payload keys accepted for each lead field, first match wins
+CONTACT_KEYS = {
+    'name': ('name', 'full_name', 'first_name'),
+    'phone': ('phone', 'phone_number', 'mobile', 'wa_id', 'from'),
+    'email': ('email', 'email_address'),
+    'program': ('program', 'course', 'programme'),
+    'remarks': ('remarks', 'message', 'text', 'comments'),
+    'location': ('location', 'city'),
+}
+
+
+# ------------------------- Receiving -------------------------
+def valid_token(token):
+    """Constant-time check of the shared webhook secret; no secret means no webhooks."""
+    secret = getattr(settings, 'LEAD_WEBHOOK_SECRET', '')
+    return bool(secret and token) and hmac.compare_digest(str(token), secret)
+
+
+def enqueue(source, payload):
+    """The whole request-time cost of a webhook: one INSERT."""
+    return LeadIngestEvent.objects.create(source=source, payload=payload)
+
+
+# ------------------------- Payload parsing -------------------------
+def pick(data, field):
+    for key in CONTACT_KEYS[field]:
+        value = data.get(key)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, dict):
+            # WhatsApp text messages: {"text": {"body": "..."}}
+            value = value.get('body')
+        if value not in (None, ''):
+            return str(value).strip()
+    return None
+
+
+def iter_contacts(payload):
+    """
+    Yield one flat dict per contact in a payload. Understands the WhatsApp
+    Cloud API envelope, Meta lead-ad ``field_data`` lists, flat objects from
+    automation tools and lists of any of those.
+    """
+    if isinstance(payload, list):
+        for item in payload:
+            yield from iter_contacts(item)
+        return
+    if not isinstance(payload, dict):
+        return
+
+    if 'entry' in payload:
+        for entry in payload.get('entry') or ():
+            for change in entry.get('changes') or ():
+                yield from iter_contacts(change.get('value'))
+        return
+
+    if 'messages' in payload or 'contacts' in payload:
+        names = {
+            contact.get('wa_id'): (contact.get('profile') or {}).get('name')
+            for contact in payload.get('contacts') or ()
+        }
+        for message in payload.get('messages') or ():
+            yield {**message, 'name': names.get(message.get('from'))}
+        return
+
+    if 'field_data' in payload:
+        yield {field.get('name'): field.get('values') for field in payload['field_data'] if field.get('name')}
+        return
+
+    yield payload
+
+
+def parse_contact(source, data):
+    """Lead field values for one contact, or None when it has no usable phone number."""
+    contact = {field: pick(data, field) for field in CONTACT_KEYS}
+    digits = NON_DIGITS.sub('', contact['phone'] or '')
+    if not 10 <= len(digits) <= 15:
+        return None
+    contact['phone'] = digits
+    contact['phone_normalized'] = normalize_phone(digits)
+    if not contact['name'] or len(contact['name']) < 3:
+        contact['name'] = f"{dict(Lead.SOURCE_CHOICES)[source]} {digits[-4:]}"
+    contact['name'] = contact['name'][:100]
+    contact['email'] = normalize_email(contact['email'])
+    if contact['program']:
+        contact['program'] = contact['program'][:2000]
+    if contact['location']:
+        contact['location'] = contact['location'][:100]
+    return contact
+
+
+# ------------------------- Draining -------------------------
+def drain(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Process up to ``batch_size`` pending events and return how many were
+    taken. Workers can run side by side: each locks its batch with SKIP
+    LOCKED where the database supports it.
+    """
+    with transaction.atomic():
+        events = list(
+            LeadIngestEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+        try:
+            with transaction.atomic():
+                apply_events(events)
+        except IntegrityError:
+            # Another writer took one of our phones/emails between the lookup
+            # and the insert; redo the batch against the fresh table state.
+            with transaction.atomic():
+                apply_events(events)
+
+        now = timezone.now()
+        for event in events:
+            event.processed_at = now
+        LeadIngestEvent.objects.bulk_update(events, ['processed_at', 'lead', 'error'])
+    return len(events)
+
+
+def apply_events(events):
+    contacts = []
+    for event in events:
+        event.lead, event.error = None, ''
+        parsed = [parse_contact(event.source, data) for data in iter_contacts(event.payload)]
+        parsed = [contact for contact in parsed if contact]
+        if not parsed:
+            event.error = "No contact with a valid phone number."
+        contacts.extend((event, contact) for contact in parsed)
+    if not contacts:
+        return
+
+    phones = {contact['phone_normalized'] for _, contact in contacts}
+    raw_phones = {contact['phone'] for _, contact in contacts}
+    emails = {contact['email'] for _, contact in contacts if contact['email']}
+    known, taken_phones, taken_emails = {}, set(), set()
+    for lead in Lead.objects.filter(
+        Q(phone_normalized__in=phones) | Q(phone__in=raw_phones) | Q(email_normalized__in=emails)
+    ):
+        if lead.phone_normalized:
+            known.setdefault(lead.phone_normalized, lead)
+        taken_phones.add(lead.phone)
+        if lead.email_normalized:
+            taken_emails.add(lead.email_normalized)
+
+    now = timezone.now()
+    created, updated, history = [], {}, []
+    for event, contact in contacts:
+        program = Program.resolve(contact['program'], create=True)
+        lead = known.get(contact['phone_normalized'])
+        if lead is None:
+            if contact['phone'] in taken_phones:
+                # Same digits stored under a different canonical form; nothing to upsert into
+                event.error = f"Phone {contact['phone']} belongs to a lead with a different country code."
+                continue
+            # Emails are unique: keep the lead and leave out an email another lead owns
+            email = contact['email'] if contact['email'] not in taken_emails else None
+            if email:
+                taken_emails.add(email)
+            lead = Lead(
+                name=contact['name'],
+                phone=contact['phone'],
+                email=email,
+                source=event.source,
+                program=program,
+                remarks=contact['remarks'],
+                location=contact['location'],
+            )
+            # bulk_create skips save(), which normally fills these
+            lead.refresh_dedup_keys()
+            known[contact['phone_normalized']] = lead
+            taken_phones.add(contact['phone'])
+            created.append(lead)
+        else:
+            # Repeat contact: keep the lead, refresh what the new message says
+            if program and program.pk != lead.program_id:
+                lead.program = program
+                updated[id(lead)] = lead
+            if contact['remarks'] and contact['remarks'] != lead.remarks:
+                history.append(RemarkHistory(lead=lead, previous_remarks=lead.remarks, new_remarks=contact['remarks']))
+                lead.remarks = contact['remarks']
+                updated[id(lead)] = lead
+        event.lead = event.lead or lead
+
+    strategy = settings.LEAD_ASSIGNMENT_STRATEGY
+    if created and strategy:
+        assignment.assign(created, strategy)
+    Lead.objects.bulk_create(created)
+    # Leads created earlier in this batch were inserted with their latest values
+    created_ids = {id(lead) for lead in created}
+    updated = [lead for key, lead in updated.items() if key not in created_ids]
+    for lead in updated:
+        lead.updated_at = now
+    Lead.objects.bulk_update(updated, ['program', 'remarks', 'updated_at'])
+    RemarkHistory.objects.bulk_create([row for row in history if row.lead.pk])
+
+    # bulk_create/bulk_update send no signals, so keep the summaries in step here
+    funnel.record_created(created)
+    outbox.record_created(created)
+    outbox.record_changed(updated, ['program', 'remarks', 'updated_at'])
+    dedup.detect_duplicates(created)
+    cache.invalidate(Lead._meta.db_table)
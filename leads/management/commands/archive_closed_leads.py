@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leads import archive
+
+
+class Command(BaseCommand):
+    help = "Move leads closed more than N days ago, with their history, into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180, help="Archive leads closed more than this many days ago")
+        parser.add_argument('--batch-size', type=int, default=archive.DEFAULT_BATCH_SIZE, help="Leads moved per transaction")
+        parser.add_argument('--limit', type=int, help="Stop after archiving this many leads")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the leads that would be archived")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days must be >= 0 and --batch-size >= 1")
+
+        if options['dry_run']:
+            count = archive.closed_leads(options['days']).count()
+            self.stdout.write(f"Would archive {count} leads")
+            return
+
+        before = archive.table_stats()
+        archived = archive.archive_closed_leads(options['days'], options['batch_size'], options['limit'])
+        after = archive.table_stats()
+
+        for table, stats in before.items():
+            self.stdout.write(
+                f"{table}: rows {stats['rows']} -> {after[table]['rows']}, "
+                f"index bytes {self.format_bytes(stats['index_bytes'])} -> {self.format_bytes(after[table]['index_bytes'])}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Archived: {archived}"))
+
+    @staticmethod
+    def format_bytes(value):
+        return 'n/a' if value is None else value
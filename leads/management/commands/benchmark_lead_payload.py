@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from leads.models import Lead, Program
+from leads.views import LeadDetailView, LeadListView
+from users.models import User
+
+
+SPARSE_FIELDS = 'id,name,phone'
+LONG_TEXT = "Called, discussed fees and batch timings, asked to share documents. " * 25
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size and latency of full and sparse (?fields=) lead "
+        "responses on synthetic data. Rows are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        list_view = LeadListView.as_view(response_cache_alias=None)
+        detail_view = LeadDetailView.as_view()
+
+        # The request factory uses the 'testserver' host
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            admin = User.objects.create_user(username='payload-benchmark', role='ADMIN', is_staff=True)
+            self.seed(options['rows'])
+            lead_id = Lead.objects.values_list('id', flat=True).first()
+            page = f"page_size={options['page_size']}"
+
+            cases = [
+                ('detail', detail_view, f'/api/leads/{lead_id}/', '', {'pk': lead_id}),
+                ('detail', detail_view, f'/api/leads/{lead_id}/', f'fields={SPARSE_FIELDS}', {'pk': lead_id}),
+                ('list', list_view, '/api/leads/', page, {}),
+                ('list', list_view, '/api/leads/', f'{page}&fields={SPARSE_FIELDS}', {}),
+            ]
+            self.stdout.write(f"{'endpoint':<10}{'query':<36}{'bytes':>10}{'median ms':>12}")
+            for name, view, path, query, kwargs in cases:
+                size, median_ms = self.measure(factory, admin, view, f'{path}?{query}', kwargs, options['repeat'])
+                self.stdout.write(f"{name:<10}{query or '(full)':<36}{size:>10,}{median_ms:>12.2f}")
+            transaction.set_rollback(True)
+
+    def seed(self, rows, batch_size=5000):
+        rng = random.Random(rows)
+        programs = [
+            Program.resolve(name * 40, create=True)
+            for name in ('Data Science', 'Python Full Stack', 'Digital Marketing')
+        ]
+        for offset in range(0, rows, batch_size):
+            Lead.objects.bulk_create([
+                Lead(
+                    name=f"Benchmark Lead {number}",
+                    phone=f"8{number:09d}",
+                    source='OTHER',
+                    program=rng.choice(programs),
+                    remarks=LONG_TEXT,
+                    processing_notes=LONG_TEXT,
+                    documents_received=LONG_TEXT,
+                )
+                for number in range(offset, min(offset + batch_size, rows))
+            ])
+
+    def measure(self, factory, user, view, url, kwargs, repeat):
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            request = factory.get(url, HTTP_ACCEPT='application/json')
+            force_authenticate(request, user)
+            started = time.perf_counter()
+            response = view(request, **kwargs).render()
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(response.content)
+        return size, statistics.median(timings)
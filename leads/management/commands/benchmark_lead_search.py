@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from leads.models import Lead, Program
+from leads.search import LikeSearchBackend, get_search_backend
+
+
+FIRST_NAMES = ['Anjali', 'Arjun', 'Fathima', 'Rahul', 'Sneha', 'Vishnu', 'Aisha', 'Nikhil', 'Meera', 'Joseph']
+LAST_NAMES = ['Nair', 'Menon', 'Pillai', 'Thomas', 'Varghese', 'Kurian', 'Rahman', 'Iyer', 'George', 'Das']
+PROGRAMS = ['Data Science', 'Python Full Stack', 'MERN Stack', 'Digital Marketing', 'Flutter', 'DevOps']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full-text lead search backend with the icontains filter on "
+        "synthetic data. Rows are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+        parser.add_argument('--terms', nargs='+', default=['anjali', 'menon', '98470', 'python full', 'zzzz'])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = get_search_backend(using)
+        like = LikeSearchBackend()
+        backend.install(connections[using])
+
+        with transaction.atomic(using=using):
+            seeded = 0
+            for target in sorted(options['rows']):
+                self.seed(using, seeded, target)
+                seeded = target
+                self.stdout.write(f"\n{target:,} rows ({type(backend).__name__} vs icontains)")
+                self.stdout.write(f"{'term':<16}{'fts ms':>10}{'like ms':>10}{'speedup':>10}{'hits':>10}")
+                for term in options['terms']:
+                    fts_ms, hits = self.measure(backend, using, term, options['repeat'])
+                    like_ms, _ = self.measure(like, using, term, options['repeat'])
+                    speedup = like_ms / fts_ms if fts_ms else float('inf')
+                    self.stdout.write(f"{term:<16}{fts_ms:>10.1f}{like_ms:>10.1f}{speedup:>9.1f}x{hits:>10}")
+            transaction.set_rollback(True, using=using)
+
+    def seed(self, using, start, stop, batch_size=5000):
+        rng = random.Random(start)
+        programs = [
+            Program.objects.using(using).get_or_create(key=Program.normalize(name), defaults=Program.create_defaults(name))[0]
+            for name in PROGRAMS
+        ]
+        for offset in range(start, stop, batch_size):
+            Lead.objects.using(using).bulk_create([
+                Lead(
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    phone=f"9{number * 104729 % 10**9:09d}",
+                    email=f"bench{number}@example.com",
+                    program=rng.choice(programs),
+                    source='OTHER',
+                )
+                for number in range(offset, min(offset + batch_size, stop))
+            ])
+
+    def measure(self, backend, using, term, repeat):
+        """Median wall time for one front-desk search: first page plus count."""
+        timings = []
+        hits = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = backend.search(Lead.objects.using(using).all(), term.split())
+            list(queryset[:10])
+            hits = queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), hits
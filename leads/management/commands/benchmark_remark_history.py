@@ -0,0 +1,171 @@
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from leads import deltas, remarks
+from leads.models import Lead, RemarkHistory
+
+
+FULL_TABLE = 'bench_remarkhistory_full'
+
+NOTES = [
+    'Called, asked about fees', 'No answer, retry tomorrow', 'Sent brochure on WhatsApp',
+    'Wants weekend batch', 'Parent will call back', 'Interested in placement support',
+    'Visited the campus', 'Asked for EMI options',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare delta-encoded remark history with storing the full text of every "
+        "edit on synthetic data: table size and read latency. Rows are inserted "
+        "inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=2000)
+        parser.add_argument('--edits', type=int, default=50, help="Remark edits per lead")
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            delta_bytes_before = table_bytes(RemarkHistory._meta.db_table)
+            lead_ids, full_payload, delta_payload = self.seed(options['leads'], options['edits'])
+            delta_bytes = table_bytes(RemarkHistory._meta.db_table)
+            if delta_bytes is not None:
+                delta_bytes -= delta_bytes_before
+
+            rows = len(lead_ids) * options['edits']
+            self.stdout.write(f"\n{len(lead_ids):,} leads x {options['edits']} edits = {rows:,} history rows")
+            self.stdout.write(f"{'layout':<10}{'payload':>14}{'on disk':>14}")
+            self.stdout.write(f"{'full':<10}{size(full_payload):>14}{size(table_bytes(FULL_TABLE)):>14}")
+            self.stdout.write(f"{'delta':<10}{size(delta_payload):>14}{size(delta_bytes):>14}")
+
+            rng = random.Random(0)
+            sample = [rng.choice(lead_ids) for _ in range(options['repeat'])]
+            self.stdout.write(f"\n{'read':<16}{'full ms':>10}{'delta ms':>10}")
+            for label, full_read, delta_read in (
+                ('whole history', read_full_history, read_delta_history),
+                ('latest version', read_full_latest, read_delta_latest),
+            ):
+                full_ms = median_ms(full_read, sample)
+                delta_ms = median_ms(delta_read, sample)
+                self.stdout.write(f"{label:<16}{full_ms:>10.3f}{delta_ms:>10.3f}")
+            transaction.set_rollback(True)
+
+    def seed(self, leads, edits, batch_size=200):
+        """Leads whose remarks grow note by note, with the odd rewrite, stored both ways."""
+        rng = random.Random(leads)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE {FULL_TABLE} (lead_id integer NOT NULL, version integer NOT NULL, '
+                'previous_remarks text NULL, new_remarks text NULL, PRIMARY KEY (lead_id, version))'
+            )
+        lead_ids, full_payload, delta_payload = [], 0, 0
+        now = timezone.now()
+        for offset in range(0, leads, batch_size):
+            batch = Lead.objects.bulk_create([
+                Lead(name=f"Bench Lead {number}", phone=f"8{number * 104729 % 10**9:09d}", source='OTHER')
+                for number in range(offset, min(offset + batch_size, leads))
+            ])
+            history, full_rows = [], []
+            for lead in batch:
+                lead_ids.append(lead.pk)
+                edit_pairs, text = [], None
+                for day in range(edits):
+                    if text and rng.random() < 0.1:
+                        new = text.replace(rng.choice(NOTES), rng.choice(NOTES), 1)
+                    else:
+                        new = f"{text}\nDay {day}: {rng.choice(NOTES)}" if text else rng.choice(NOTES)
+                    edit_pairs.append((text, new))
+                    text = new
+                for (version, previous_delta, new_delta), (previous, new) in zip(
+                    deltas.encode_chain(edit_pairs), edit_pairs
+                ):
+                    history.append(RemarkHistory(
+                        lead=lead, version=version, previous_delta=previous_delta, new_delta=new_delta, changed_at=now
+                    ))
+                    full_rows.append((lead.pk, version, previous, new))
+                    full_payload += len((previous or '').encode()) + len(new.encode())
+                    delta_payload += len(json.dumps(previous_delta)) + len(json.dumps(new_delta))
+            # Pre-encoded rows skip the chain tail read
+            RemarkHistory.objects.bulk_create(history)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FULL_TABLE} (lead_id, version, previous_remarks, new_remarks) VALUES (%s, %s, %s, %s)',
+                    full_rows,
+                )
+        return lead_ids, full_payload, delta_payload
+
+
+# ------------------------- Reads -------------------------
+def read_full_history(lead_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT previous_remarks, new_remarks FROM {FULL_TABLE} WHERE lead_id = %s ORDER BY version', [lead_id]
+        )
+        return cursor.fetchall()
+
+
+def read_delta_history(lead_id):
+    rows = list(
+        RemarkHistory.objects.filter(lead_id=lead_id).order_by('version')
+        .values('lead_id', 'version', 'previous_delta', 'new_delta')
+    )
+    return remarks.decode_values(RemarkHistory, rows)
+
+
+def read_full_latest(lead_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT previous_remarks, new_remarks FROM {FULL_TABLE} WHERE lead_id = %s ORDER BY version DESC LIMIT 1',
+            [lead_id],
+        )
+        return cursor.fetchone()
+
+
+def read_delta_latest(lead_id):
+    rows = list(
+        RemarkHistory.objects.filter(lead_id=lead_id).order_by('-version')
+        .values('lead_id', 'version', 'previous_delta', 'new_delta')[:1]
+    )
+    return remarks.decode_values(RemarkHistory, rows)
+
+
+def median_ms(read, lead_ids):
+    timings = []
+    for lead_id in lead_ids:
+        started = time.perf_counter()
+        read(lead_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+# ------------------------- Sizes -------------------------
+def table_bytes(table):
+    """Table plus index bytes: ``pg_total_relation_size`` or SQLite's ``dbstat``; None elsewhere."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_total_relation_size(%s::regclass)', [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    'SELECT COALESCE(SUM(pgsize), 0) FROM dbstat '
+                    'WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = %s)',
+                    [table],
+                )
+            except DatabaseError:
+                # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+                return None
+            return cursor.fetchone()[0]
+    return None
+
+
+def size(value):
+    return 'n/a' if value is None else f"{value / 1024:,.0f} KiB"
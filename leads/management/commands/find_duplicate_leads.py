@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leads import dedup
+
+
+class Command(BaseCommand):
+    help = "Scan all leads for possible duplicates using blocking keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--record', action='store_true', help="Store the candidate pairs for review")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        clusters, pairs = dedup.find_clusters(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        for cluster in clusters:
+            self.stdout.write(", ".join(map(str, cluster)))
+        self.stdout.write(
+            f"{len(clusters)} cluster(s), {sum(map(len, clusters))} lead(s), {len(pairs)} pair(s) in {elapsed:.2f}s"
+        )
+
+        if options['record']:
+            dedup.record_candidates(pairs)
+            self.stdout.write(self.style.SUCCESS(f"Recorded {len(pairs)} candidate pair(s)"))
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leads.assignment import STRATEGIES
+from leads.importers import LeadImporter, IMPORT_FORMATS, detect_format
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import leads from a CSV or JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the CSV/JSONL file")
+        parser.add_argument('--file-format', choices=IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=LeadImporter.chunk_size)
+        parser.add_argument('--user', help="Username recorded as changed_by on the initial processing updates")
+        parser.add_argument('--assign', choices=STRATEGIES, help="Assign the imported leads with this strategy")
+        parser.add_argument('--report', help="Write the per-row report as JSON to this path")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        file_format = options['file_format'] or detect_format(options['path'])
+        importer = LeadImporter(
+            user=user, chunk_size=options['chunk_size'], assignment_strategy=options['assign']
+        )
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                result = importer.run(stream, file_format)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        if options['report']:
+            with open(options['report'], 'w') as report:
+                json.dump(result, report, indent=2)
+
+        summary = result['summary']
+        self.stdout.write(self.style.SUCCESS(
+            f"Accepted: {summary['accepted']}, duplicates: {summary['duplicate']}, invalid: {summary['invalid']}"
+        ))
@@ -0,0 +1,130 @@
+import asyncio
+import socket
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+READ_CHUNK = 4096
+
+
+def process_tree_rss(pids):
+    """Resident memory (bytes) of ``pids`` and their children, from /proc."""
+    pending, seen, total = list(pids), set(), 0
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+            with open(f'/proc/{pid}/task/{pid}/children') as children:
+                pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            continue
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with many slow clients (small receive buffer, "
+        "delayed reads) and report throughput, latency, peak concurrency and "
+        "server memory. Run it once against the WSGI profile and once against "
+        "the ASGI profile with the same arguments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="e.g. http://127.0.0.1:8000/api/async/leads/?page_size=100")
+        parser.add_argument('--token', help="JWT access token sent as a Bearer header")
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5, help="Requests per client")
+        parser.add_argument('--read-delay', type=float, default=0.05, help="Seconds between 4 KiB reads")
+        parser.add_argument('--timeout', type=float, default=60)
+        parser.add_argument('--server-pid', type=int, action='append', default=[],
+                            help="Server master/worker pid to sample RSS from (repeatable)")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError("Only plain http:// URLs are supported")
+        self.options = options
+        self.host, self.port = url.hostname, url.port or 80
+        path = url.path + (f'?{url.query}' if url.query else '')
+        headers = [f'GET {path} HTTP/1.1', f'Host: {url.netloc}', 'Connection: close', 'Accept: application/json']
+        if options['token']:
+            headers.append(f"Authorization: Bearer {options['token']}")
+        self.request_bytes = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+        report = asyncio.run(self.run())
+        latencies = sorted(report['latencies'])
+        self.stdout.write(f"clients {options['clients']}, read delay {options['read_delay']}s")
+        self.stdout.write(f"completed {len(latencies)}, errors {report['errors']}, "
+                          f"{len(latencies) / report['elapsed']:.1f} req/s over {report['elapsed']:.1f}s")
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+            self.stdout.write(f"latency ms: p50 {statistics.median(latencies) * 1000:.0f}, "
+                              f"p95 {p95 * 1000:.0f}, max {latencies[-1] * 1000:.0f}")
+        self.stdout.write(f"peak requests in service at once: {report['peak_active']}")
+        if options['server_pid']:
+            self.stdout.write(f"server RSS MiB: start {report['rss_start'] / 2**20:.1f}, "
+                              f"peak {report['rss_peak'] / 2**20:.1f}")
+
+    async def run(self):
+        self.active = self.peak_active = 0
+        self.latencies, self.errors = [], 0
+        pids = self.options['server_pid']
+        rss_start = rss_peak = process_tree_rss(pids) if pids else 0
+
+        started = time.perf_counter()
+        clients = asyncio.gather(*(self.client() for _ in range(self.options['clients'])))
+        while not clients.done():
+            if pids:
+                rss_peak = max(rss_peak, process_tree_rss(pids))
+            await asyncio.wait([clients], timeout=0.1)
+        await clients
+
+        return {
+            'elapsed': time.perf_counter() - started,
+            'latencies': self.latencies,
+            'errors': self.errors,
+            'peak_active': self.peak_active,
+            'rss_start': rss_start,
+            'rss_peak': rss_peak,
+        }
+
+    async def client(self):
+        for _ in range(self.options['requests']):
+            try:
+                await asyncio.wait_for(self.request(), self.options['timeout'])
+            except (OSError, asyncio.TimeoutError, ValueError):
+                self.errors += 1
+
+    async def request(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # A tiny receive window makes the server wait on this client
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, READ_CHUNK)
+        sock.setblocking(False)
+        started = time.perf_counter()
+        await asyncio.get_running_loop().sock_connect(sock, (self.host, self.port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=READ_CHUNK)
+        try:
+            writer.write(self.request_bytes)
+            await writer.drain()
+            status_line = await reader.readline()
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            try:
+                while await reader.read(READ_CHUNK):
+                    await asyncio.sleep(self.options['read_delay'])
+            finally:
+                self.active -= 1
+            if not status_line.startswith(b'HTTP/1.1 200') and not status_line.startswith(b'HTTP/1.0 200'):
+                raise ValueError(status_line)
+            self.latencies.append(time.perf_counter() - started)
+        finally:
+            writer.close()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leads import ingest
+
+
+class Command(BaseCommand):
+    help = "Turn queued lead webhooks into leads, a batch at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ingest.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting once it is empty")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to wait between polls of an empty queue")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = ingest.drain(options['batch_size'])
+            total += processed
+            if processed:
+                self.stdout.write(f"Processed {processed} webhook events")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed: {total}"))
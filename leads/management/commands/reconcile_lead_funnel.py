@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from leads import funnel
+from leads.models import LeadAssignmentLoad, LeadFunnelCount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the lead funnel summary and assignee load tables from leads_lead and the lead archive, and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without rebuilding")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the summary rows so live adjustments wait for the rebuild
+            list(LeadFunnelCount.objects.select_for_update().values_list('id', flat=True))
+            expected = funnel.compute_groups()
+            stored = funnel.stored_groups()
+
+            drift = {
+                key: (stored.get(key, 0), expected.get(key, 0))
+                for key in set(expected) | set(stored)
+                if stored.get(key, 0) != expected.get(key, 0)
+            }
+            for key, (stored_count, expected_count) in sorted(drift.items(), key=str):
+                self.stdout.write(f"{'/'.join(map(str, key))}: stored {stored_count}, actual {expected_count}")
+
+            self.reconcile_loads(funnel.compute_loads(expected), options['dry_run'])
+
+            if not drift:
+                self.stdout.write(self.style.SUCCESS("Lead funnel is in sync"))
+                return
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING(f"{len(drift)} drifted group(s); not rebuilt (--dry-run)"))
+                return
+
+            LeadFunnelCount.objects.all().delete()
+            LeadFunnelCount.objects.bulk_create([
+                LeadFunnelCount(count=count, **dict(zip(funnel.FUNNEL_COLUMNS, key)))
+                for key, count in expected.items()
+            ])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt lead funnel; fixed {len(drift)} drifted group(s)"))
+
+    def reconcile_loads(self, expected, dry_run):
+        loads = {load.user_id: load for load in LeadAssignmentLoad.objects.select_for_update()}
+        drifted = [
+            user_id for user_id in set(expected) | set(loads)
+            if (loads[user_id].open_leads if user_id in loads else 0) != expected.get(user_id, 0)
+        ]
+        for user_id in sorted(drifted):
+            stored = loads[user_id].open_leads if user_id in loads else 0
+            self.stdout.write(f"user {user_id}: stored {stored} open, actual {expected.get(user_id, 0)}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Assignee loads are in sync"))
+            return
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} drifted load(s); not rebuilt (--dry-run)"))
+            return
+
+        updated, created = [], []
+        for user_id in drifted:
+            if user_id in loads:
+                loads[user_id].open_leads = expected.get(user_id, 0)
+                updated.append(loads[user_id])
+            else:
+                created.append(LeadAssignmentLoad(user_id=user_id, open_leads=expected[user_id]))
+        LeadAssignmentLoad.objects.bulk_update(updated, ['open_leads'])
+        LeadAssignmentLoad.objects.bulk_create(created)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} drifted assignee load(s)"))
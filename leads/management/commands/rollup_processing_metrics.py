@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from leads.metrics import rollup_day
+from leads.models import ProcessingStageRollup, ProcessingUpdate
+
+
+class Command(BaseCommand):
+    help = (
+        "Build daily processing stage rollups. By default re-rolls the last "
+        "rolled-up day (it may have been partial) through today."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day to roll up (YYYY-MM-DD)")
+        parser.add_argument('--until', help="Last day to roll up (YYYY-MM-DD), default today")
+
+    def handle(self, *args, **options):
+        until = self.parse_day(options['until']) or timezone.localdate()
+        since = self.parse_day(options['since']) or self.default_since()
+        if since is None:
+            self.stdout.write("No processing updates to roll up")
+            return
+
+        day = since
+        while day <= until:
+            groups = rollup_day(day)
+            self.stdout.write(f"{day}: {groups} group(s)")
+            day += datetime.timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {since} to {until}"))
+
+    def parse_day(self, value):
+        if value is None:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+        return day
+
+    def default_since(self):
+        last = ProcessingStageRollup.objects.aggregate(last=Max('day'))['last']
+        if last:
+            return last
+        first = ProcessingUpdate.objects.aggregate(first=Min('timestamp'))['first']
+        return timezone.localdate(first) if first else None
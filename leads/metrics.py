@@ -0,0 +1,180 @@
+import datetime
+import math
+from collections import Counter, defaultdict
+
+from django.db import connections, transaction
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from .models import ProcessingStageRollup, ProcessingUpdate
+
+
+# Stages whose duration is measured: time from entering the stage until the next status change
+PIPELINE_STAGES = ('FORWARDED', 'ACCEPTED', 'PROCESSING')
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+# ------------------------- Duration histograms -------------------------
+# Bucket 0 holds durations under a second; bucket i > 0 holds
+# [2 ** ((i - 1) / 4), 2 ** (i / 4)) seconds. Each bucket ends about 19%
+# above where it starts, so a year fits in about 100 buckets and a
+# percentile read from them is off by less than one bucket's width.
+BUCKETS_PER_DOUBLING = 4
+
+
+def bucket_of(seconds):
+    if seconds < 1:
+        return 0
+    return int(math.log2(seconds) * BUCKETS_PER_DOUBLING) + 1
+
+
+def bucket_bounds(index):
+    if index == 0:
+        return 0, 1
+    return 2 ** ((index - 1) / BUCKETS_PER_DOUBLING), 2 ** (index / BUCKETS_PER_DOUBLING)
+
+
+def histogram(durations):
+    """``{bucket index: count}`` for ``durations``, with string keys as stored in JSON."""
+    return {str(index): count for index, count in sorted(Counter(map(bucket_of, durations)).items())}
+
+
+def percentile(buckets, fraction):
+    """
+    Percentile of a ``{bucket index: count}`` histogram, interpolated
+    within the bucket it falls in.
+    """
+    total = sum(buckets.values())
+    if not total:
+        return None
+    rank = (total - 1) * fraction
+    seen = 0
+    for index in sorted(buckets):
+        count = buckets[index]
+        if rank < seen + count:
+            low, high = bucket_bounds(index)
+            return low + (high - low) * (rank - seen + 0.5) / count
+        seen += count
+    return bucket_bounds(max(buckets))[1]
+
+
+# ------------------------- Stage transitions -------------------------
+def window_transitions(updates):
+    """LAG over each lead's updates, computed by the database."""
+    window = {'partition_by': [F('lead_id')], 'order_by': [F('timestamp').asc(), F('id').asc()]}
+    return updates.order_by().annotate(
+        previous_status=Window(Lag('status'), **window),
+        previous_timestamp=Window(Lag('timestamp'), **window),
+        previous_executive=Window(Lag('processing_executive'), **window),
+    ).values(
+        'status', 'timestamp', 'processing_executive', 'previous_status', 'previous_timestamp', 'previous_executive'
+    ).iterator()
+
+
+def python_transitions(updates):
+    """Same rows as window_transitions for databases without OVER support."""
+    previous = None
+    rows = updates.order_by('lead_id', 'timestamp', 'id').values(
+        'lead_id', 'status', 'timestamp', 'processing_executive'
+    )
+    for row in rows.iterator():
+        same_lead = previous is not None and previous['lead_id'] == row['lead_id']
+        row['previous_status'] = previous['status'] if same_lead else None
+        row['previous_timestamp'] = previous['timestamp'] if same_lead else None
+        row['previous_executive'] = previous['processing_executive'] if same_lead else None
+        previous = row
+        yield row
+
+
+def iter_stage_exits(day):
+    """
+    Yield ``(stage, executive_id, seconds)`` for every pipeline stage a lead
+    left on ``day``. Only leads with an update that day are scanned, via
+    the (lead, timestamp) index. The stage belongs to the executive recorded
+    on the update that entered it, or, for a lead nobody held yet (the
+    forwarded queue), on the update that left it.
+    """
+    start, end = day_bounds(day)
+    active_leads = ProcessingUpdate.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by().values('lead_id')
+    updates = ProcessingUpdate.objects.filter(lead_id__in=active_leads, timestamp__lt=end)
+
+    if connections[updates.db].features.supports_over_clause:
+        rows = window_transitions(updates)
+    else:
+        rows = python_transitions(updates)
+
+    for row in rows:
+        if row['timestamp'] < start or row['previous_status'] not in PIPELINE_STAGES:
+            continue
+        # Repeated updates in the same status are notes, not a stage change
+        if row['status'] == row['previous_status']:
+            continue
+        seconds = int((row['timestamp'] - row['previous_timestamp']).total_seconds())
+        yield row['previous_status'], row['previous_executive'] or row['processing_executive'], seconds
+
+
+# ------------------------- Rollups -------------------------
+def rollup_day(day):
+    """(Re)build the rollup rows for one day; returns the number of groups."""
+    groups = defaultdict(list)
+    for stage, executive, seconds in iter_stage_exits(day):
+        groups[(stage, executive)].append(seconds)
+
+    with transaction.atomic():
+        ProcessingStageRollup.objects.filter(day=day).delete()
+        ProcessingStageRollup.objects.bulk_create([
+            ProcessingStageRollup(
+                day=day,
+                stage=stage,
+                processing_executive_id=executive,
+                count=len(durations),
+                total_seconds=sum(durations),
+                histogram=histogram(durations),
+            )
+            for (stage, executive), durations in groups.items()
+        ])
+    return len(groups)
+
+
+def stage_report(start, end, executive=None, by_executive=False):
+    """
+    Count, mean, median and p90 seconds per stage (and optionally per
+    executive) between ``start`` and ``end`` inclusive, from rollups only.
+    Count and mean are exact; median and p90 come from the merged
+    histograms.
+    """
+    rollups = ProcessingStageRollup.objects.filter(day__gte=start, day__lte=end)
+    if executive is not None:
+        rollups = rollups.filter(processing_executive=executive)
+
+    merged = defaultdict(lambda: {'count': 0, 'total_seconds': 0, 'buckets': Counter()})
+    for stage, executive_id, count, total_seconds, buckets in rollups.values_list(
+        'stage', 'processing_executive', 'count', 'total_seconds', 'histogram'
+    ):
+        group = merged[(stage, executive_id if by_executive else None)]
+        group['count'] += count
+        group['total_seconds'] += total_seconds
+        group['buckets'].update({int(index): bucket_count for index, bucket_count in buckets.items()})
+
+    report = []
+    for (stage, executive_id), group in merged.items():
+        if not group['count']:
+            continue
+        entry = {
+            'stage': stage,
+            'count': group['count'],
+            'mean_seconds': group['total_seconds'] / group['count'],
+            'median_seconds': percentile(group['buckets'], 0.5),
+            'p90_seconds': percentile(group['buckets'], 0.9),
+        }
+        if by_executive:
+            entry['processing_executive'] = executive_id
+        report.append(entry)
+
+    report.sort(key=lambda entry: (PIPELINE_STAGES.index(entry['stage']), entry.get('processing_executive') or 0))
+    return report
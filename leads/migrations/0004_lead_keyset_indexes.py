@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_alter_lead_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_at', 'id'], name='leads_lead_created_7eb09a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['priority', 'created_at', 'id'], name='leads_lead_priorit_ad3382_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 18:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_funnel(apps, schema_editor):
+    Lead = apps.get_model('leads', 'Lead')
+    LeadFunnelCount = apps.get_model('leads', 'LeadFunnelCount')
+    rows = (
+        Lead.objects.order_by()
+        .values('status', 'source', 'priority', 'processing_status', 'assigned_to')
+        .annotate(total=Count('id'))
+    )
+    LeadFunnelCount.objects.bulk_create([
+        LeadFunnelCount(
+            status=row['status'],
+            source=row['source'],
+            priority=row['priority'],
+            processing_status=row['processing_status'],
+            assigned_to_id=row['assigned_to'] or 0,
+            count=row['total'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0004_lead_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadFunnelCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.TextField()),
+                ('source', models.CharField(choices=[('WHATSAPP', 'WhatsApp'), ('INSTAGRAM', 'Instagram'), ('WEBSITE', 'Website'), ('WALK_IN', 'Walk-in'), ('AUTOMATION', 'automation'), ('OTHER', 'Other')], max_length=10)),
+                ('priority', models.CharField(choices=[('HIGH', 'High'), ('MEDIUM', 'Medium'), ('LOW', 'Low')], max_length=10)),
+                ('processing_status', models.CharField(choices=[('PENDING', 'Pending'), ('FORWARDED', 'Forwarded to Processing'), ('ACCEPTED', 'Accepted by Processing'), ('PROCESSING', 'In Processing'), ('COMPLETED', 'Processing Completed'), ('REJECTED', 'Processing Rejected')], max_length=20)),
+                ('assigned_to_id', models.BigIntegerField(default=0, help_text='Assigned user id, 0 when unassigned')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'source', 'priority', 'processing_status', 'assigned_to_id'), name='unique_lead_funnel_group')],
+            },
+        ),
+        migrations.RunPython(populate_funnel, migrations.RunPython.noop),
+    ]
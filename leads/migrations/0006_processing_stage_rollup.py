@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 18:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0005_leadfunnelcount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingStageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('stage', models.CharField(choices=[('PENDING', 'Pending'), ('FORWARDED', 'Forwarded to Processing'), ('ACCEPTED', 'Accepted by Processing'), ('PROCESSING', 'In Processing'), ('COMPLETED', 'Processing Completed'), ('REJECTED', 'Processing Rejected')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.BigIntegerField(default=0)),
+                ('durations', models.JSONField(default=list, help_text='Stage durations in seconds')),
+            ],
+            options={
+                'ordering': ['-day', 'stage'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='processingupdate',
+            index=models.Index(fields=['lead', 'timestamp'], name='leads_proce_lead_id_f3c008_idx'),
+        ),
+        migrations.AddField(
+            model_name='processingstagerollup',
+            name='processing_executive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='processingstagerollup',
+            index=models.Index(fields=['day', 'stage'], name='leads_proce_day_917002_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from leads.normalization import name_key, normalize_email, normalize_phone
+
+
+def populate_dedup_keys(apps, schema_editor):
+    Lead = apps.get_model('leads', 'Lead')
+    leads = []
+    for lead in Lead.objects.only('id', 'name', 'phone', 'email').iterator(chunk_size=2000):
+        lead.phone_normalized = normalize_phone(lead.phone)
+        lead.email_normalized = normalize_email(lead.email)
+        lead.name_key = name_key(lead.name, lead.phone_normalized)
+        leads.append(lead)
+    Lead.objects.bulk_update(leads, ['phone_normalized', 'email_normalized', 'name_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0006_processing_stage_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='email_normalized',
+            field=models.EmailField(blank=True, db_index=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(max_length=20)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='leads.lead')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='leads.lead')),
+            ],
+            options={
+                'ordering': ['-detected_at'],
+                'constraints': [models.UniqueConstraint(fields=('lead', 'candidate'), name='unique_duplicate_candidate')],
+            },
+        ),
+        migrations.RunPython(populate_dedup_keys, migrations.RunPython.noop),
+    ]
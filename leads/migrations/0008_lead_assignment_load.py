@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_loads(apps, schema_editor):
+    Lead = apps.get_model('leads', 'Lead')
+    LeadAssignmentLoad = apps.get_model('leads', 'LeadAssignmentLoad')
+    rows = (
+        Lead.objects.filter(assigned_to__isnull=False)
+        .exclude(processing_status__in=['COMPLETED', 'REJECTED'])
+        .order_by()
+        .values('assigned_to')
+        .annotate(total=Count('id'))
+    )
+    LeadAssignmentLoad.objects.bulk_create([
+        LeadAssignmentLoad(user_id=row['assigned_to'], open_leads=row['total'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0007_lead_dedup_keys'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadAssignmentLoad',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lead_load', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_leads', models.IntegerField(default=0)),
+                ('rotation', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_loads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 18:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0008_lead_assignment_load'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processingupdate',
+            index=models.Index(fields=['timestamp'], name='leads_proce_timesta_c59bd6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remarkhistory',
+            index=models.Index(fields=['lead', 'changed_at'], name='leads_remar_lead_id_8eb79a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remarkhistory',
+            index=models.Index(fields=['changed_at'], name='leads_remar_changed_df4a85_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 18:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0010_lead_ingest_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLead',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('phone', models.CharField(max_length=15)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('priority', models.CharField(choices=[('HIGH', 'High'), ('MEDIUM', 'Medium'), ('LOW', 'Low')], max_length=10)),
+                ('status', models.TextField()),
+                ('program', models.CharField(blank=True, max_length=2000, null=True)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=100, null=True)),
+                ('source', models.CharField(choices=[('WHATSAPP', 'WhatsApp'), ('INSTAGRAM', 'Instagram'), ('WEBSITE', 'Website'), ('WALK_IN', 'Walk-in'), ('AUTOMATION', 'automation'), ('OTHER', 'Other')], max_length=10)),
+                ('custom_source', models.CharField(blank=True, max_length=50, null=True)),
+                ('processing_status', models.CharField(choices=[('PENDING', 'Pending'), ('FORWARDED', 'Forwarded to Processing'), ('ACCEPTED', 'Accepted by Processing'), ('PROCESSING', 'In Processing'), ('COMPLETED', 'Processing Completed'), ('REJECTED', 'Processing Rejected')], max_length=20)),
+                ('processing_status_date', models.DateTimeField()),
+                ('processing_notes', models.TextField(blank=True, null=True)),
+                ('document_status', models.CharField(choices=[('PENDING', 'Pending'), ('COLLECTED', 'Collected'), ('VERIFIED', 'Verified'), ('SUBMITTED', 'Submitted'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('documents_received', models.TextField(blank=True, null=True)),
+                ('assigned_date', models.DateTimeField(blank=True, null=True)),
+                ('phone_normalized', models.CharField(blank=True, max_length=16, null=True)),
+                ('email_normalized', models.EmailField(blank=True, max_length=254, null=True)),
+                ('name_key', models.CharField(blank=True, max_length=40, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('registration_date', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(db_index=True)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('processing_executive', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-priority', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedProcessingUpdate',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('FORWARDED', 'Forwarded to Processing'), ('ACCEPTED', 'Accepted by Processing'), ('PROCESSING', 'In Processing'), ('COMPLETED', 'Processing Completed'), ('REJECTED', 'Processing Rejected')], max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('timestamp', models.DateTimeField()),
+                ('changed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_updates', to='leads.archivedlead')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedRemarkHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('previous_remarks', models.TextField(blank=True, null=True)),
+                ('new_remarks', models.TextField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField()),
+                ('changed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remark_history', to='leads.archivedlead')),
+            ],
+            options={
+                'ordering': ['-changed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedlead',
+            index=models.Index(fields=['created_at', 'id'], name='leads_archi_created_422430_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedlead',
+            index=models.Index(fields=['phone_normalized'], name='leads_archi_phone_n_b79227_idx'),
+        ),
+    ]
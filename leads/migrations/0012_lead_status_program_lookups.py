@@ -0,0 +1,252 @@
+# Generated by Django 6.0 on 2026-10-18 19:05
+
+import hashlib
+from collections import Counter
+
+import django.db.models.deletion
+import leads.models
+from django.db import migrations, models
+
+
+def program_key(program, max_length=255):
+    # Frozen copy of leads.normalization.program_key as of this migration
+    key = ' '.join((program or '').split()).casefold()
+    if len(key) > max_length:
+        key = f'{key[:max_length - 33]}#{hashlib.md5(key.encode()).hexdigest()}'
+    return key
+
+
+def drop_search_index(apps, schema_editor):
+    # The index changes shape with leads_lead.program; leads.search recreates it after migrate
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au', 'program_au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS leads_lead_fts_{suffix}')
+            cursor.execute('DROP TABLE IF EXISTS leads_lead_fts')
+        elif schema_editor.connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS leads_lead_search_vector_idx')
+            cursor.execute('ALTER TABLE leads_lead DROP COLUMN IF EXISTS search_vector')
+
+
+def populate_lookups(apps, schema_editor):
+    LeadStatus = apps.get_model('leads', 'LeadStatus')
+    Program = apps.get_model('leads', 'Program')
+    tables = [
+        (apps.get_model('leads', 'Lead'), True),
+        (apps.get_model('leads', 'ArchivedLead'), True),
+        (apps.get_model('leads', 'LeadFunnelCount'), False),
+    ]
+
+    status_ids = {}
+
+    def status_id(value):
+        code = (value or '').strip() or 'ENQUIRY'
+        if code not in status_ids:
+            status_ids[code] = LeadStatus.objects.get_or_create(code=code)[0].pk
+        return status_ids[code]
+
+    # Lead.status defaults to it, and the default only looks rows up
+    status_id('ENQUIRY')
+
+    # Every spelling of a program, counted, so each key is named after its most common one
+    spellings = {}
+    for model, has_program in tables:
+        if not has_program:
+            continue
+        for value, count in model.objects.exclude(program=None).values_list('program').annotate(count=models.Count('pk')):
+            key = program_key(value)
+            if key:
+                spellings.setdefault(key, Counter())[' '.join(value.split())] += count
+    program_ids = {
+        key: Program.objects.create(key=key, name=counts.most_common(1)[0][0]).pk
+        for key, counts in spellings.items()
+    }
+
+    for model, has_program in tables:
+        for value in model.objects.order_by().values_list('status', flat=True).distinct():
+            model.objects.filter(status=value).update(status_ref=status_id(value))
+        if has_program:
+            for value in model.objects.exclude(program=None).order_by().values_list('program', flat=True).distinct():
+                model.objects.filter(program=value).update(program_ref=program_ids.get(program_key(value)))
+
+    merge_funnel_groups(apps.get_model('leads', 'LeadFunnelCount'))
+
+
+def merge_funnel_groups(LeadFunnelCount):
+    # Statuses that differ only in whitespace now share one id, so their
+    # groups are summed into one row before the unique constraint returns
+    group = ('status_ref', 'source', 'priority', 'processing_status', 'assigned_to_id')
+    duplicated = (
+        LeadFunnelCount.objects.order_by().values(*group)
+        .annotate(total=models.Sum('count'), rows=models.Count('pk'), kept=models.Min('pk'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicated:
+        rows = LeadFunnelCount.objects.filter(**{field: row[field] for field in group})
+        rows.exclude(pk=row['kept']).delete()
+        rows.filter(pk=row['kept']).update(count=row['total'])
+
+
+def restore_text(apps, schema_editor):
+    LeadStatus = apps.get_model('leads', 'LeadStatus')
+    Program = apps.get_model('leads', 'Program')
+    for name in ('Lead', 'ArchivedLead', 'LeadFunnelCount'):
+        model = apps.get_model('leads', name)
+        for status in LeadStatus.objects.all():
+            model.objects.filter(status_ref=status).update(status=status.code)
+        if name != 'LeadFunnelCount':
+            for program in Program.objects.all():
+                model.objects.filter(program_ref=program).update(program=program.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0011_lead_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadStatus',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Lead statuses',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Program',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=2000)),
+                ('key', models.CharField(editable=False, max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(drop_search_index, drop_search_index),
+        migrations.RemoveIndex(
+            model_name='lead',
+            name='leads_lead_status_e23abe_idx',
+        ),
+        migrations.RemoveConstraint(
+            model_name='leadfunnelcount',
+            name='unique_lead_funnel_group',
+        ),
+        # Map the text columns onto the lookup tables through temporary foreign keys
+        migrations.AddField(
+            model_name='lead',
+            name='status_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.leadstatus'),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='program_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.program'),
+        ),
+        migrations.AddField(
+            model_name='archivedlead',
+            name='status_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.leadstatus'),
+        ),
+        migrations.AddField(
+            model_name='archivedlead',
+            name='program_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.program'),
+        ),
+        migrations.AddField(
+            model_name='leadfunnelcount',
+            name='status_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.leadstatus'),
+        ),
+        # Nullable while mapped, so unapplying can re-add the text columns before restore_text fills them
+        migrations.AlterField(
+            model_name='archivedlead',
+            name='status',
+            field=models.TextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='leadfunnelcount',
+            name='status',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(populate_lookups, restore_text),
+        migrations.RemoveField(
+            model_name='lead',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='program',
+        ),
+        migrations.RemoveField(
+            model_name='archivedlead',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='archivedlead',
+            name='program',
+        ),
+        migrations.RemoveField(
+            model_name='leadfunnelcount',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='lead',
+            old_name='status_ref',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='lead',
+            old_name='program_ref',
+            new_name='program',
+        ),
+        migrations.RenameField(
+            model_name='archivedlead',
+            old_name='status_ref',
+            new_name='status',
+        ),
+        migrations.RenameField(
+            model_name='archivedlead',
+            old_name='program_ref',
+            new_name='program',
+        ),
+        migrations.RenameField(
+            model_name='leadfunnelcount',
+            old_name='status_ref',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='lead',
+            name='status',
+            field=models.ForeignKey(default=leads.models.default_lead_status, help_text='Current status of the lead', on_delete=django.db.models.deletion.PROTECT, related_name='leads', to='leads.leadstatus'),
+        ),
+        migrations.AlterField(
+            model_name='lead',
+            name='program',
+            field=models.ForeignKey(blank=True, help_text='Enter the program name', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='leads', to='leads.program'),
+        ),
+        migrations.AlterField(
+            model_name='archivedlead',
+            name='status',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.leadstatus'),
+        ),
+        migrations.AlterField(
+            model_name='archivedlead',
+            name='program',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.program'),
+        ),
+        migrations.AlterField(
+            model_name='leadfunnelcount',
+            name='status',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads.leadstatus'),
+        ),
+        migrations.AddConstraint(
+            model_name='leadfunnelcount',
+            constraint=models.UniqueConstraint(fields=('status', 'source', 'priority', 'processing_status', 'assigned_to_id'), name='unique_lead_funnel_group'),
+        ),
+    ]
@@ -0,0 +1,184 @@
+# Generated by Django 6.0 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+MODEL_NAMES = ('RemarkHistory', 'ArchivedRemarkHistory')
+
+# Frozen copy of leads.deltas' encoding as of this migration
+CHECKPOINT_INTERVAL = 16
+
+
+def is_checkpoint(version):
+    return (version - 1) % CHECKPOINT_INTERVAL == 0
+
+
+def common_prefix_length(first, second):
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(first, second, limit):
+    low, high = 0, min(len(first), len(second), limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[len(first) - middle:] == second[len(second) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff(base, value):
+    if value is None:
+        return None
+    if value == base:
+        return []
+    base = base or ''
+    prefix = common_prefix_length(base, value)
+    suffix = common_suffix_length(base, value, min(len(base), len(value)) - prefix)
+    return [prefix, value[prefix:len(value) - suffix], suffix]
+
+
+def patch(base, delta):
+    if delta is None:
+        return None
+    if not delta:
+        return base
+    prefix, text, suffix = delta
+    base = base or ''
+    return base[:prefix] + text + (base[len(base) - suffix:] if suffix else '')
+
+
+def encode_chain(edits):
+    """``(version, previous_delta, new_delta)`` for a lead's ``(previous, new)`` edits, oldest first."""
+    last_new = None
+    for version, (previous, new) in enumerate(edits, 1):
+        # Checkpoints diff against nothing, which stores the full text
+        yield version, diff(None if is_checkpoint(version) else last_new, previous), diff(previous, new)
+        last_new = new
+
+
+def lead_chains(model):
+    """Yield each lead's history rows, oldest edit first."""
+    chain = []
+    for row in model.objects.order_by('lead_id', 'changed_at', 'id').iterator(chunk_size=BATCH_SIZE):
+        if chain and chain[-1].lead_id != row.lead_id:
+            yield chain
+            chain = []
+        chain.append(row)
+    if chain:
+        yield chain
+
+
+def compact(apps, schema_editor):
+    for name in MODEL_NAMES:
+        model = apps.get_model('leads', name)
+        pending = []
+        for chain in lead_chains(model):
+            edits = [(row.previous_remarks, row.new_remarks) for row in chain]
+            for row, (version, previous_delta, new_delta) in zip(chain, encode_chain(edits)):
+                row.version, row.previous_delta, row.new_delta = version, previous_delta, new_delta
+            pending.extend(chain)
+            if len(pending) >= BATCH_SIZE:
+                model.objects.bulk_update(pending, ['version', 'previous_delta', 'new_delta'])
+                pending = []
+        model.objects.bulk_update(pending, ['version', 'previous_delta', 'new_delta'])
+
+
+def expand(apps, schema_editor):
+    for name in MODEL_NAMES:
+        model = apps.get_model('leads', name)
+        pending = []
+        rows = model.objects.order_by('lead_id', 'version').iterator(chunk_size=BATCH_SIZE)
+        last_lead_id = last_new = None
+        for row in rows:
+            # Every chain starts with a checkpoint, so decoding restarts cleanly per lead
+            if row.lead_id != last_lead_id:
+                last_lead_id, last_new = row.lead_id, None
+            row.previous_remarks = patch(last_new, row.previous_delta)
+            row.new_remarks = last_new = patch(row.previous_remarks, row.new_delta)
+            pending.append(row)
+            if len(pending) >= BATCH_SIZE:
+                model.objects.bulk_update(pending, ['previous_remarks', 'new_remarks'])
+                pending = []
+        model.objects.bulk_update(pending, ['previous_remarks', 'new_remarks'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0012_lead_status_program_lookups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remarkhistory',
+            name='version',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='remarkhistory',
+            name='previous_delta',
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='remarkhistory',
+            name='new_delta',
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedremarkhistory',
+            name='version',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedremarkhistory',
+            name='previous_delta',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedremarkhistory',
+            name='new_delta',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(compact, expand),
+        migrations.RemoveField(
+            model_name='remarkhistory',
+            name='previous_remarks',
+        ),
+        migrations.RemoveField(
+            model_name='remarkhistory',
+            name='new_remarks',
+        ),
+        migrations.RemoveField(
+            model_name='archivedremarkhistory',
+            name='previous_remarks',
+        ),
+        migrations.RemoveField(
+            model_name='archivedremarkhistory',
+            name='new_remarks',
+        ),
+        migrations.AlterField(
+            model_name='remarkhistory',
+            name='version',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='archivedremarkhistory',
+            name='version',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='remarkhistory',
+            constraint=models.UniqueConstraint(fields=('lead', 'version'), name='unique_remark_version'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0013_remark_history_deltas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lead',
+            name='leads_lead_assigne_3f8857_idx',
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='leads_lead_assigne_c5dffa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['processing_executive', 'processing_status'], name='leads_lead_process_478e38_idx'),
+        ),
+    ]
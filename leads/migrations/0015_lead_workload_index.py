@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0014_lead_scope_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'processing_status', 'assigned_date'], name='leads_lead_assigne_635088_idx'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 6.0 on 2026-10-18 19:50
+
+import math
+from collections import Counter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of leads.metrics' bucketing as of this migration
+BUCKETS_PER_DOUBLING = 4
+
+
+def bucket_of(seconds):
+    if seconds < 1:
+        return 0
+    return int(math.log2(seconds) * BUCKETS_PER_DOUBLING) + 1
+
+
+def bucket_midpoint(index):
+    if index == 0:
+        return 0
+    return int(2 ** ((index - 0.5) / BUCKETS_PER_DOUBLING))
+
+
+def backfill_executives(apps, schema_editor):
+    # The best record there is of who held older updates: the lead's executive now
+    for name, lead_name in (('ProcessingUpdate', 'Lead'), ('ArchivedProcessingUpdate', 'ArchivedLead')):
+        model = apps.get_model('leads', name)
+        leads = apps.get_model('leads', lead_name).objects.filter(pk=models.OuterRef('lead_id'))
+        model.objects.update(processing_executive=models.Subquery(leads.values('processing_executive')[:1]))
+
+
+def durations_to_histograms(apps, schema_editor):
+    ProcessingStageRollup = apps.get_model('leads', 'ProcessingStageRollup')
+    for rollup in ProcessingStageRollup.objects.iterator():
+        buckets = Counter(map(bucket_of, rollup.durations))
+        rollup.histogram = {str(index): count for index, count in sorted(buckets.items())}
+        rollup.save(update_fields=['histogram'])
+
+
+def histograms_to_durations(apps, schema_editor):
+    # Lossy: each duration comes back as its bucket's midpoint. Rerun
+    # rollup_processing_metrics for exact values.
+    ProcessingStageRollup = apps.get_model('leads', 'ProcessingStageRollup')
+    for rollup in ProcessingStageRollup.objects.iterator():
+        rollup.durations = [
+            bucket_midpoint(int(index))
+            for index, count in sorted(rollup.histogram.items(), key=lambda item: int(item[0]))
+            for _ in range(count)
+        ]
+        rollup.save(update_fields=['durations'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0015_lead_workload_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingupdate',
+            name='processing_executive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedprocessingupdate',
+            name='processing_executive',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_executives, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='processingstagerollup',
+            name='histogram',
+            field=models.JSONField(default=dict, help_text='Durations per bucket: {bucket index: count}'),
+        ),
+        # Nullable while converted, so unapplying can re-add the column before the reverse fills it
+        migrations.AlterField(
+            model_name='processingstagerollup',
+            name='durations',
+            field=models.JSONField(default=list, null=True, help_text='Stage durations in seconds'),
+        ),
+        migrations.RunPython(durations_to_histograms, histograms_to_durations),
+        migrations.RemoveField(
+            model_name='processingstagerollup',
+            name='durations',
+        ),
+    ]
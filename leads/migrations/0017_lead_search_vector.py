@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-18 21:15
+
+from django.db import migrations
+
+
+# The tsvector column, triggers and GIN index behind
+# leads.search.PostgresSearchBackend, frozen as of this migration. Other
+# vendors are skipped; SQLite's FTS5 table is managed by leads.search.
+VECTOR = " || ".join([
+    "setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A')",
+    "setweight(to_tsvector('simple', coalesce(NEW.phone, '')), 'A')",
+    "setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'B')",
+    "setweight(to_tsvector('simple', coalesce((SELECT name FROM leads_program WHERE id = NEW.program_id), '')), 'C')",
+])
+
+FORWARD = [
+    "ALTER TABLE leads_lead ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    (
+        "CREATE OR REPLACE FUNCTION leads_lead_search_vector() RETURNS trigger AS $$ "
+        f"BEGIN NEW.search_vector := {VECTOR}; RETURN NEW; END $$ LANGUAGE plpgsql"
+    ),
+    "DROP TRIGGER IF EXISTS leads_lead_search_vector_trg ON leads_lead",
+    (
+        "CREATE TRIGGER leads_lead_search_vector_trg BEFORE INSERT OR UPDATE OF name, phone, email, program_id "
+        "ON leads_lead FOR EACH ROW EXECUTE FUNCTION leads_lead_search_vector()"
+    ),
+    # A renamed program changes the indexed text of every lead using it
+    (
+        "CREATE OR REPLACE FUNCTION leads_program_search_vector() RETURNS trigger AS $$ "
+        "BEGIN UPDATE leads_lead SET program_id = program_id WHERE program_id = NEW.id; "
+        "RETURN NULL; END $$ LANGUAGE plpgsql"
+    ),
+    "DROP TRIGGER IF EXISTS leads_program_search_vector_trg ON leads_program",
+    (
+        "CREATE TRIGGER leads_program_search_vector_trg AFTER UPDATE OF name ON leads_program "
+        "FOR EACH ROW EXECUTE FUNCTION leads_program_search_vector()"
+    ),
+    "CREATE INDEX IF NOT EXISTS leads_lead_search_vector_idx ON leads_lead USING GIN (search_vector)",
+    # Fill the column for existing rows; touching an indexed column fires the trigger
+    "UPDATE leads_lead SET name = name",
+]
+
+REVERSE = [
+    "DROP TRIGGER IF EXISTS leads_program_search_vector_trg ON leads_program",
+    "DROP FUNCTION IF EXISTS leads_program_search_vector()",
+    "DROP TRIGGER IF EXISTS leads_lead_search_vector_trg ON leads_lead",
+    "DROP FUNCTION IF EXISTS leads_lead_search_vector()",
+    "DROP INDEX IF EXISTS leads_lead_search_vector_idx",
+    "ALTER TABLE leads_lead DROP COLUMN IF EXISTS search_vector",
+]
+
+
+class RunPostgreSQL(migrations.RunSQL):
+    """RunSQL that only touches PostgreSQL databases."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0016_processing_update_executive'),
+    ]
+
+    operations = [
+        RunPostgreSQL(FORWARD, REVERSE),
+    ]
@@ -1,9 +1,222 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Q
 from users.models import User
 from django.utils import timezone
 from django.core.validators import MinLengthValidator
+from backend.mixins import DirtyFieldsManager, DirtyFieldsMixin
+from outbox.events import OutboxMixin
+from .normalization import name_key, normalize_email, normalize_phone, program_key
 
-class Lead(models.Model):
+# Per-process copies of the lookup tables: {model: {'key': {...}, 'id': {...}}}.
+# Only committed rows belong here; see LookupTable.written().
+LOOKUP_CACHES = {}
+
+
+class LookupTable(models.Model):
+    """
+    Small reference table behind an integer foreign key. The API keeps
+    sending and receiving the string form; rows are cached per process in
+    both directions, so the mapping costs no queries once warm. A miss
+    reloads the (small) table once before giving up or creating the row.
+    """
+    lookup_field = None
+    # Column sent to and received from API clients
+    display_field = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def normalize(cls, value):
+        return value.strip()
+
+    @classmethod
+    def create_defaults(cls, value):
+        return {}
+
+    @classmethod
+    def index(cls, rows):
+        return {
+            'key': {getattr(row, cls.lookup_field): row for row in rows},
+            'id': {row.pk: row for row in rows},
+        }
+
+    @classmethod
+    def store(cls, rows):
+        LOOKUP_CACHES[cls] = cls.index(rows)
+        return LOOKUP_CACHES[cls]
+
+    @classmethod
+    def cached(cls, reload=False):
+        pending = cls.transaction_cache()
+        if pending is not None:
+            if reload or pending.rows is None:
+                pending.rows = cls.index(list(cls.objects.all()))
+            return pending.rows
+        if reload or cls not in LOOKUP_CACHES:
+            cls.store(list(cls.objects.all()))
+        return LOOKUP_CACHES[cls]
+
+    @classmethod
+    async def awarm(cls, ids):
+        """For async views: load the cache, reloading it if any of ``ids`` is missing, before display()."""
+        cached = LOOKUP_CACHES.get(cls)
+        if cached is None or not {pk for pk in ids if pk is not None} <= cached['id'].keys():
+            cls.store([row async for row in cls.objects.all()])
+
+    @classmethod
+    def clear_cache(cls):
+        LOOKUP_CACHES.pop(cls, None)
+
+    @classmethod
+    def written(cls, using=None):
+        """
+        A row was saved or deleted. Inside a transaction the change is not
+        committed yet: until it is, this transaction reads its own copy of
+        the table and the shared cache, which other requests read, is only
+        reloaded after the commit. A rollback drops the copy with the
+        on-commit hook, so no id it held outlives the transaction.
+        """
+        cls.clear_cache()
+        connection = transaction.get_connection(using or router.db_for_write(cls))
+        if not connection.in_atomic_block:
+            return
+        pending = cls.transaction_cache(connection.alias)
+        if pending is None:
+            pending = connection.__dict__.setdefault('pending_lookups', {})[cls] = PendingLookups(cls)
+        pending.written(connection)
+
+    @classmethod
+    def transaction_cache(cls, using=None):
+        """The open transaction's PendingLookups for this table, or None when it wrote none."""
+        connection = transaction.get_connection(using or router.db_for_write(cls))
+        pending = connection.__dict__.get('pending_lookups')
+        if not pending or cls not in pending:
+            return None
+        if pending[cls].alive(connection):
+            return pending[cls]
+        del pending[cls]
+        return None
+
+    @classmethod
+    def resolve(cls, value, create=False):
+        """The row for an API value, or None; created on demand with ``create``."""
+        if value in (None, ''):
+            return None
+        key = cls.normalize(value)
+        row = cls.cached()['key'].get(key) or cls.cached(reload=True)['key'].get(key)
+        if row is None and create:
+            row, _ = cls.objects.get_or_create(**{cls.lookup_field: key}, defaults=cls.create_defaults(value))
+        return row
+
+    @classmethod
+    def from_id(cls, pk):
+        if pk is None:
+            return None
+        return cls.cached()['id'].get(pk) or cls.cached(reload=True)['id'].get(pk)
+
+    @classmethod
+    def display(cls, pk):
+        """The API string for a row id, or None."""
+        row = cls.from_id(pk)
+        return getattr(row, cls.display_field) if row else None
+
+
+class PendingLookups:
+    """
+    A transaction's own cache of a lookup table it wrote to, kept alive by
+    one on-commit hook per savepoint level that wrote. Rolling back a level
+    drops its hook, and with it the rows that level may have added.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = None
+        # (savepoint ids, hook)
+        self.hooks = []
+        # run_on_commit list the hooks were last found in; Django replaces
+        # the list on every commit and rollback
+        self.checked = None
+
+    def written(self, connection):
+        self.rows = None
+        savepoints = set(connection.savepoint_ids)
+        if self.hooks and self.hooks[-1][0] == savepoints:
+            return
+
+        def committed():
+            self.model.clear_cache()
+
+        transaction.on_commit(committed, using=connection.alias)
+        self.hooks.append((savepoints, committed))
+        self.checked = connection.run_on_commit
+
+    def alive(self, connection):
+        if not connection.in_atomic_block:
+            return False
+        if self.checked is not connection.run_on_commit:
+            registered = {id(hook) for _, hook, _ in connection.run_on_commit}
+            live = [entry for entry in self.hooks if id(entry[1]) in registered]
+            if len(live) != len(self.hooks):
+                # A savepoint holding some of the writes rolled back
+                self.hooks, self.rows = live, None
+            self.checked = connection.run_on_commit
+        return bool(self.hooks)
+
+
+class LeadStatus(LookupTable):
+    """Lead.status values; statuses are free-form, so new ones are added as they arrive"""
+    id = models.SmallAutoField(primary_key=True)
+    code = models.CharField(max_length=100, unique=True)
+
+    lookup_field = 'code'
+    display_field = 'code'
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'Lead statuses'
+
+    def __str__(self):
+        return self.code
+
+
+class Program(LookupTable):
+    """
+    Lead.program values. ``key`` folds case and whitespace so spelling
+    variants of one program share a row; ``name`` keeps the first spelling
+    seen (the most common one for rows that predate the table).
+    """
+    KEY_LENGTH = 255
+
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=2000)
+    key = models.CharField(max_length=KEY_LENGTH, unique=True, editable=False)
+
+    lookup_field = 'key'
+    display_field = 'name'
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def normalize(cls, value):
+        return program_key(value, cls.KEY_LENGTH)
+
+    @classmethod
+    def create_defaults(cls, value):
+        return {'name': ' '.join(value.split())}
+
+
+def default_lead_status():
+    # A lookup only, so building a Lead never writes; migration 0012 seeds the row
+    status = LeadStatus.resolve('ENQUIRY')
+    return status.pk if status else None
+
+
+class Lead(OutboxMixin, DirtyFieldsMixin, models.Model):
     PRIORITY_CHOICES = [
         ('HIGH', 'High'),
         ('MEDIUM', 'Medium'), 
@@ -42,9 +255,9 @@ class Lead(models.Model):
     email = models.EmailField(blank=True, null=True, unique=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='MEDIUM')
     
-    # Changed from CharField with choices to TextField
-    status = models.TextField(default='ENQUIRY', help_text="Current status of the lead")
-    program = models.CharField(max_length=2000, blank=True, null=True, help_text="Enter the program name")
+    # Free-form status and program names live in small lookup tables
+    status = models.ForeignKey(LeadStatus, on_delete=models.PROTECT, default=default_lead_status, related_name='leads', help_text="Current status of the lead")
+    program = models.ForeignKey(Program, on_delete=models.PROTECT, blank=True, null=True, related_name='leads', help_text="Enter the program name")
     remarks = models.TextField(blank=True, null=True, help_text="Additional notes or comments about the lead")
     location = models.CharField(max_length=100, blank=True, null=True)
     source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
@@ -64,40 +277,71 @@ class Lead(models.Model):
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL,null=True,blank=True,limit_choices_to={'role__in': [ 'ADM_MANAGER', 'ADM_EXEC' ] },related_name='assigned_leads')
     assigned_date = models.DateTimeField(null=True, blank=True)
     
+    # Canonical values and blocking key for duplicate detection (see leads.dedup)
+    phone_normalized = models.CharField(max_length=16, blank=True, null=True, db_index=True, editable=False)
+    email_normalized = models.EmailField(blank=True, null=True, db_index=True, editable=False)
+    name_key = models.CharField(max_length=40, blank=True, null=True, db_index=True, editable=False)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     registration_date = models.DateTimeField(null=True, blank=True)
 
+    objects = DirtyFieldsManager()
+
     class Meta:
         ordering = ['-priority', '-created_at']
         verbose_name = 'Lead'
         verbose_name_plural = 'Leads'
         indexes = [
-            models.Index(fields=['status']),  
             models.Index(fields=['priority']),
             models.Index(fields=['processing_status']),
-            models.Index(fields=['assigned_to']),
+            # Keyset pagination: (created_at, id) and (priority, created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['priority', 'created_at', 'id']),
+            # Role-scoped lists (leads.permissions): an executive's newest
+            # leads and a processing executive's forwarded ones
+            models.Index(fields=['assigned_to', 'created_at', 'id']),
+            models.Index(fields=['processing_executive', 'processing_status']),
+            # Staff workload counts (users.workload) read only this index
+            models.Index(fields=['assigned_to', 'processing_status', 'assigned_date']),
         ]
 
     def __str__(self):
-        return f"{self.name} ({self.phone}) - {self.status}" 
+        return f"{self.name} ({self.phone}) - {self.status_code}"
+
+    @property
+    def status_code(self):
+        """The status string, without a query once the lookup cache is warm"""
+        return LeadStatus.display(self.status_id)
+
+    @property
+    def program_name(self):
+        return Program.display(self.program_id)
+
+    def refresh_dedup_keys(self):
+        """Recompute the canonical phone/email and name blocking key."""
+        self.phone_normalized = normalize_phone(self.phone)
+        self.email_normalized = normalize_email(self.email)
+        self.name_key = name_key(self.name, self.phone_normalized)
 
     def save(self, *args, **kwargs):
+        self.refresh_dedup_keys()
+
         # Update registration date when status changes to REGISTERED
-        if self.status == 'REGISTERED' and not self.registration_date:
+        if self.status_code == 'REGISTERED' and not self.registration_date:
             self.registration_date = timezone.now()
         
         # Update processing status date when processing status changes
-        if self.pk:
-            original = Lead.objects.get(pk=self.pk)
-            if original.processing_status != self.processing_status:
-                self.processing_status_date = timezone.now()
+        if not self._state.adding and self.has_changed('processing_status'):
+            self.processing_status_date = timezone.now()
         
+        # Existing rows are written with a single UPDATE of the changed columns
         super().save(*args, **kwargs)
 
     def update_processing_status(self, status, executive=None, notes=''):
-        """Helper method to update processing status with proper tracking"""
+        """Helper method to update processing status with proper tracking.
+        Only the columns touched here are written."""
         self.processing_status = status
         self.processing_status_date = timezone.now()
         
@@ -113,10 +357,19 @@ class Lead(models.Model):
         """Returns a queryset of processing status changes"""
         return self.processing_updates.all().order_by('-timestamp')
 
+    # SQL equivalents of the is_* properties below, keyed by target processing status
+    TRANSITION_CONDITIONS = {
+        'FORWARDED': Q(status__code='REGISTERED', processing_status__in=['PENDING', 'REJECTED']),
+        'ACCEPTED': Q(processing_status='FORWARDED'),
+        'PROCESSING': Q(processing_status='ACCEPTED'),
+        'COMPLETED': Q(processing_status='PROCESSING', processing_executive__isnull=False),
+        'REJECTED': Q(processing_status__in=['FORWARDED', 'ACCEPTED', 'PROCESSING']),
+    }
+
     @property
     def is_forwardable(self):
         """Check if lead can be forwarded to processing"""
-        return (self.status == 'REGISTERED' and 
+        return (self.status_code == 'REGISTERED' and 
                 self.processing_status in ['PENDING', 'REJECTED'])
 
     @property
@@ -131,31 +384,282 @@ class Lead(models.Model):
                 self.processing_executive is not None)
 
 
-class ProcessingUpdate(models.Model):
+class DuplicateCandidate(models.Model):
+    """A pair of leads that share a blocking key and may be the same person"""
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    candidate = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='+')
+    reason = models.CharField(max_length=20)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-detected_at']
+        constraints = [
+            models.UniqueConstraint(fields=['lead', 'candidate'], name='unique_duplicate_candidate'),
+        ]
+
+    def __str__(self):
+        return f"{self.lead_id} ~ {self.candidate_id} ({self.reason})"
+
+
+class ProcessingUpdate(OutboxMixin, models.Model):
     """Model to track processing status changes"""
     lead = models.ForeignKey(Lead,on_delete=models.CASCADE, related_name='processing_updates')
     status = models.CharField(max_length=20, choices=Lead.PROCESSING_STATUS_CHOICES)
     changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # The lead's processing executive once this update applied, so stage
+    # times stay with whoever held the lead then (leads.metrics)
+    processing_executive = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     notes = models.TextField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['lead', 'timestamp']),
+            models.Index(fields=['timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.lead} - {self.get_status_display()} at {self.timestamp}"
 
 
-class RemarkHistory(models.Model):
-    """History of remarks edits for a lead"""
+class ProcessingStageRollup(models.Model):
+    """
+    Daily rollup of time spent in a processing stage, per processing
+    executive. A duration is attributed to the day the lead left the stage.
+    Durations are kept as a histogram over fixed log-spaced buckets, so a
+    row stays the same size however many leads it counts and percentiles
+    over any date range come from merging rows, not rescanning
+    ProcessingUpdate.
+    """
+    day = models.DateField()
+    stage = models.CharField(max_length=20, choices=Lead.PROCESSING_STATUS_CHOICES)
+    processing_executive = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+    histogram = models.JSONField(default=dict, help_text="Durations per bucket: {bucket index: count}")
+
+    class Meta:
+        ordering = ['-day', 'stage']
+        indexes = [
+            models.Index(fields=['day', 'stage']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.stage}: {self.count} transitions"
+
+
+class RemarkDeltas:
+    """
+    ``previous_remarks``/``new_remarks`` of a delta-encoded remark history
+    row (see leads.deltas). Reading rebuilds the text from the lead's chain,
+    a batch at a time through ``leads.remarks.materialize()``; assigning
+    sets the text to encode when an unsaved row is written.
+    """
+
+    @property
+    def previous_remarks(self):
+        if '_previous_remarks' not in self.__dict__:
+            from .remarks import materialize
+            materialize([self])
+        return self.__dict__.get('_previous_remarks')
+
+    @previous_remarks.setter
+    def previous_remarks(self, value):
+        self._previous_remarks = value
+
+    @property
+    def new_remarks(self):
+        if '_new_remarks' not in self.__dict__:
+            from .remarks import materialize
+            materialize([self])
+        return self.__dict__.get('_new_remarks')
+
+    @new_remarks.setter
+    def new_remarks(self, value):
+        self._new_remarks = value
+
+
+class RemarkHistoryManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        from .remarks import encode
+        objs = list(objs)
+        encode(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class RemarkHistory(RemarkDeltas, models.Model):
+    """History of remarks edits for a lead, stored as per-lead delta chains"""
     lead = models.ForeignKey(Lead,on_delete=models.CASCADE,related_name='remark_history')
-    previous_remarks = models.TextField(blank=True, null=True)
-    new_remarks = models.TextField(blank=True, null=True)
+    version = models.PositiveIntegerField(editable=False)
+    previous_delta = models.JSONField(null=True, editable=False)
+    new_delta = models.JSONField(null=True, editable=False)
     changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     changed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = RemarkHistoryManager()
+
+    class Meta:
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['lead', 'changed_at']),
+            models.Index(fields=['changed_at']),
+        ]
+        constraints = [
+            # Also the index chains are read through
+            models.UniqueConstraint(fields=['lead', 'version'], name='unique_remark_version'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.version is None:
+            from .remarks import encode
+            encode([self])
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Remarks changed for {self.lead} at {self.changed_at}"
+
+class LeadFunnelCount(models.Model):
+    """
+    Incrementally maintained lead counts per funnel group, so dashboards read
+    O(groups) rows instead of counting leads_lead. Kept up to date by
+    leads.funnel; ``reconcile_lead_funnel`` rebuilds it from scratch.
+    """
+    status = models.ForeignKey(LeadStatus, on_delete=models.PROTECT, related_name='+')
+    source = models.CharField(max_length=10, choices=Lead.SOURCE_CHOICES)
+    priority = models.CharField(max_length=10, choices=Lead.PRIORITY_CHOICES)
+    processing_status = models.CharField(max_length=20, choices=Lead.PROCESSING_STATUS_CHOICES)
+    # Plain id rather than a ForeignKey so the unassigned bucket (0) is a real value
+    # and stays covered by the unique constraint
+    assigned_to_id = models.BigIntegerField(default=0, help_text="Assigned user id, 0 when unassigned")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'source', 'priority', 'processing_status', 'assigned_to_id'],
+                name='unique_lead_funnel_group',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.status_id}/{self.source}/{self.priority}/{self.processing_status}/{self.assigned_to_id}: {self.count}"
+
+
+class LeadAssignmentLoad(models.Model):
+    """
+    Open leads per assignee, kept current alongside LeadFunnelCount so the
+    assignment engine never has to count leads per user.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='lead_load')
+    open_leads = models.IntegerField(default=0)
+    # Round-robin position: the user with the lowest value is next in line
+    rotation = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.open_leads} open"
+
+
+class LeadIngestEvent(models.Model):
+    """
+    Raw webhook payload waiting to become (or update) a lead. The webhook
+    view only appends rows here; leads.ingest drains them in batches.
+    """
+    SOURCE_CHOICES = [
+        ('WHATSAPP', 'WhatsApp'),
+        ('INSTAGRAM', 'Instagram'),
+        ('AUTOMATION', 'automation'),
+    ]
+
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    lead = models.ForeignKey(Lead, on_delete=models.SET_NULL, null=True, blank=True, related_name='ingest_events')
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever scans the unprocessed tail
+            models.Index(fields=['id'], condition=Q(processed_at__isnull=True), name='leads_ingest_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} event {self.pk} ({'processed' if self.processed_at else 'pending'})"
+
+
+# ------------------------- Archive (cold) tables -------------------------
+class ArchivedLead(models.Model):
+    """
+    A closed lead moved out of leads_lead by leads.archive. Columns mirror
+    Lead and ids are kept, but nothing is unique here: the phone/email may
+    come back as a new lead later.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    phone = models.CharField(max_length=15)
+    email = models.EmailField(blank=True, null=True)
+    priority = models.CharField(max_length=10, choices=Lead.PRIORITY_CHOICES)
+    status = models.ForeignKey(LeadStatus, on_delete=models.PROTECT, related_name='+')
+    program = models.ForeignKey(Program, on_delete=models.PROTECT, blank=True, null=True, related_name='+')
+    remarks = models.TextField(blank=True, null=True)
+    location = models.CharField(max_length=100, blank=True, null=True)
+    source = models.CharField(max_length=10, choices=Lead.SOURCE_CHOICES)
+    custom_source = models.CharField(max_length=50, blank=True, null=True)
+    processing_status = models.CharField(max_length=20, choices=Lead.PROCESSING_STATUS_CHOICES)
+    processing_executive = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    processing_status_date = models.DateTimeField()
+    processing_notes = models.TextField(blank=True, null=True)
+    document_status = models.CharField(max_length=20, choices=Lead.DOCUMENT_STATUS_CHOICES)
+    documents_received = models.TextField(blank=True, null=True)
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    assigned_date = models.DateTimeField(null=True, blank=True)
+    phone_normalized = models.CharField(max_length=16, blank=True, null=True)
+    email_normalized = models.EmailField(blank=True, null=True)
+    name_key = models.CharField(max_length=40, blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    registration_date = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-priority', '-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['phone_normalized']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.phone}) - archived"
+
+
+class ArchivedProcessingUpdate(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    lead = models.ForeignKey(ArchivedLead, on_delete=models.CASCADE, related_name='processing_updates')
+    status = models.CharField(max_length=20, choices=Lead.PROCESSING_STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    processing_executive = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    notes = models.TextField(blank=True)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-timestamp']
+
+    def __str__(self):
+        return f"{self.lead_id} - {self.get_status_display()} at {self.timestamp}"
+
+
+class ArchivedRemarkHistory(RemarkDeltas, models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    lead = models.ForeignKey(ArchivedLead, on_delete=models.CASCADE, related_name='remark_history')
+    version = models.PositiveIntegerField()
+    previous_delta = models.JSONField(null=True)
+    new_delta = models.JSONField(null=True)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    changed_at = models.DateTimeField()
+
     class Meta:
         ordering = ['-changed_at']
 
     def __str__(self):
-        return f"Remarks changed for {self.lead} at {self.changed_at}"
\ No newline at end of file
+        return f"Remarks changed for {self.lead_id} at {self.changed_at}"
@@ -0,0 +1,89 @@
+import hashlib
+import re
+
+from django.conf import settings
+
+
+NON_DIGITS = re.compile(r'\D')
+NAME_KEY_PHONE_DIGITS = 6
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6',
+}
+
+
+def normalize_phone(phone):
+    """
+    Canonical E.164 form: ``"+91 98470 12345"``, ``"9847012345"`` and
+    ``"09847012345"`` all become ``"+919847012345"``. Numbers without a
+    country code get ``settings.LEAD_DEFAULT_COUNTRY_CODE``.
+    """
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = NON_DIGITS.sub('', phone)
+    if not digits:
+        return None
+    country_code = getattr(settings, 'LEAD_DEFAULT_COUNTRY_CODE', '91')
+
+    if phone.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif len(digits) == 10:
+        digits = country_code + digits
+    return f'+{digits[:15]}'
+
+
+def normalize_email(email):
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def soundex(word):
+    word = ''.join(char for char in word.upper() if char.isalpha())
+    if not word:
+        return ''
+    code = word[0]
+    previous = SOUNDEX_CODES.get(word[0], '')
+    for char in word[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def name_key(name, phone_normalized):
+    """
+    Weak blocking key: soundex of the first and last name tokens plus the
+    last digits of the canonical phone, e.g. ``"A524-N600:012345"``.
+    """
+    tokens = (name or '').split()
+    if not tokens or not phone_normalized:
+        return None
+    codes = dict.fromkeys(soundex(token) for token in (tokens[0], tokens[-1]))
+    phonetic = '-'.join(code for code in codes if code)
+    if not phonetic:
+        return None
+    return f'{phonetic}:{phone_normalized[-NAME_KEY_PHONE_DIGITS:]}'
+
+
+def program_key(program, max_length=255):
+    """
+    Case- and whitespace-insensitive program key: ``" BSc  Nursing"`` and
+    ``"bsc nursing"`` share one. Keys over ``max_length`` end in an md5 of
+    the full text so long free-text programs stay distinct.
+    """
+    key = ' '.join((program or '').split()).casefold()
+    if len(key) > max_length:
+        key = f'{key[:max_length - 33]}#{hashlib.md5(key.encode()).hexdigest()}'
+    return key
@@ -0,0 +1,256 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ParseError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(json.JSONEncoder):
+    """
+    Keeps full microsecond precision on datetimes; DjangoJSONEncoder truncates
+    to milliseconds, which would make the keyset predicate skip rows.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def estimate_count(queryset):
+    """
+    Return a cheap row estimate for the queryset.
+
+    On PostgreSQL the planner's row estimate is read from EXPLAIN, so no rows
+    are scanned. Other backends have no usable estimate and fall back to an
+    exact COUNT(*).
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+# ------------------------- Page Number Pagination -------------------------
+class LeadPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# ------------------------- Keyset Pagination -------------------------
+class LeadKeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the view's ordering plus ``id``.
+
+    Pages are fetched with ``WHERE (created_at, id) < (:last_created_at, :last_id)``
+    style predicates instead of OFFSET, so every page costs the same index
+    range scan no matter how deep the client pages. No COUNT(*) is issued
+    unless the client asks for one with ``?count=exact`` or ``?count=estimate``.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-created_at',)
+    tiebreaker = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = self.get_count(queryset, request)
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.clean_position(position, queryset.model)
+        ordering = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the ordering resolved by the view's OrderingFilter, then append
+        ``id`` so that every row has a unique position.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = [field for field in (ordering or self.ordering) if field.lstrip('-') != self.tiebreaker]
+        descending = ordering[-1].startswith('-')
+        ordering.append(f'-{self.tiebreaker}' if descending else self.tiebreaker)
+        return tuple(ordering)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    @staticmethod
+    def build_keyset_filter(ordering, position):
+        """
+        Expand a row comparison over ``ordering`` into OR-ed Q objects, e.g.
+        ``created_at < a OR (created_at = a AND id < b)``.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[index]})
+            for prior_field, prior_value in zip(ordering[:index], position[:index]):
+                term &= Q(**{prior_field.lstrip('-'): prior_value})
+            condition |= term
+        return condition
+
+    def get_position(self, item):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            position.append(item[name] if isinstance(item, dict) else getattr(item, name))
+        return position
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        # The ordering travels with the position, so a cursor is refused
+        # under any other ?ordering= instead of comparing the wrong columns
+        payload = json.dumps({'p': position, 'r': int(reverse), 'o': list(self.ordering)}, cls=CursorEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.base_url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+            ordering = payload['o']
+        except (TypeError, ValueError, KeyError):
+            raise ParseError(self.invalid_cursor_message)
+        if ordering != list(self.ordering) or not isinstance(position, list) or len(position) != len(self.ordering):
+            raise ParseError(self.invalid_cursor_message)
+        return position, reverse
+
+    def clean_position(self, position, model):
+        """The cursor's values as their ordering fields' types; tampered values are refused."""
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            try:
+                cleaned.append(model._meta.get_field(field.lstrip('-')).to_python(value))
+            except FieldDoesNotExist:
+                cleaned.append(value)
+            except ValidationError:
+                raise ParseError(self.invalid_cursor_message)
+        return cleaned
+
+    def to_html(self):
+        return ''
+
+
+# ------------------------- Activity Feed Pagination -------------------------
+class ActivityFeedPagination(LeadKeysetPagination):
+    """
+    Forward-only keyset pagination over an ``activity.ActivityFeed``. The
+    cursor holds the (time, source rank, id) of the last item shown.
+    """
+    page_size = 20
+    ordering = ('-timestamp', '-rank', '-id')
+
+    def paginate_queryset(self, feed, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = None
+
+        position, _ = self.decode_cursor(request)
+        if position is not None:
+            timestamp = parse_datetime(position[0]) if isinstance(position[0], str) else None
+            if timestamp is None:
+                raise ParseError(self.invalid_cursor_message)
+            position = (timestamp, *position[1:])
+
+        results = feed.page(position, self.page_size + 1)
+        self.has_next = len(results) > self.page_size
+        self.has_previous = False
+        self.page = results[:self.page_size]
+        return self.page
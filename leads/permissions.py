@@ -1,5 +1,9 @@
+from django.db.models import Q
 from rest_framework.permissions import BasePermission
 
+from users.models import User
+
+
 class CanCreateLead(BasePermission):
     """
     Allow only users who are ADMIN, ADM_MANAGER, or ADM_EXEC to create leads
@@ -11,3 +15,99 @@ class CanCreateLead(BasePermission):
             request.user.is_authenticated and
             request.user.role in self.allowed_roles
         )
+
+
+# ------------------------- Role-scoped lead access -------------------------
+# Roles that see every lead, like staff users
+UNSCOPED_LEAD_ROLES = ('ADMIN', 'OPS', 'ADM_MANAGER', 'BUSINESS_HEAD')
+
+# Processing statuses a lead has once admissions forwarded it
+FORWARDED_PROCESSING_STATUSES = ('FORWARDED', 'ACCEPTED', 'PROCESSING', 'COMPLETED', 'REJECTED')
+
+
+def assigned_scope(user, prefix):
+    return Q(**{f'{prefix}assigned_to': user})
+
+
+def processing_scope(user, prefix):
+    # Their own forwarded leads plus the forwarded queue nobody has taken yet
+    return Q(**{
+        f'{prefix}processing_executive': user,
+        f'{prefix}processing_status__in': FORWARDED_PROCESSING_STATUSES,
+    }) | Q(**{
+        f'{prefix}processing_executive__isnull': True,
+        f'{prefix}processing_status': 'FORWARDED',
+    })
+
+
+def team_scope(user, prefix):
+    if not user.team:
+        return assigned_scope(user, prefix)
+    team = User.objects.filter(team=user.team).values('pk')
+    return Q(**{f'{prefix}assigned_to__in': team})
+
+
+# Each scope is an equality on the leading column of one of Lead's
+# composite indexes, so a scoped page is an index range scan
+LEAD_SCOPES = {
+    'ADM_EXEC': assigned_scope,
+    'PROCESSING': processing_scope,
+    'CM': team_scope,
+}
+
+
+# Lead fields a scoped role may read but not change: who holds a lead, and
+# for admissions roles where it is in processing, stay with full access
+SCOPED_READ_ONLY_LEAD_FIELDS = {
+    'ADM_EXEC': ('assigned_to', 'processing_executive', 'processing_status'),
+    'PROCESSING': ('assigned_to', 'processing_executive'),
+    'CM': ('assigned_to', 'processing_executive', 'processing_status'),
+}
+
+
+def has_full_lead_access(user):
+    return user.is_staff or user.role in UNSCOPED_LEAD_ROLES
+
+
+def lead_scope(user, prefix=''):
+    """
+    Q restricting leads (or, with ``prefix='lead__'``, rows of a lead's
+    history) to those ``user`` may see; ``Q()`` for full access.
+    """
+    if has_full_lead_access(user):
+        return Q()
+    scope = LEAD_SCOPES.get(user.role)
+    if scope is None:
+        return Q(pk__in=[])
+    return scope(user, prefix)
+
+
+def lead_read_only_fields(user):
+    """Lead fields ``user`` may not change; empty for full access."""
+    if has_full_lead_access(user):
+        return ()
+    return SCOPED_READ_ONLY_LEAD_FIELDS.get(user.role, ())
+
+
+def lead_scope_key(user):
+    """Cache/ETag key part: equal for users who see the same leads."""
+    if has_full_lead_access(user):
+        return 'all'
+    if user.role == 'CM' and user.team:
+        return f'team:{user.team}'
+    return f'{user.role}:{user.pk}'
+
+
+class CanAccessLeads(BasePermission):
+    """
+    Staff, unscoped roles and the roles in ``LEAD_SCOPES``; views narrow
+    their querysets with ``lead_scope()``. Deleting stays with full access.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if has_full_lead_access(user):
+            return True
+        return user.role in LEAD_SCOPES and request.method != 'DELETE'
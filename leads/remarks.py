@@ -0,0 +1,145 @@
+"""
+Reading and writing delta-encoded remark history.
+
+``encode()`` numbers new rows after each lead's chain and fills their
+deltas; it reads the chain tail (at most one checkpoint interval of rows
+per lead) with one query. ``materialize()`` rebuilds the text of any rows,
+fetching the chain rows they depend on with one query. Both work for
+``RemarkHistory`` and ``ArchivedRemarkHistory``.
+"""
+from django.db.models import F, Max, Q, Window
+
+from . import deltas
+from .models import RemarkHistory
+
+
+def chain_rows(model, ranges):
+    """
+    Delta rows for ``{lead_id: (first version, last version)}``, as
+    ``{lead_id: [(version, previous_delta, new_delta), ...]}`` in version order.
+    """
+    condition = Q()
+    for lead_id, (first, last) in ranges.items():
+        condition |= Q(lead_id=lead_id, version__gte=first, version__lte=last)
+    chains = {lead_id: [] for lead_id in ranges}
+    if ranges:
+        rows = (
+            model.objects.filter(condition).order_by('lead_id', 'version')
+            .values_list('lead_id', 'version', 'previous_delta', 'new_delta')
+        )
+        for lead_id, *row in rows:
+            chains[lead_id].append(tuple(row))
+    return chains
+
+
+def rebuild(model, wanted):
+    """
+    ``{(lead_id, version): (previous, new)}`` for ``wanted`` lead id ->
+    versions. Chains are read from the checkpoint before the first wanted
+    version, or from the start when that row is not self-contained (rows
+    written under a different checkpoint interval).
+    """
+    ranges = {
+        lead_id: (deltas.checkpoint_of(min(versions)), max(versions))
+        for lead_id, versions in wanted.items()
+    }
+    chains = chain_rows(model, ranges)
+    broken = {
+        lead_id: (1, ranges[lead_id][1])
+        for lead_id, chain in chains.items()
+        if chain and chain[0][0] != 1 and not deltas.self_contained(chain[0][1])
+    }
+    chains.update(chain_rows(model, broken))
+
+    texts = {}
+    for lead_id, chain in chains.items():
+        decoded = deltas.decode_chain((previous_delta, new_delta) for _, previous_delta, new_delta in chain)
+        for (version, _, _), pair in zip(chain, decoded):
+            texts[lead_id, version] = pair
+    return texts
+
+
+def materialize(rows):
+    """Set ``previous_remarks``/``new_remarks`` on saved history rows of one model."""
+    rows = [row for row in rows if row.version is not None]
+    if not rows:
+        return
+    wanted = {}
+    for row in rows:
+        wanted.setdefault(row.lead_id, set()).add(row.version)
+    texts = rebuild(type(rows[0]), wanted)
+    for row in rows:
+        row.previous_remarks, row.new_remarks = texts[row.lead_id, row.version]
+
+
+def decode_values(model, rows):
+    """Add ``previous_remarks``/``new_remarks`` to values() rows carrying ``lead_id`` and ``version``."""
+    wanted = {}
+    for row in rows:
+        wanted.setdefault(row['lead_id'], set()).add(row['version'])
+    texts = rebuild(model, wanted) if wanted else {}
+    for row in rows:
+        row['previous_remarks'], row['new_remarks'] = texts[row['lead_id'], row['version']]
+    return rows
+
+
+def chain_tails(lead_ids):
+    """``{lead_id: (last version, its new remarks)}`` for leads with history."""
+    if not lead_ids:
+        return {}
+    latest = Window(Max('version'), partition_by=[F('lead_id')])
+    rows = (
+        RemarkHistory.objects.filter(lead_id__in=lead_ids)
+        .annotate(latest=latest)
+        .filter(version__gte=F('latest') - (deltas.CHECKPOINT_INTERVAL - 1))
+        .order_by('lead_id', 'version')
+        .values_list('lead_id', 'version', 'previous_delta', 'new_delta')
+    )
+    chains = {}
+    for lead_id, *row in rows:
+        chains.setdefault(lead_id, []).append(tuple(row))
+
+    tails = {}
+    for lead_id, chain in chains.items():
+        version = chain[-1][0]
+        starts = [index for index, (_, previous_delta, _) in enumerate(chain) if deltas.self_contained(previous_delta)]
+        if starts:
+            *_, (_, last_new) = deltas.decode_chain(
+                (previous_delta, new_delta) for _, previous_delta, new_delta in chain[starts[-1]:]
+            )
+        else:
+            # Written under a different checkpoint interval: rebuild from the start
+            _, last_new = rebuild(RemarkHistory, {lead_id: {version}})[lead_id, version]
+        tails[lead_id] = (version, last_new)
+    return tails
+
+
+def encode(rows):
+    """
+    Number unsaved RemarkHistory rows after their lead's chain, in list
+    order, and fill their deltas from the text assigned to them. Callers
+    writing a lead's history hold its row lock (or retry on the unique
+    version constraint).
+    """
+    rows = [row for row in rows if row.version is None]
+    tails = chain_tails({row.lead_id for row in rows})
+    for row in rows:
+        version, last_new = tails.get(row.lead_id, (0, None))
+        row.version = version + 1
+        row.previous_delta, row.new_delta = deltas.encode(row.version, last_new, row.previous_remarks, row.new_remarks)
+        tails[row.lead_id] = (row.version, row.new_remarks)
+
+
+def move(from_lead_ids, lead):
+    """
+    Append the history of ``from_lead_ids`` to ``lead``'s chain, oldest
+    edit first (see dedup.merge_leads). The moved rows keep their ids.
+    """
+    rows = list(RemarkHistory.objects.filter(lead_id__in=from_lead_ids).order_by('changed_at', 'id'))
+    if not rows:
+        return
+    materialize(rows)
+    for row in rows:
+        row.lead, row.version = lead, None
+    encode(rows)
+    RemarkHistory.objects.bulk_update(rows, ['lead', 'version', 'previous_delta', 'new_delta'])
@@ -0,0 +1,218 @@
+"""
+Pluggable full-text search for leads.
+
+The backend is picked per database vendor (SQLite FTS5, PostgreSQL
+tsvector/GIN) unless ``settings.LEAD_SEARCH_BACKEND`` names one explicitly.
+Both full-text backends keep their index in sync inside the database with
+triggers (created by migration 0017 on PostgreSQL, and by the post_migrate
+hook below on SQLite), so ``Lead.save()``, ``delete()``, ``bulk_create()`` and
+``QuerySet.update()`` are all covered. The program is indexed by name,
+looked up from ``leads_program``, and renaming a program reindexes its leads.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Lead, Program
+
+
+SEARCH_FIELDS = ('name', 'phone', 'email', 'program')
+# ORM lookups for SEARCH_FIELDS, for the LIKE fallback
+SEARCH_LOOKUPS = ('name', 'phone', 'email', 'program__name')
+TSQUERY_UNSAFE = re.compile(r"[&|!():*'\\\s<>]+")
+
+
+class LikeSearchBackend:
+    """
+    Fallback matching DRF's SearchFilter: every term must match one of the
+    search fields with ``icontains``. Unranked and unindexed.
+    """
+    ranked = False
+
+    def install(self, connection):
+        pass
+
+    def uninstall(self, connection):
+        pass
+
+    def rebuild(self, connection):
+        pass
+
+    def search(self, queryset, terms):
+        for term in terms:
+            condition = Q()
+            for lookup in SEARCH_LOOKUPS:
+                condition |= Q(**{f'{lookup}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class SQLiteFTSSearchBackend:
+    """
+    Contentless FTS5 table over ``leads_lead`` kept in sync by triggers; the
+    program column is filled from ``leads_program``.
+
+    Django's SQLite schema editor rebuilds tables on most ALTERs, and SQLite
+    refuses to rename a table while a trigger elsewhere names a missing one,
+    so the triggers are dropped before migrations run and ``install()``
+    recreates them, rebuilding the index, after every migrate.
+    """
+    ranked = True
+    table = 'leads_lead_fts'
+    # bm25 column weights for name, phone, email, program
+    rank_function = 'bm25(10.0, 10.0, 5.0, 1.0)'
+
+    def __init__(self):
+        lead_table = Lead._meta.db_table
+        program_table = Program._meta.db_table
+        columns = ', '.join(SEARCH_FIELDS)
+
+        def values(row):
+            program = f'(SELECT name FROM {program_table} WHERE id = {row}.program_id)'
+            return f'{row}.id, {row}.name, {row}.phone, {row}.email, {program}'
+
+        delete_old = f"INSERT INTO {self.table}({self.table}, rowid, {columns}) VALUES ('delete', {values('old')});"
+        insert_new = f"INSERT INTO {self.table}(rowid, {columns}) VALUES ({values('new')});"
+        # A renamed program changes the indexed text of every lead using it
+        reindex_program = (
+            f"INSERT INTO {self.table}({self.table}, rowid, {columns}) "
+            f"SELECT 'delete', id, name, phone, email, old.name FROM {lead_table} WHERE program_id = old.id; "
+            f"INSERT INTO {self.table}(rowid, {columns}) "
+            f"SELECT id, name, phone, email, new.name FROM {lead_table} WHERE program_id = new.id;"
+        )
+
+        self.lead_table = lead_table
+        self.program_table = program_table
+        self.create_table = f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5({columns}, content='')"
+        self.rebuild_rows = (
+            f"INSERT INTO {self.table}(rowid, {columns}) "
+            f"SELECT lead.id, lead.name, lead.phone, lead.email, program.name "
+            f"FROM {lead_table} AS lead LEFT JOIN {program_table} AS program ON program.id = lead.program_id"
+        )
+        self.triggers = {
+            f'{self.table}_ai': f"AFTER INSERT ON {lead_table} BEGIN {insert_new} END",
+            f'{self.table}_ad': f"AFTER DELETE ON {lead_table} BEGIN {delete_old} END",
+            f'{self.table}_au': (
+                f"AFTER UPDATE OF name, phone, email, program_id ON {lead_table} BEGIN {delete_old} {insert_new} END"
+            ),
+            f'{self.table}_program_au': f"AFTER UPDATE OF name ON {program_table} BEGIN {reindex_program} END",
+        }
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            if not {self.lead_table, self.program_table} <= set(connection.introspection.table_names(cursor)):
+                return
+            placeholders = ', '.join(['%s'] * len(self.triggers))
+            cursor.execute(
+                f"SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                list(self.triggers)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if set(self.triggers) <= existing:
+                return
+
+            cursor.execute(self.create_table)
+            for name, body in self.triggers.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+            cursor.execute(f"INSERT INTO {self.table}({self.table}, rank) VALUES ('rank', %s)", [self.rank_function])
+        self.rebuild(connection)
+
+    def uninstall(self, connection):
+        with connection.cursor() as cursor:
+            for name in self.triggers:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    def rebuild(self, connection):
+        with connection.cursor() as cursor:
+            # Contentless tables cannot 'rebuild' themselves; reload them instead
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('delete-all')")
+            cursor.execute(self.rebuild_rows)
+
+    def build_match(self, terms):
+        # Each term becomes a quoted prefix phrase; FTS5 ANDs them together
+        return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+    def search(self, queryset, terms):
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = {self.lead_table}.id', f'{self.table} MATCH %s'],
+            params=[self.build_match(terms)],
+            # FTS5 rank is lower-is-better; negate so every backend sorts DESC
+            select={'search_rank': f'-{self.table}.rank'},
+        )
+
+
+class PostgresSearchBackend:
+    """
+    ``tsvector`` column on ``leads_lead`` with a GIN index, filled by a
+    BEFORE trigger (a generated column cannot read the program name from
+    ``leads_program``). The column, triggers and index are created by
+    migration 0017_lead_search_vector, so there is nothing to install.
+    """
+    ranked = True
+    column = 'search_vector'
+    config = 'simple'
+
+    def __init__(self):
+        self.lead_table = Lead._meta.db_table
+
+    def install(self, connection):
+        pass
+
+    def uninstall(self, connection):
+        pass
+
+    def rebuild(self, connection):
+        # Touching an indexed column fires the trigger for every row
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {self.lead_table} SET name = name")
+
+    def build_tsquery(self, terms):
+        lexemes = [TSQUERY_UNSAFE.sub(' ', term).strip() for term in terms]
+        return ' & '.join(f"{lexeme.replace(' ', ' <-> ')}:*" for lexeme in lexemes if lexeme)
+
+    def search(self, queryset, terms):
+        tsquery = self.build_tsquery(terms)
+        if not tsquery:
+            return queryset.none()
+        column = f'{self.lead_table}.{self.column}'
+        return queryset.extra(
+            where=[f"{column} @@ to_tsquery('{self.config}', %s)"],
+            params=[tsquery],
+            select={'search_rank': f"ts_rank({column}, to_tsquery('{self.config}', %s))"},
+            select_params=[tsquery],
+        )
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTSSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend(using='default'):
+    """Return the (cached) search backend for a database alias."""
+    if using not in _backends:
+        path = getattr(settings, 'LEAD_SEARCH_BACKEND', None)
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connections[using].vendor, LikeSearchBackend)
+        _backends[using] = backend_class()
+    return _backends[using]
+
+
+def install_search_backend(sender=None, using='default', **kwargs):
+    """post_migrate hook: create or repair the full-text index for ``using``."""
+    get_search_backend(using).install(connections[using])
+
+
+def uninstall_search_backend(sender=None, using='default', plan=None, **kwargs):
+    """pre_migrate hook: drop the index triggers so migrations can rebuild the tables they read."""
+    if plan:
+        get_search_backend(using).uninstall(connections[using])
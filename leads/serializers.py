@@ -1,9 +1,72 @@
 from rest_framework import serializers
-from .models import Lead, ProcessingUpdate, RemarkHistory
+from rest_framework.exceptions import PermissionDenied
+from backend.mixins import SparseFieldsetsMixin
+from outbox import events as outbox
+from users.models import User
+from users.serializers import StaffSummarySerializer
+from .models import (
+    ArchivedLead,
+    ArchivedProcessingUpdate,
+    ArchivedRemarkHistory,
+    Lead,
+    LeadStatus,
+    ProcessingUpdate,
+    Program,
+    RemarkHistory,
+)
+from .permissions import lead_read_only_fields
+from .assignment import MAX_BULK_ASSIGN, STRATEGIES, STRATEGY_LEAST_OPEN
+from .transitions import MAX_BULK_TRANSITION
+
+
+MAX_MERGE_DUPLICATES = 50
+
+
+# Reused to format datetimes exactly like DRF when serializing values() rows
+DATETIME_FIELD = serializers.DateTimeField()
+
+
+# --------------------------- Lookup Field ---------------------------
+class LookupField(serializers.RelatedField):
+    """
+    A foreign key to a ``LookupTable`` exposed as its string form. Strings
+    with no row yet get one, as the free-text columns these replaced took
+    any value; reading never queries once the lookup cache is warm.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a string.',
+        'max_length': 'Ensure this field has no more than {max_length} characters.',
+    }
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        self.max_length = model._meta.get_field(model.display_field).max_length
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', model.objects.all())
+        super().__init__(**kwargs)
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        if len(data.strip()) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+        row = self.model.resolve(data, create=True)
+        if row is None:
+            self.fail('required')
+        return row
+
+    def to_representation(self, value):
+        return self.model.display(value.pk)
 
 
 # --------------------------- Lead Create Serializer ---------------------------
 class LeadCreateSerializer(serializers.ModelSerializer):
+    status = LookupField(LeadStatus, required=False)
+    program = LookupField(Program, required=False, allow_null=True)
+
     class Meta:
         model = Lead
         fields = [
@@ -55,14 +118,45 @@ class LeadCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"custom_source": "This field is required when source is OTHER."})
 
         # Restrict invalid initial status
-        if attrs.get('status') in ['REGISTERED', 'COMPLETED']:
+        if attrs.get('status') and attrs['status'].code in ['REGISTERED', 'COMPLETED']:
             raise serializers.ValidationError({"status": "Cannot create a lead directly with this status."})
 
         return attrs
 
 
+# --------------------------- Lead Import Serializer ---------------------------
+class LeadImportSerializer(LeadCreateSerializer):
+    """
+    Row validation for bulk imports.
+
+    Uniqueness is not checked here: the importer resolves phone/email
+    duplicates for a whole chunk with a single IN query instead of one
+    query per row.
+    """
+    class Meta(LeadCreateSerializer.Meta):
+        extra_kwargs = {
+            'phone': {'validators': []},
+            'email': {'validators': []},
+        }
+
+    def validate_phone(self, value):
+        value = value.strip()
+        if not value.isdigit():
+            raise serializers.ValidationError("Phone number must contain only digits.")
+        if len(value) < 10:
+            raise serializers.ValidationError("Phone number must be at least 10 digits.")
+        return value
+
+    def validate_email(self, value):
+        if value:
+            value = value.strip()
+        return value or None
+
+
 # --------------------------- Lead List Serializer ---------------------------
-class LeadListSerializer(serializers.ModelSerializer):
+class LeadListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    status = LookupField(LeadStatus, read_only=True)
+    program = LookupField(Program, read_only=True)
     assigned_to_name = serializers.CharField(source='assigned_to.username', read_only=True)
 
     class Meta:
@@ -80,9 +174,80 @@ class LeadListSerializer(serializers.ModelSerializer):
             'created_at',
         ]
 
+    # values() lookups for the fast list path; the assignee name is joined in SQL
+    value_lookups = {
+        'id': 'id',
+        'name': 'name',
+        'phone': 'phone',
+        'status': 'status_id',
+        'priority': 'priority',
+        'program': 'program_id',
+        'source': 'source',
+        'processing_status': 'processing_status',
+        'assigned_to_name': 'assigned_to__username',
+        'created_at': 'created_at',
+    }
+    # Nested values() lookups for ?expand=
+    expanded_value_lookups = {
+        'assigned_to': {field: f'assigned_to__{field}' for field in StaffSummarySerializer.Meta.fields},
+    }
+    # Always selected: keyset pagination reads the row's position from them
+    position_lookups = ('id', 'created_at', 'priority')
+    # Lookup table ids in value_lookups, mapped back to their strings
+    lookup_models = {'status': LeadStatus, 'program': Program}
+
+    expandable_fields = {
+        'assigned_to': (StaffSummarySerializer, {'read_only': True}),
+    }
+
+    @classmethod
+    def row_lookups(cls, request=None):
+        """value_lookups narrowed by ?fields=/?exclude= and extended by ?expand=."""
+        fields, exclude, expand = cls.sparse_params(request)
+        lookups = dict(cls.value_lookups)
+        for name in expand & set(cls.expanded_value_lookups):
+            lookups[name] = cls.expanded_value_lookups[name]
+        return {
+            name: lookup for name, lookup in lookups.items()
+            if (fields is None or name in fields) and name not in exclude
+        }
+
+    @classmethod
+    def values_queryset(cls, queryset, lookups=None):
+        lookups = cls.value_lookups if lookups is None else lookups
+        columns = dict.fromkeys(cls.position_lookups)
+        for lookup in lookups.values():
+            columns.update(dict.fromkeys(lookup.values() if isinstance(lookup, dict) else [lookup]))
+        return queryset.values(*columns)
+
+    @classmethod
+    def represent_row(cls, row, lookups=None):
+        """Same output as to_representation(), built from a values() row."""
+        lookups = cls.value_lookups if lookups is None else lookups
+        data = {}
+        for field, lookup in lookups.items():
+            if isinstance(lookup, dict):
+                nested = {name: row[column] for name, column in lookup.items()}
+                data[field] = nested if nested['id'] is not None else None
+            elif field in cls.lookup_models:
+                data[field] = cls.lookup_models[field].display(row[lookup])
+            else:
+                data[field] = row[lookup]
+        if 'created_at' in data:
+            data['created_at'] = DATETIME_FIELD.to_representation(data['created_at'])
+        return data
+
 
 # --------------------------- Lead Detail Serializer ---------------------------
-class LeadDetailSerializer(serializers.ModelSerializer):
+class LeadDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    status = LookupField(LeadStatus, required=False)
+    program = LookupField(Program, required=False, allow_null=True)
+
+    expandable_fields = {
+        'assigned_to': (StaffSummarySerializer, {'read_only': True}),
+        'processing_executive': (StaffSummarySerializer, {'read_only': True}),
+    }
+
     class Meta:
         model = Lead
         fields = '__all__'
@@ -94,18 +259,153 @@ class LeadDetailSerializer(serializers.ModelSerializer):
         )
 
     def update(self, instance, validated_data):
+        """
+        Apply the change with one UPDATE of the changed columns, then write
+        every resulting history row with one batched insert per table and
+        every outbox event with one more.
+        Callers are expected to run this inside a transaction holding the
+        row lock (see LeadDetailView.update).
+        """
         request = self.context.get('request')
+        changed_by = request.user if request else None
+
+        remark_history = []
+        processing_updates = []
 
         # Track remarks changes
-        if 'remarks' in validated_data and instance.remarks != validated_data.get('remarks'):
-            RemarkHistory.objects.create(
+        if 'remarks' in validated_data and instance.remarks != validated_data['remarks']:
+            remark_history.append(RemarkHistory(
                 lead=instance,
                 previous_remarks=instance.remarks,
-                new_remarks=validated_data.get('remarks'),
-                changed_by=request.user if request else None
-            )
+                new_remarks=validated_data['remarks'],
+                changed_by=changed_by
+            ))
 
-        return super().update(instance, validated_data)
+        # Track processing status changes
+        if 'processing_status' in validated_data and instance.processing_status != validated_data['processing_status']:
+            processing_updates.append(ProcessingUpdate(
+                lead=instance,
+                status=validated_data['processing_status'],
+                changed_by=changed_by,
+                notes="Status updated via API"
+            ))
+
+        # The lead's and the processing updates' outbox events go in one insert
+        with outbox.batch():
+            instance = super().update(instance, validated_data)
+
+            if remark_history:
+                RemarkHistory.objects.bulk_create(remark_history)
+            if processing_updates:
+                for update in processing_updates:
+                    update.processing_executive_id = instance.processing_executive_id
+                ProcessingUpdate.objects.bulk_create(processing_updates)
+                outbox.record_created(processing_updates)
+
+        return instance
+
+
+class ScopedLeadDetailSerializer(LeadDetailSerializer):
+    """
+    LeadDetailSerializer for role-scoped users. A request that changes one of
+    the role's ``SCOPED_READ_ONLY_LEAD_FIELDS`` is refused; sending the
+    current value back (a full PUT) is accepted and writes nothing. A
+    processing executive who moves a lead out of the unclaimed FORWARDED
+    queue takes it, so it stays inside their scope.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        user = self.context['request'].user
+        refused = []
+        for name in lead_read_only_fields(user):
+            if name not in attrs:
+                continue
+            value = attrs.pop(name)
+            current = getattr(self.instance, Lead._meta.get_field(name).attname)
+            if getattr(value, 'pk', value) != current:
+                refused.append(name)
+        if refused:
+            raise PermissionDenied(f"Your role cannot change: {', '.join(refused)}.")
+
+        lead = self.instance
+        if (
+            user.role == 'PROCESSING'
+            and lead.processing_executive_id is None
+            and lead.processing_status == 'FORWARDED'
+            and attrs.get('processing_status', lead.processing_status) != lead.processing_status
+        ):
+            attrs['processing_executive'] = user
+        return attrs
+
+
+# --------------------------- Archived Lead Serializers ---------------------------
+class ArchivedProcessingUpdateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedProcessingUpdate
+        fields = ['id', 'status', 'changed_by', 'notes', 'timestamp']
+
+
+class ArchivedRemarkHistorySerializer(serializers.ModelSerializer):
+    previous_remarks = serializers.CharField(read_only=True, allow_null=True)
+    new_remarks = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = ArchivedRemarkHistory
+        fields = ['id', 'previous_remarks', 'new_remarks', 'changed_by', 'changed_at']
+
+
+class ArchivedLeadSerializer(serializers.ModelSerializer):
+    status = LookupField(LeadStatus, read_only=True)
+    program = LookupField(Program, read_only=True)
+
+    class Meta:
+        model = ArchivedLead
+        fields = '__all__'
+
+
+class ArchivedLeadDetailSerializer(ArchivedLeadSerializer):
+    processing_updates = ArchivedProcessingUpdateSerializer(many=True, read_only=True)
+    remark_history = ArchivedRemarkHistorySerializer(many=True, read_only=True)
+
+
+# --------------------------- Lead Bulk Transition Serializer ---------------------------
+class LeadBulkTransitionSerializer(serializers.Serializer):
+    lead_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_TRANSITION
+    )
+    processing_status = serializers.ChoiceField(choices=Lead.PROCESSING_STATUS_CHOICES)
+    processing_executive = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role='PROCESSING'),
+        required=False
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_processing_status(self, value):
+        if value not in Lead.TRANSITION_CONDITIONS:
+            raise serializers.ValidationError(f"Leads cannot be moved to {value} in bulk.")
+        return value
+
+
+# --------------------------- Lead Bulk Assign Serializer ---------------------------
+class LeadBulkAssignSerializer(serializers.Serializer):
+    lead_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_ASSIGN
+    )
+    strategy = serializers.ChoiceField(choices=list(STRATEGIES), default=STRATEGY_LEAST_OPEN)
+
+
+# --------------------------- Lead Merge Serializer ---------------------------
+class LeadMergeSerializer(serializers.Serializer):
+    duplicate_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_MERGE_DUPLICATES
+    )
 
 
 # --------------------------- Processing Update Serializer ---------------------------
@@ -140,8 +440,24 @@ class ProcessingUpdateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+# --------------------------- Activity Serializer ---------------------------
+class ActivitySerializer(serializers.Serializer):
+    """One item of the merged lead activity feed (see leads.activity)"""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    lead = serializers.IntegerField()
+    timestamp = serializers.DateTimeField()
+    changed_by = serializers.IntegerField(allow_null=True)
+    changed_by_name = serializers.CharField(allow_null=True)
+    details = serializers.DictField()
+
+
 # --------------------------- Remark History Serializer ---------------------------
 class RemarkHistorySerializer(serializers.ModelSerializer):
+    # Rebuilt from / encoded into the row's delta chain
+    previous_remarks = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+    new_remarks = serializers.CharField(allow_null=True, allow_blank=True, required=False)
+
     class Meta:
         model = RemarkHistory
         fields = [
@@ -0,0 +1,69 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import User
+from . import cache, dedup, funnel
+from .models import Lead, LeadStatus, Program
+
+
+# ------------------------- Lead Funnel Counts -------------------------
+@receiver(post_save, sender=Lead)
+def update_funnel_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        funnel.apply_deltas(Counter({funnel.lead_key(instance): 1}))
+        return
+
+    # post_save runs before DirtyFieldsMixin refreshes its snapshot
+    if not any(field in instance.get_dirty_fields() for field in funnel.FUNNEL_FIELDS):
+        return
+    deltas = Counter()
+    deltas[funnel.original_lead_key(instance)] -= 1
+    deltas[funnel.lead_key(instance)] += 1
+    funnel.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Lead)
+def update_funnel_on_delete(sender, instance, **kwargs):
+    funnel.apply_deltas(Counter({funnel.lead_key(instance): -1}))
+
+
+@receiver(pre_delete, sender=User)
+def update_funnel_on_user_delete(sender, instance, **kwargs):
+    funnel.reassign_user(instance.pk)
+
+
+# ------------------------- Duplicate Detection -------------------------
+@receiver(post_save, sender=Lead)
+def detect_duplicates_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or any(field in instance.get_dirty_fields() for field in ('name', 'phone', 'email')):
+        dedup.detect_duplicates([instance])
+
+
+# ------------------------- List Response Cache -------------------------
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def invalidate_lead_lists(sender, **kwargs):
+    cache.invalidate(Lead._meta.db_table)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_lead_lists_on_user_change(sender, **kwargs):
+    # Lead list rows carry the assignee's username
+    cache.invalidate(Lead._meta.db_table)
+
+
+@receiver(post_save, sender=LeadStatus)
+@receiver(post_delete, sender=LeadStatus)
+@receiver(post_save, sender=Program)
+@receiver(post_delete, sender=Program)
+def reload_lookups(sender, using=None, **kwargs):
+    sender.written(using)
+    # Lead list rows carry the status code and program name
+    cache.invalidate(Lead._meta.db_table)
@@ -1,3 +1,1421 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+import re
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from outbox import events as outbox, relay
+from outbox.models import OutboxEvent, RelayOffset
+from outbox.relay import SinkError
+from users.models import User
+from . import archive, assignment, dedup, deltas, funnel, ingest, metrics, remarks, transitions
+from .importers import FORMAT_CSV, LeadImporter
+from .models import (
+    LOOKUP_CACHES,
+    ArchivedLead,
+    ArchivedProcessingUpdate,
+    DuplicateCandidate,
+    Lead,
+    LeadAssignmentLoad,
+    LeadFunnelCount,
+    LeadIngestEvent,
+    LeadStatus,
+    ProcessingStageRollup,
+    ProcessingUpdate,
+    Program,
+    RemarkHistory,
+)
+from .search import SQLiteFTSSearchBackend, get_search_backend
+from .serializers import LeadListSerializer
+
+
+def statement(sql):
+    """``(verb, table)`` of a captured query; no table for savepoints."""
+    verb = sql.split(None, 1)[0].upper()
+    if verb in ('SAVEPOINT', 'RELEASE', 'ROLLBACK'):
+        return verb, None
+    table = re.search(r'(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', sql)
+    return verb, table and table.group(1)
+
+
+def selected_columns(sql):
+    """``{(table, column)}`` read by a captured SELECT."""
+    select = re.match(r'SELECT (.*?) FROM ', sql, re.S).group(1)
+    return set(re.findall(r'"(\w+)"\."(\w+)"', select))
+
+
+class LeadUpdateTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.lead = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE', remarks='Called once'
+        )
+        self.url = reverse('lead-detail', args=[self.lead.pk])
+
+    def test_remarks_change_writes_one_history_row(self):
+        response = self.client.patch(self.url, {'remarks': 'Called twice'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        history = RemarkHistory.objects.get(lead=self.lead)
+        self.assertEqual(history.previous_remarks, 'Called once')
+        self.assertEqual(history.new_remarks, 'Called twice')
+        self.assertEqual(history.changed_by, self.admin)
+
+    def test_processing_status_change_writes_processing_update(self):
+        response = self.client.patch(self.url, {'processing_status': 'FORWARDED'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        update = ProcessingUpdate.objects.get(lead=self.lead)
+        self.assertEqual(update.status, 'FORWARDED')
+        self.assertEqual(update.changed_by, self.admin)
+        self.assertFalse(RemarkHistory.objects.exists())
+
+    def test_unchanged_values_write_no_history(self):
+        response = self.client.patch(
+            self.url, {'remarks': 'Called once', 'processing_status': 'PENDING'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RemarkHistory.objects.exists())
+        self.assertFalse(ProcessingUpdate.objects.exists())
+
+    def test_update_query_budget(self):
+        # Make sure the target funnel group already exists (steady state)
+        Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE', processing_status='FORWARDED')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url, {'remarks': 'Called twice', 'processing_status': 'FORWARDED'}, format='json'
+            )
+
+        # Every statement an update may cost. A feature that adds one to the
+        # write path adds it here, next to what it is for
+        self.assertEqual([statement(query['sql']) for query in queries.captured_queries], [
+            # The view's transaction; a SAVEPOINT inside TestCase
+            ('SAVEPOINT', None),
+            # Lock and read the lead
+            ('SELECT', 'leads_lead'),
+            # The changed columns only
+            ('UPDATE', 'leads_lead'),
+            # Both funnel groups the lead moved between, one upsert (leads.funnel)
+            ('INSERT', 'leads_leadfunnelcount'),
+            # Tail of the lead's remark delta chain (leads.remarks)
+            ('SELECT', 'leads_remarkhistory'),
+            # One insert per history table
+            ('INSERT', 'leads_remarkhistory'),
+            ('INSERT', 'leads_processingupdate'),
+            # The lead's and the processing update's events, one insert (outbox.events.batch)
+            ('INSERT', 'outbox_outboxevent'),
+            ('RELEASE', None),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.remarks, 'Called twice')
+        self.assertEqual(self.lead.processing_status, 'FORWARDED')
+        self.assertEqual(OutboxEvent.objects.filter(event_type=OutboxEvent.UPDATED).count(), 1)
+        self.assertEqual(LeadFunnelCount.objects.get(processing_status='FORWARDED').count, 2)
+        self.assertEqual(LeadFunnelCount.objects.get(processing_status='PENDING').count, 0)
+
+
+class LeadListTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        executives = [
+            User.objects.create_user(username=f'exec{index}', password='password', role='ADM_EXEC')
+            for index in range(3)
+        ]
+        Lead.objects.bulk_create([
+            Lead(name=f'Lead {index:03d}', phone=f'98470{index:05d}', source='WEBSITE', assigned_to=executives[index % 3])
+            for index in range(30)
+        ])
+        caches['lead_lists'].clear()
+        self.url = reverse('lead-list')
+
+    def test_page_query_count_is_constant(self):
+        # ETag aggregate, COUNT(*) and one page SELECT with the assignee joined in
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'page_size': 25})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertTrue(all(row['assigned_to_name'].startswith('exec') for row in response.data['results']))
+
+    def test_keyset_page_is_a_single_select(self):
+        # ETag aggregate plus the page SELECT; no COUNT(*) for the page itself
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 25})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIsNotNone(response.data['next'])
+
+    def follow(self, url, params, link):
+        """Ids of every page reached by following ``link`` from the first response."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            if response.data[link] is None:
+                return pages
+            response = self.client.get(response.data[link])
+
+    def test_keyset_walks_mixed_ordering_with_ties(self):
+        leads = list(Lead.objects.order_by('id'))
+        moment = timezone.now()
+        for index, lead in enumerate(leads):
+            # Three priorities, and every timestamp shared by three leads
+            Lead.objects.filter(pk=lead.pk).update(
+                priority=('HIGH', 'LOW', 'MEDIUM')[index % 3],
+                created_at=moment - datetime.timedelta(minutes=index // 3),
+            )
+        rows = Lead.objects.values_list('priority', 'created_at', 'id')
+        expected = [row[2] for row in sorted(rows, key=lambda row: (row[0], -row[1].timestamp(), -row[2]))]
+        params = {'pagination': 'cursor', 'ordering': 'priority,-created_at', 'page_size': 4}
+
+        pages = self.follow(self.url, params, 'next')
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(len(pages), 8)
+
+        # Back from the last page to the first
+        last_page = self.client.get(self.url, params)
+        while last_page.data['next']:
+            last_page = self.client.get(last_page.data['next'])
+        backwards = self.follow(last_page.data['previous'], {}, 'previous')
+        self.assertEqual(sum(reversed(backwards), []), expected[:-len(pages[-1])])
+
+    def test_tampered_or_foreign_cursor_is_refused(self):
+        params = {'pagination': 'cursor', 'page_size': 5}
+        next_url = self.client.get(self.url, params).data['next']
+        cursor = re.search(r'cursor=([^&]+)', next_url).group(1)
+        payload = json.loads(base64.urlsafe_b64decode(cursor))
+
+        tampered = {**payload, 'p': ['not a date', payload['p'][1]]}
+        bad_cursors = [
+            'garbage',
+            base64.urlsafe_b64encode(json.dumps(tampered).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({'p': payload['p'], 'r': 0}).encode()).decode(),
+        ]
+        for cursor_value in bad_cursors:
+            response = self.client.get(self.url, {**params, 'cursor': cursor_value})
+            self.assertEqual(response.status_code, 400, cursor_value)
+
+        # Same position length, but taken under another ordering
+        response = self.client.get(self.url, {**params, 'ordering': 'priority', 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(next_url).status_code, 200)
+
+    def test_keyset_counts_on_request(self):
+        params = {'pagination': 'cursor', 'page_size': 5}
+        self.assertNotIn('count', self.client.get(self.url, params).data)
+
+        response = self.client.get(self.url, {**params, 'count': 'exact'})
+        self.assertEqual(response.data['count'], 30)
+        self.assertNotIn('count=', response.data['next'])
+        # SQLite has no planner estimate and counts exactly
+        self.assertEqual(self.client.get(self.url, {**params, 'count': 'estimate'}).data['count'], 30)
+        Lead.objects.filter(pk__in=Lead.objects.order_by('id').values('id')[:10]).delete()
+        self.assertEqual(self.client.get(self.url, {**params, 'count': 'exact'}).data['count'], 20)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        caches['lead_lists'].clear()
+
+        # Only the validator aggregate runs; no rows are fetched
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        Lead.objects.filter(pk=Lead.objects.first().pk).delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_repeated_list_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        lead = Lead.objects.get(pk=response.data['results'][0]['id'])
+        lead.name = 'Renamed Lead'
+        lead.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed Lead')
+
+
+class LeadSparseFieldsetsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.executive = User.objects.create_user(
+            username='exec1', password='password', role='ADM_EXEC', first_name='Devika', team='North'
+        )
+        self.lead = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE', remarks='Called once', assigned_to=self.executive
+        )
+        caches['lead_lists'].clear()
+
+    def fetch(self, url, params):
+        """The response and the columns of the last SELECT, which reads the rows."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        rows = [query['sql'] for query in queries if statement(query['sql']) == ('SELECT', 'leads_lead')]
+        return response, selected_columns(rows[-1])
+
+    def test_detail_fields_narrow_payload_and_columns(self):
+        response, columns = self.fetch(reverse('lead-detail', args=[self.lead.pk]), {'fields': 'id,name,bogus'})
+
+        self.assertEqual(response.data, {'id': self.lead.pk, 'name': 'Anjali Nair'})
+        self.assertEqual(columns, {('leads_lead', 'id'), ('leads_lead', 'name')})
+
+    def test_detail_exclude_drops_the_field_and_its_column(self):
+        response, columns = self.fetch(reverse('lead-detail', args=[self.lead.pk]), {'exclude': 'remarks,bogus'})
+
+        self.assertNotIn('remarks', response.data)
+        self.assertIn('phone', response.data)
+        self.assertNotIn(('leads_lead', 'remarks'), columns)
+        self.assertIn(('leads_lead', 'phone'), columns)
+
+    def test_detail_expand_joins_the_nested_staff(self):
+        response, columns = self.fetch(
+            reverse('lead-detail', args=[self.lead.pk]), {'fields': 'id,assigned_to', 'expand': 'assigned_to,bogus'}
+        )
+
+        self.assertEqual(response.data['assigned_to'], {
+            'id': self.executive.pk, 'username': 'exec1', 'first_name': 'Devika',
+            'last_name': '', 'role': 'ADM_EXEC', 'team': 'North',
+        })
+        self.assertEqual(columns, {('leads_lead', 'id'), ('leads_lead', 'assigned_to_id')} | {
+            ('users_user', name) for name in ('id', 'username', 'first_name', 'last_name', 'role', 'team')
+        })
+
+    def test_list_fields_narrow_the_values_columns(self):
+        response, columns = self.fetch(reverse('lead-list'), {'fields': 'name,bogus'})
+
+        self.assertEqual(response.data['results'], [{'name': 'Anjali Nair'}])
+        # Keyset positions are always read
+        self.assertEqual({column for table, column in columns}, {'id', 'created_at', 'priority', 'name'})
+
+    def test_list_exclude_and_expand(self):
+        response, columns = self.fetch(
+            reverse('lead-list'), {'exclude': 'phone,assigned_to_name,bogus', 'expand': 'assigned_to'}
+        )
+
+        row, = response.data['results']
+        self.assertEqual(set(row), set(LeadListSerializer.value_lookups) - {'phone', 'assigned_to_name'} | {'assigned_to'})
+        self.assertEqual(
+            (row['assigned_to']['username'], row['assigned_to']['team'], row['status']), ('exec1', 'North', 'ENQUIRY')
+        )
+        self.assertNotIn(('leads_lead', 'phone'), columns)
+        # The nested id is read from the foreign key column
+        self.assertIn(('leads_lead', 'assigned_to_id'), columns)
+        self.assertEqual({column for table, column in columns if table == 'users_user'}, {
+            'username', 'first_name', 'last_name', 'role', 'team',
+        })
+
+    def test_row_lookups_follow_the_request(self):
+        request = APIRequestFactory().get('/', {'fields': 'id,status,assigned_to', 'expand': 'assigned_to'})
+        lookups = LeadListSerializer.row_lookups(Request(request))
+
+        self.assertEqual(set(lookups), {'id', 'status', 'assigned_to'})
+        self.assertEqual(lookups['status'], 'status_id')
+        self.assertEqual(lookups['assigned_to']['username'], 'assigned_to__username')
+        self.assertEqual(LeadListSerializer.row_lookups(None), LeadListSerializer.value_lookups)
+
+
+class LeadDuplicatesTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_clusters_carry_status_codes(self):
+        first = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        second = Lead.objects.create(
+            name='Anjali N', phone='+91 98470 12345', source='WHATSAPP', status=LeadStatus.resolve('REGISTERED', create=True)
+        )
+
+        response = self.client.get(reverse('lead-duplicates'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        cluster = response.data['clusters'][0]
+        self.assertEqual(cluster['reasons'], ['phone'])
+        self.assertEqual(
+            [(lead['id'], lead['status']) for lead in cluster['leads']],
+            [(first.pk, 'ENQUIRY'), (second.pk, 'REGISTERED')],
+        )
+        # The response renders as JSON
+        self.assertIn(b'"REGISTERED"', response.content)
+
+
+class LookupCacheTests(TestCase):
+    def test_default_status_is_looked_up_not_created(self):
+        LeadStatus.cached()
+        with self.assertNumQueries(0):
+            lead = Lead(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        self.assertEqual(lead.status_code, 'ENQUIRY')
+
+    def test_rolled_back_row_leaves_no_cached_id(self):
+        LeadStatus.cached()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            status = LeadStatus.resolve('CALLBACK', create=True)
+            self.assertEqual(LeadStatus.resolve('CALLBACK'), status)
+            self.assertNotIn(LeadStatus, LOOKUP_CACHES)
+            raise RuntimeError
+
+        self.assertIsNone(LeadStatus.resolve('CALLBACK'))
+        self.assertFalse(LeadStatus.objects.filter(code='CALLBACK').exists())
+
+    def test_written_row_is_resolved_without_reloading(self):
+        status = LeadStatus.resolve('CALLBACK', create=True)
+
+        # The transaction loads its own copy once; the shared cache stays empty until commit
+        with self.assertNumQueries(1):
+            self.assertEqual(LeadStatus.resolve('CALLBACK'), status)
+        with self.assertNumQueries(0):
+            LeadStatus.resolve('CALLBACK')
+        self.assertNotIn(LeadStatus, LOOKUP_CACHES)
+
+
+class LeadOutboxPayloadTests(APITestCase):
+    def test_lookup_columns_keep_their_string_form(self):
+        lead = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE',
+            program=Program.resolve('B.Sc Nursing', create=True),
+        )
+        created = OutboxEvent.objects.get(aggregate='leads.lead', aggregate_id=lead.pk, event_type=OutboxEvent.CREATED)
+        self.assertEqual((created.payload['status'], created.payload['program']), ('ENQUIRY', 'B.Sc Nursing'))
+        self.assertNotIn('status_id', created.payload)
+        self.assertNotIn('program_id', created.payload)
+
+        lead.status = LeadStatus.resolve('REGISTERED', create=True)
+        lead.save()
+        updated = OutboxEvent.objects.get(aggregate='leads.lead', aggregate_id=lead.pk, event_type=OutboxEvent.UPDATED)
+        self.assertEqual(updated.payload['status'], 'REGISTERED')
+        self.assertNotIn('program', updated.payload)
+
+
+class LeadDirtyFieldsTests(APITestCase):
+    def test_bulk_created_lead_tracks_changes(self):
+        lead, = Lead.objects.bulk_create([Lead(name='Anjali Nair', phone='9847012345', source='WEBSITE')])
+        self.assertEqual(lead.get_dirty_fields(), {})
+
+        lead.processing_status = 'FORWARDED'
+        lead.save()
+
+        self.assertEqual(lead.get_dirty_fields(), {})
+        event = OutboxEvent.objects.get(aggregate='leads.lead', aggregate_id=lead.pk, event_type=OutboxEvent.UPDATED)
+        self.assertEqual(event.payload['processing_status'], 'FORWARDED')
+        self.assertIn('processing_status_date', event.payload)
+
+    def test_saved_lead_without_snapshot_writes_every_field(self):
+        original = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        values = {field.attname: getattr(original, field.attname) for field in Lead._meta.concrete_fields}
+        lead = Lead(**{**values, 'processing_status': 'FORWARDED'})
+        lead._state.adding = False
+
+        self.assertIn('processing_status', lead.get_dirty_fields())
+        lead.save()
+
+        lead.refresh_from_db()
+        self.assertEqual(lead.processing_status, 'FORWARDED')
+        self.assertGreater(lead.processing_status_date, original.processing_status_date)
+        self.assertTrue(OutboxEvent.objects.filter(
+            aggregate='leads.lead', aggregate_id=lead.pk, event_type=OutboxEvent.UPDATED
+        ).exists())
+
+
+class StageMetricsTests(APITestCase):
+    def setUp(self):
+        self.first = User.objects.create_user(username='exec1', password='password', role='ADM_EXEC')
+        self.second = User.objects.create_user(username='exec2', password='password', role='ADM_EXEC')
+        self.day = datetime.date(2026, 10, 1)
+        self.start = timezone.make_aware(datetime.datetime.combine(self.day, datetime.time(9)))
+
+    def record(self, lead, status, executive, seconds):
+        update = ProcessingUpdate.objects.create(lead=lead, status=status, processing_executive=executive)
+        ProcessingUpdate.objects.filter(pk=update.pk).update(timestamp=self.start + datetime.timedelta(seconds=seconds))
+
+    def test_stage_stays_with_the_executive_who_held_it(self):
+        lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', processing_executive=self.first)
+        self.record(lead, 'ACCEPTED', self.first, 0)
+        self.record(lead, 'PROCESSING', self.first, 3600)
+        # Reassigned after the stage ended
+        lead.processing_executive = self.second
+        lead.save()
+
+        self.assertEqual(metrics.rollup_day(self.day), 1)
+        rollup = ProcessingStageRollup.objects.get(day=self.day)
+        self.assertEqual((rollup.stage, rollup.processing_executive, rollup.count), ('ACCEPTED', self.first, 1))
+        self.assertEqual(metrics.stage_report(self.day, self.day, executive=self.second), [])
+
+    def test_forwarded_queue_goes_to_the_executive_who_took_it(self):
+        lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        self.record(lead, 'FORWARDED', None, 0)
+        self.record(lead, 'ACCEPTED', self.second, 600)
+
+        metrics.rollup_day(self.day)
+        rollup = ProcessingStageRollup.objects.get(day=self.day)
+        self.assertEqual((rollup.stage, rollup.processing_executive), ('FORWARDED', self.second))
+
+    def test_rollup_histogram_is_bounded(self):
+        durations = list(range(60, 86400, 7))
+        self.assertLess(len(metrics.histogram(durations)), 70)
+
+        buckets = {int(index): count for index, count in metrics.histogram(durations).items()}
+        for fraction in (0.5, 0.9):
+            exact = durations[int((len(durations) - 1) * fraction)]
+            # Within one bucket's width, about 19%
+            self.assertAlmostEqual(metrics.percentile(buckets, fraction), exact, delta=exact * 0.19)
+
+    def test_report_merges_days(self):
+        for day, seconds in ((self.day, [100, 200]), (self.day + datetime.timedelta(days=1), [300])):
+            ProcessingStageRollup.objects.create(
+                day=day, stage='ACCEPTED', processing_executive=self.first,
+                count=len(seconds), total_seconds=sum(seconds), histogram=metrics.histogram(seconds),
+            )
+
+        entry, = metrics.stage_report(self.day, self.day + datetime.timedelta(days=1))
+        self.assertEqual((entry['stage'], entry['count'], entry['mean_seconds']), ('ACCEPTED', 3, 200))
+        self.assertAlmostEqual(entry['median_seconds'], 200, delta=200 * 0.19)
+
+    def test_impossible_dates_are_rejected(self):
+        admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = reverse('lead-processing-times')
+
+        for params in ({'to': '2024-02-30'}, {'from': '2024-13-01'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.data), list(params))
+        self.assertEqual(self.client.get(url, {'from': '2024-02-01', 'to': '2024-02-29'}).status_code, 200)
+
+
+class ScopedLeadUpdateTests(APITestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(username='exec1', password='password', role='ADM_EXEC')
+        self.other = User.objects.create_user(username='exec2', password='password', role='ADM_EXEC')
+        self.lead = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE', remarks='Called once', assigned_to=self.executive
+        )
+        self.url = reverse('lead-detail', args=[self.lead.pk])
+        self.client.force_authenticate(self.executive)
+
+    def test_scoped_user_cannot_reassign(self):
+        for data in ({'assigned_to': self.other.pk}, {'processing_status': 'FORWARDED'}):
+            response = self.client.patch(self.url, {**data, 'remarks': 'Called twice'}, format='json')
+            self.assertEqual(response.status_code, 403)
+
+        self.lead.refresh_from_db()
+        self.assertEqual((self.lead.assigned_to, self.lead.processing_status), (self.executive, 'PENDING'))
+        self.assertEqual(self.lead.remarks, 'Called once')
+
+    def test_scoped_user_edits_other_fields(self):
+        response = self.client.patch(
+            self.url, {'remarks': 'Called twice', 'assigned_to': self.executive.pk}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.remarks, 'Called twice')
+
+    def test_processing_executive_moves_status_but_not_the_lead(self):
+        processing = User.objects.create_user(username='proc1', password='password', role='PROCESSING')
+        Lead.objects.filter(pk=self.lead.pk).update(processing_status='FORWARDED', processing_executive=processing)
+        self.client.force_authenticate(processing)
+
+        self.assertEqual(self.client.patch(self.url, {'processing_status': 'ACCEPTED'}, format='json').status_code, 200)
+        self.assertEqual(self.client.patch(self.url, {'processing_executive': None}, format='json').status_code, 403)
+        self.lead.refresh_from_db()
+        self.assertEqual((self.lead.processing_status, self.lead.processing_executive), ('ACCEPTED', processing))
+
+    def test_processing_executive_claims_the_unclaimed_lead_they_move(self):
+        first = User.objects.create_user(username='proc1', password='password', role='PROCESSING')
+        second = User.objects.create_user(username='proc2', password='password', role='PROCESSING')
+        Lead.objects.filter(pk=self.lead.pk).update(processing_status='FORWARDED')
+        self.client.force_authenticate(first)
+
+        self.assertEqual(self.client.patch(self.url, {'processing_status': 'ACCEPTED'}, format='json').status_code, 200)
+
+        self.lead.refresh_from_db()
+        self.assertEqual((self.lead.processing_status, self.lead.processing_executive), ('ACCEPTED', first))
+        self.assertEqual(ProcessingUpdate.objects.get(lead=self.lead).processing_executive, first)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.client.force_authenticate(second)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AsyncLeadViewTests(APITestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(username='exec1', password='password', role='ADM_EXEC')
+        other = User.objects.create_user(username='exec2', password='password', role='ADM_EXEC')
+        self.own = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executive)
+        self.other = Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE', assigned_to=other)
+        ProcessingUpdate.objects.create(lead=self.other, status='FORWARDED')
+        User.objects.create_user(username='media', password='password', role='MEDIA')
+        self.headers = self.login('exec1')
+        self.media_headers = self.login('media')
+
+    def login(self, username):
+        response = self.client.post(reverse('login'), {'username': username, 'password': 'password'}, format='json')
+        return {'Authorization': f"Bearer {response.data['access']}"}
+
+    async def test_scoped_user_sees_only_their_leads(self):
+        response = await self.async_client.get(reverse('async-lead-list'), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.own.pk])
+
+        response = await self.async_client.get(reverse('async-lead-detail', args=[self.other.pk]), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(
+            reverse('async-lead-processing-timeline', args=[self.other.pk]), headers=self.headers
+        )
+        self.assertEqual(response.json()['count'], 0)
+
+    async def test_unscoped_role_is_refused(self):
+        response = await self.async_client.get(reverse('async-lead-list'), headers=self.media_headers)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_list_parameters_match_the_sync_view(self):
+        for params in ({'ordering': '-created_at, priority'}, {'priority': 'BOGUS'}, {'priority': 'HIGH'}):
+            response = await self.async_client.get(reverse('async-lead-list'), params, headers=self.headers)
+            expected = await sync_to_async(self.client.get)(reverse('lead-list'), params, headers=self.headers)
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertEqual(response.json(), expected.json(), params)
+
+
+class LeadImporterTests(TestCase):
+    def run_import(self, text, importer=None):
+        importer = importer or LeadImporter()
+        return importer.run(io.StringIO(text), FORMAT_CSV)
+
+    def test_report_covers_every_row(self):
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', email='anjali@example.com')
+
+        result = self.run_import(
+            'name,phone,source,email\n'
+            'Arjun Menon,9847012346,WEBSITE,\n'
+            'Anjali N,9847012345,WEBSITE,\n'
+            'Anju Nair,9847012347,WEBSITE,anjali@example.com\n'
+            'Arjun M,9847012346,WHATSAPP,\n'
+            'Bad Phone,98470,WEBSITE,\n'
+            'Devika Pillai,9847012348,WEBSITE,\n'
+        )
+
+        self.assertEqual(result['summary'], {'accepted': 2, 'duplicate': 3, 'invalid': 1})
+        rows = result['rows']
+        self.assertEqual([(row['row'], row['status']) for row in rows], [
+            (1, 'accepted'), (2, 'duplicate'), (3, 'duplicate'), (4, 'duplicate'), (5, 'invalid'), (6, 'accepted'),
+        ])
+        self.assertEqual([rows[1]['field'], rows[2]['field'], rows[3]['field']], ['phone', 'email', 'phone'])
+        self.assertIn('phone', rows[4]['errors'])
+        self.assertEqual(Lead.objects.get(pk=rows[0]['lead_id']).name, 'Arjun Menon')
+
+    def test_pending_leads_get_no_initial_update(self):
+        result = self.run_import('name,phone,source\nArjun Menon,9847012346,WEBSITE\n')
+
+        # As with LeadCreateView, a PENDING lead has no processing history yet
+        self.assertEqual(result['summary']['accepted'], 1)
+        self.assertFalse(ProcessingUpdate.objects.exists())
+        self.assertFalse(OutboxEvent.objects.filter(aggregate='leads.processingupdate').exists())
+
+    def test_conflicting_insert_is_retried(self):
+        class RacingImporter(LeadImporter):
+            attempts = 0
+
+            def insert_chunk(self, valid):
+                self.attempts += 1
+                if self.attempts == 1:
+                    # Another writer takes the phone after the IN check
+                    Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WHATSAPP')
+                    raise IntegrityError
+                return super().insert_chunk(valid)
+
+        result = self.run_import(
+            'name,phone,source\nArjun Menon,9847012346,WEBSITE\nDevika Pillai,9847012348,WEBSITE\n',
+            RacingImporter(),
+        )
+        self.assertEqual([row['status'] for row in result['rows']], ['duplicate', 'accepted'])
+
+    def test_row_that_keeps_failing_is_reported_alone(self):
+        class FailingImporter(LeadImporter):
+            def insert_chunk(self, valid):
+                if any(data['phone'] == '9847012346' for _, data in valid):
+                    raise IntegrityError('constraint failed')
+                return super().insert_chunk(valid)
+
+        result = self.run_import(
+            'name,phone,source\nArjun Menon,9847012346,WEBSITE\nDevika Pillai,9847012348,WEBSITE\n',
+            FailingImporter(),
+        )
+        self.assertEqual([row['status'] for row in result['rows']], ['invalid', 'accepted'])
+        self.assertEqual(result['rows'][0]['errors'], {'non_field_errors': ['constraint failed']})
+        self.assertTrue(Lead.objects.filter(phone='9847012348').exists())
+
+
+class LeadSearchTests(TestCase):
+    def setUp(self):
+        self.backend = get_search_backend()
+        nursing = Program.resolve('B.Sc Nursing', create=True)
+        self.by_name = Lead.objects.create(name='Meera Nair', phone='9847012345', source='WEBSITE')
+        self.by_email = Lead.objects.create(
+            name='Anjali Pillai', phone='9847012346', source='WEBSITE', email='meera.p@example.com'
+        )
+        self.by_program = Lead.objects.create(name='Arjun Menon', phone='9847012347', source='WEBSITE', program=nursing)
+
+    def search(self, *terms):
+        return list(self.backend.search(Lead.objects.all(), terms).order_by('-search_rank').values_list('id', flat=True))
+
+    def test_backend_is_fts5(self):
+        self.assertIsInstance(self.backend, SQLiteFTSSearchBackend)
+
+    def test_terms_match_prefixes_and_all_must_match(self):
+        self.assertEqual(self.search('nurs'), [self.by_program.pk])
+        self.assertEqual(self.search('9847012346'), [self.by_email.pk])
+        self.assertEqual(self.search('arjun', 'nursing'), [self.by_program.pk])
+        self.assertEqual(self.search('arjun', 'meera'), [])
+
+    def test_name_match_ranks_above_email_match(self):
+        self.assertEqual(self.search('meera'), [self.by_name.pk, self.by_email.pk])
+
+    def test_index_follows_updates_deletes_and_program_renames(self):
+        Lead.objects.filter(pk=self.by_name.pk).update(name='Devika Nair')
+        self.assertEqual(self.search('meera'), [self.by_email.pk])
+        self.assertEqual(self.search('devika'), [self.by_name.pk])
+
+        Program.objects.filter(name='B.Sc Nursing').update(name='GNM')
+        self.assertEqual(self.search('nursing'), [])
+        self.assertEqual(self.search('gnm'), [self.by_program.pk])
+
+        self.by_email.delete()
+        self.assertEqual(self.search('meera'), [])
+
+
+class LeadExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        executive = User.objects.create_user(username='exec1', password='password', role='ADM_EXEC')
+        self.first = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=executive,
+            program=Program.resolve('B.Sc Nursing', create=True),
+        )
+        self.second = Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WHATSAPP')
+        self.url = reverse('lead-export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_skips_conditional_get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, content = self.export(ordering='created_at')
+
+        self.assertNotIn('ETag', response)
+        self.assertFalse([query for query in queries if re.search(r'\b(MAX|COUNT)\(', query['sql'])])
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_csv_has_a_header_and_joined_columns(self):
+        response, content = self.export(ordering='created_at')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('filename="leads.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['id'] for row in rows], [str(self.first.pk), str(self.second.pk)])
+        self.assertEqual(
+            (rows[0]['status'], rows[0]['program'], rows[0]['assigned_to']), ('ENQUIRY', 'B.Sc Nursing', 'exec1')
+        )
+        self.assertEqual((rows[1]['program'], rows[1]['assigned_to']), ('', ''))
+        self.assertEqual(rows[0]['created_at'], self.first.created_at.isoformat())
+
+    def test_ndjson_follows_list_filters(self):
+        response, content = self.export(file_format='ndjson', source='WHATSAPP')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['id'], rows[0]['name'], rows[0]['program']), (self.second.pk, 'Arjun Menon', None))
+
+    def test_unknown_format_is_refused(self):
+        response = self.client.get(self.url, {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file_format', response.data)
+
+
+class LeadFunnelTests(APITestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(username='exec1', password='password', role='ADM_EXEC')
+
+    def assertCountsMatchLeads(self):
+        stored = +funnel.stored_groups()
+        self.assertEqual(stored, +funnel.compute_groups())
+        self.assertEqual(
+            {load.user_id: load.open_leads for load in LeadAssignmentLoad.objects.exclude(open_leads=0)},
+            dict(funnel.compute_loads()),
+        )
+        return stored
+
+    def test_counts_follow_create_update_and_delete(self):
+        lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executive)
+        Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WHATSAPP')
+        stored = self.assertCountsMatchLeads()
+        self.assertEqual(sum(stored.values()), 2)
+        self.assertEqual(LeadAssignmentLoad.objects.get(user=self.executive).open_leads, 1)
+
+        lead.priority = 'HIGH'
+        lead.save()
+        self.assertCountsMatchLeads()
+
+        # Closing the lead takes it off its assignee's open load
+        lead.processing_status = 'COMPLETED'
+        lead.save()
+        self.assertCountsMatchLeads()
+        self.assertEqual(LeadAssignmentLoad.objects.get(user=self.executive).open_leads, 0)
+
+        lead.delete()
+        stored = self.assertCountsMatchLeads()
+        self.assertEqual(sum(stored.values()), 1)
+
+    def test_unchanged_save_writes_no_counts(self):
+        lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        lead.remarks = 'Called once'
+        with CaptureQueriesContext(connection) as queries:
+            lead.save()
+        self.assertNotIn('leads_leadfunnelcount', [statement(query['sql'])[1] for query in queries.captured_queries])
+
+    def test_deleted_assignee_moves_to_unassigned(self):
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executive)
+        self.executive.delete()
+
+        self.assertEqual([key[-1] for key in self.assertCountsMatchLeads()], [funnel.UNASSIGNED])
+
+    def test_dashboard_reads_the_summary(self):
+        admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.client.force_authenticate(admin)
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executive)
+        Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE')
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('lead-funnel'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual((response.data['source'], response.data['status']), ({'WEBSITE': 2}, {'ENQUIRY': 2}))
+        self.assertCountEqual(
+            [(row['username'], row['count']) for row in response.data['assigned_to']], [('exec1', 1), (None, 1)]
+        )
+
+
+class LeadBulkTransitionTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.processing = User.objects.create_user(username='proc1', password='password', role='PROCESSING')
+        registered = LeadStatus.resolve('REGISTERED', create=True)
+        self.registered = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', status=registered)
+        self.enquiry = Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE')
+        self.forwarded = Lead.objects.create(
+            name='Devika Pillai', phone='9847012347', source='WEBSITE', status=registered, processing_status='FORWARDED'
+        )
+        self.url = reverse('lead-bulk-transition')
+
+    def test_eligible_leads_move_and_the_rest_are_reported(self):
+        missing = self.forwarded.pk + 100
+        response = self.client.post(self.url, {
+            'lead_ids': [self.registered.pk, self.enquiry.pk, self.forwarded.pk, missing, self.registered.pk],
+            'processing_status': 'FORWARDED',
+            'processing_executive': self.processing.pk,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [self.registered.pk])
+        self.assertEqual(response.data['skipped'], [
+            {'id': self.enquiry.pk, 'reason': transitions.SKIP_NOT_ALLOWED, 'processing_status': 'PENDING'},
+            {'id': self.forwarded.pk, 'reason': transitions.SKIP_ALREADY_IN_STATUS, 'processing_status': 'FORWARDED'},
+            {'id': missing, 'reason': transitions.SKIP_NOT_FOUND, 'processing_status': None},
+        ])
+
+        self.registered.refresh_from_db()
+        self.assertEqual(
+            (self.registered.processing_status, self.registered.processing_executive), ('FORWARDED', self.processing)
+        )
+        update = ProcessingUpdate.objects.get()
+        self.assertEqual(
+            (update.lead_id, update.status, update.changed_by, update.processing_executive),
+            (self.registered.pk, 'FORWARDED', self.admin, self.processing),
+        )
+        self.assertEqual(+funnel.stored_groups(), +funnel.compute_groups())
+        self.assertTrue(OutboxEvent.objects.filter(
+            aggregate='leads.lead', aggregate_id=self.registered.pk, event_type=OutboxEvent.UPDATED
+        ).exists())
+
+    def test_sql_eligibility_matches_the_model_properties(self):
+        properties = {'FORWARDED': 'is_forwardable', 'ACCEPTED': 'is_acceptable', 'COMPLETED': 'is_completable'}
+        leads = [self.registered, self.enquiry, self.forwarded]
+        for index, (processing_status, executive) in enumerate([('PROCESSING', self.processing), ('PROCESSING', None)]):
+            leads.append(Lead.objects.create(
+                name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE',
+                processing_status=processing_status, processing_executive=executive,
+            ))
+
+        for target, name in properties.items():
+            eligible = set(Lead.objects.filter(Lead.TRANSITION_CONDITIONS[target]).values_list('id', flat=True))
+            self.assertEqual(eligible, {lead.pk for lead in leads if getattr(lead, name)}, target)
+
+    def test_unsupported_target_is_refused(self):
+        response = self.client.post(
+            self.url, {'lead_ids': [self.registered.pk], 'processing_status': 'PENDING'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('processing_status', response.data)
+
+
+class LeadDedupTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_blocking_finds_each_kind_of_duplicate(self):
+        phone = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        phone_copy = Lead.objects.create(name='Anjali N', phone='+91 98470 12345', source='WHATSAPP')
+        email = Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE', email='arjun@example.com')
+        email_copy = Lead.objects.create(name='A Menon', phone='9847099999', source='WEBSITE', email='Arjun@Example.com ')
+        name = Lead.objects.create(name='Devika Pillai', phone='9847055555', source='WEBSITE')
+        name_copy = Lead.objects.create(name='Devica Pilai', phone='8847055555', source='WEBSITE')
+        Lead.objects.create(name='Meera Das', phone='9847077777', source='WEBSITE')
+
+        clusters, pairs = dedup.find_clusters()
+        self.assertEqual(clusters, [[phone.pk, phone_copy.pk], [email.pk, email_copy.pk], [name.pk, name_copy.pk]])
+        self.assertEqual(pairs, {
+            (phone.pk, phone_copy.pk): dedup.REASON_PHONE,
+            (email.pk, email_copy.pk): dedup.REASON_EMAIL,
+            (name.pk, name_copy.pk): dedup.REASON_NAME_PHONE,
+        })
+        # Saving recorded the same pairs incrementally
+        self.assertEqual(
+            set(DuplicateCandidate.objects.values_list('lead_id', 'candidate_id', 'reason')),
+            {(*pair, reason) for pair, reason in pairs.items()},
+        )
+        self.assertCountEqual(dedup.candidate_clusters(), clusters)
+
+    def test_merge_moves_history_and_fills_blanks(self):
+        primary = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        duplicate = Lead.objects.create(
+            name='Anjali N', phone='+91 98470 12345', source='WHATSAPP', email='anjali@example.com'
+        )
+        self.client.patch(reverse('lead-detail', args=[duplicate.pk]), {'remarks': 'Asked about fees'}, format='json')
+        self.client.patch(reverse('lead-detail', args=[duplicate.pk]), {'remarks': 'Visiting Monday'}, format='json')
+        update = ProcessingUpdate.objects.create(lead=duplicate, status='FORWARDED')
+
+        response = self.client.post(
+            reverse('lead-merge', args=[primary.pk]), {'duplicate_ids': [duplicate.pk, primary.pk]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['merged_ids'], [duplicate.pk])
+        self.assertFalse(Lead.objects.filter(pk=duplicate.pk).exists())
+        primary.refresh_from_db()
+        self.assertEqual((primary.email, primary.remarks), ('anjali@example.com', 'Visiting Monday'))
+        self.assertEqual(ProcessingUpdate.objects.get(pk=update.pk).lead_id, primary.pk)
+        self.assertFalse(DuplicateCandidate.objects.exists())
+
+        history = list(RemarkHistory.objects.filter(lead=primary).order_by('version'))
+        remarks.materialize(history)
+        self.assertEqual([(row.version, row.previous_remarks, row.new_remarks) for row in history], [
+            (1, None, 'Asked about fees'),
+            (2, 'Asked about fees', 'Visiting Monday'),
+            (3, None, 'Visiting Monday'),
+        ])
+        self.assertEqual(+funnel.stored_groups(), +funnel.compute_groups())
+
+    def test_merge_without_duplicates_is_refused(self):
+        primary = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        response = self.client.post(reverse('lead-merge', args=[primary.pk]), {'duplicate_ids': [primary.pk + 1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class LeadAssignmentTests(APITestCase):
+    def setUp(self):
+        self.executives = [
+            User.objects.create_user(username=f'exec{index}', password='password', role='ADM_EXEC', team=team)
+            for index, team in enumerate(['north', 'north', 'south'])
+        ]
+        User.objects.create_user(username='proc1', password='password', role='PROCESSING')
+        User.objects.create_user(username='gone', password='password', role='ADM_EXEC', is_active=False)
+
+    def assign_new(self, count, strategy):
+        leads = [Lead() for _ in range(count)]
+        assignment.assign(leads, strategy)
+        return [lead.assigned_to_id for lead in leads]
+
+    def test_lock_loads_covers_active_admission_users(self):
+        loads = assignment.lock_loads()
+
+        self.assertEqual([load.user_id for load in loads], [user.pk for user in self.executives])
+        self.assertEqual([load.team for load in loads], ['north', 'north', 'south'])
+        self.assertEqual(LeadAssignmentLoad.objects.count(), 3)
+
+    def test_round_robin_continues_across_calls(self):
+        ids = [user.pk for user in self.executives]
+        self.assertEqual(self.assign_new(2, assignment.STRATEGY_ROUND_ROBIN), ids[:2])
+        self.assertEqual(self.assign_new(4, assignment.STRATEGY_ROUND_ROBIN), [ids[2], ids[0], ids[1], ids[2]])
+
+    def test_least_open_fills_the_lightest_load_first(self):
+        busy = self.executives[0]
+        for index in range(2):
+            Lead.objects.create(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE', assigned_to=busy)
+
+        picks = Counter(self.assign_new(4, assignment.STRATEGY_LEAST_OPEN))
+        self.assertEqual(picks, {self.executives[1].pk: 2, self.executives[2].pk: 2})
+
+    @override_settings(LEAD_ASSIGNMENT_TEAM_WEIGHTS={'north': 3, 'south': 1})
+    def test_weighted_team_splits_by_weight(self):
+        picks = self.assign_new(8, assignment.STRATEGY_WEIGHTED_TEAM)
+
+        teams = Counter(User.objects.get(pk=user_id).team for user_id in picks)
+        self.assertEqual(teams, {'north': 6, 'south': 2})
+
+    def test_bulk_assign_skips_assigned_leads(self):
+        admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.client.force_authenticate(admin)
+        assigned = Lead.objects.create(
+            name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executives[0]
+        )
+        unassigned = [
+            Lead.objects.create(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE')
+            for index in range(2)
+        ]
+
+        response = self.client.post(reverse('lead-bulk-assign'), {
+            'lead_ids': [assigned.pk, *(lead.pk for lead in unassigned)], 'strategy': assignment.STRATEGY_LEAST_OPEN,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned_ids'], [lead.pk for lead in unassigned])
+        self.assertEqual(response.data['skipped_ids'], [assigned.pk])
+        self.assertEqual(
+            set(Lead.objects.filter(pk__in=response.data['assigned_ids']).values_list('assigned_to', flat=True)),
+            {self.executives[1].pk, self.executives[2].pk},
+        )
+        self.assertEqual(+funnel.stored_groups(), +funnel.compute_groups())
+        self.assertEqual(
+            {load.user_id: load.open_leads for load in LeadAssignmentLoad.objects.all()},
+            {user.pk: 1 for user in self.executives},
+        )
+
+
+class LeadActivityFeedTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        self.other = Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE')
+        self.start = timezone.now() - datetime.timedelta(days=1)
+
+    def at(self, minutes):
+        return self.start + datetime.timedelta(minutes=minutes)
+
+    def add_update(self, lead, status, minutes):
+        update = ProcessingUpdate.objects.create(lead=lead, status=status, changed_by=self.admin)
+        ProcessingUpdate.objects.filter(pk=update.pk).update(timestamp=self.at(minutes))
+        return ('processing_update', update.pk)
+
+    def add_remark(self, lead, text, minutes):
+        self.client.patch(reverse('lead-detail', args=[lead.pk]), {'remarks': text}, format='json')
+        row = RemarkHistory.objects.filter(lead=lead).latest('version')
+        RemarkHistory.objects.filter(pk=row.pk).update(changed_at=self.at(minutes))
+        return ('remark', row.pk)
+
+    def read_feed(self, url):
+        items = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            items.extend(response.data['results'])
+            url = response.data['next']
+        return items
+
+    def test_lead_feed_merges_sources_newest_first(self):
+        first = self.add_update(self.lead, 'FORWARDED', 0)
+        called = self.add_remark(self.lead, 'Called once', 5)
+        accepted = self.add_update(self.lead, 'ACCEPTED', 10)
+        # Same time as the update: the remark source sorts first
+        again = self.add_remark(self.lead, 'Called twice', 10)
+        self.add_update(self.other, 'FORWARDED', 7)
+
+        items = self.read_feed(reverse('lead-activity', args=[self.lead.pk]) + '?page_size=2')
+
+        self.assertEqual([(item['type'], item['id']) for item in items], [again, accepted, called, first])
+        self.assertEqual(items[0]['details'], {'previous_remarks': 'Called once', 'new_remarks': 'Called twice'})
+        self.assertEqual(items[1]['details'], {'status': 'ACCEPTED', 'notes': ''})
+        self.assertEqual(items[1]['changed_by_name'], 'admin')
+
+    def test_global_feed_pages_cost_one_query_per_source(self):
+        self.add_update(self.lead, 'FORWARDED', 0)
+        self.add_remark(self.lead, 'Called once', 5)
+        self.add_update(self.other, 'FORWARDED', 7)
+
+        # Processing updates, remark rows and the remark chain they decode from
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('lead-activity-all'))
+
+        self.assertEqual([item['lead'] for item in response.data['results']], [self.other.pk, self.lead.pk, self.lead.pk])
+
+
+def whatsapp_payload(phone, name, text):
+    return {'entry': [{'changes': [{'value': {
+        'contacts': [{'wa_id': phone, 'profile': {'name': name}}],
+        'messages': [{'from': phone, 'text': {'body': text}}],
+    }}]}]}
+
+
+@override_settings(LEAD_WEBHOOK_SECRET='webhook-secret')
+class LeadWebhookTests(APITestCase):
+    def post(self, source, payload, token='webhook-secret'):
+        return self.client.post(
+            reverse('lead-webhook', args=[source]), payload, format='json', HTTP_X_WEBHOOK_TOKEN=token
+        )
+
+    def test_webhook_only_queues_the_payload(self):
+        payload = whatsapp_payload('919847012345', 'Anjali Nair', 'Fees for nursing?')
+
+        with self.assertNumQueries(1):
+            response = self.post('whatsapp', payload)
+
+        self.assertEqual(response.status_code, 202)
+        event = LeadIngestEvent.objects.get(pk=response.data['event_id'])
+        self.assertEqual((event.source, event.payload, event.processed_at), ('WHATSAPP', payload, None))
+        self.assertFalse(Lead.objects.exists())
+
+    def test_bad_token_and_unknown_source_are_refused(self):
+        self.assertEqual(self.post('whatsapp', {}, token='wrong').status_code, 403)
+        self.assertEqual(self.post('telegram', {}).status_code, 404)
+        self.assertFalse(LeadIngestEvent.objects.exists())
+
+    def test_drain_creates_then_updates_leads(self):
+        self.post('whatsapp', whatsapp_payload('919847012345', 'Anjali Nair', 'Fees for nursing?'))
+        self.post('instagram', {'field_data': [
+            {'name': 'full_name', 'values': ['Arjun Menon']},
+            {'name': 'phone_number', 'values': ['+91 98470 12346']},
+            {'name': 'course', 'values': ['B.Sc Nursing']},
+        ]})
+        self.post('automation', {'name': 'No Phone'})
+
+        self.assertEqual(ingest.drain(), 3)
+
+        anjali = Lead.objects.get(phone='919847012345')
+        self.assertEqual((anjali.name, anjali.source, anjali.remarks), ('Anjali Nair', 'WHATSAPP', 'Fees for nursing?'))
+        arjun = Lead.objects.get(phone='919847012346')
+        self.assertEqual((arjun.name, arjun.program.name), ('Arjun Menon', 'B.Sc Nursing'))
+        events = list(LeadIngestEvent.objects.order_by('id'))
+        self.assertTrue(all(event.processed_at for event in events))
+        self.assertEqual([event.lead_id for event in events], [anjali.pk, arjun.pk, None])
+        self.assertEqual(events[2].error, "No contact with a valid phone number.")
+        self.assertEqual(+funnel.stored_groups(), +funnel.compute_groups())
+
+        # A repeat message from the same number updates the lead instead
+        self.post('whatsapp', whatsapp_payload('919847012345', 'Anjali', 'Visiting Monday'))
+        self.assertEqual(ingest.drain(), 1)
+        self.assertEqual(ingest.drain(), 0)
+
+        anjali.refresh_from_db()
+        self.assertEqual((anjali.name, anjali.remarks), ('Anjali Nair', 'Visiting Monday'))
+        history = RemarkHistory.objects.get(lead=anjali)
+        self.assertEqual((history.previous_remarks, history.new_remarks), ('Fees for nursing?', 'Visiting Monday'))
+        self.assertEqual(Lead.objects.count(), 2)
+
+
+class LeadArchiveTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        long_ago = timezone.now() - datetime.timedelta(days=120)
+        self.closed = [
+            Lead.objects.create(
+                name=f'Closed {index}', phone=f'984701300{index}', source='WEBSITE', processing_status='COMPLETED'
+            )
+            for index in range(3)
+        ]
+        self.recent = Lead.objects.create(
+            name='Recent Lead', phone='9847013010', source='WEBSITE', processing_status='REJECTED'
+        )
+        self.open = Lead.objects.create(name='Open Lead', phone='9847013011', source='WEBSITE')
+        Lead.objects.filter(pk__in=[lead.pk for lead in (*self.closed, self.open)]).update(processing_status_date=long_ago)
+
+        self.lead = self.closed[0]
+        self.client.patch(reverse('lead-detail', args=[self.lead.pk]), {'remarks': 'Joined the course'}, format='json')
+        ProcessingUpdate.objects.create(lead=self.lead, status='COMPLETED', changed_by=self.admin)
+
+    def test_closed_leads_move_with_their_history(self):
+        groups = funnel.stored_groups()
+
+        self.assertEqual(archive.archive_closed_leads(90, batch_size=2), 3)
+
+        closed_ids = [lead.pk for lead in self.closed]
+        self.assertFalse(Lead.objects.filter(pk__in=closed_ids).exists())
+        self.assertEqual(sorted(ArchivedLead.objects.values_list('id', flat=True)), closed_ids)
+        self.assertEqual(set(Lead.objects.values_list('id', flat=True)), {self.recent.pk, self.open.pk})
+        self.assertFalse(ProcessingUpdate.objects.filter(lead_id=self.lead.pk).exists())
+        self.assertFalse(RemarkHistory.objects.filter(lead_id=self.lead.pk).exists())
+        # Archived leads keep counting in the funnel
+        self.assertEqual(funnel.stored_groups(), groups)
+        self.assertEqual(+groups, +funnel.compute_groups())
+        archived = OutboxEvent.objects.filter(event_type=OutboxEvent.ARCHIVED)
+        self.assertCountEqual(archived.filter(aggregate='leads.lead').values_list('aggregate_id', flat=True), closed_ids)
+        self.assertCountEqual(
+            archived.filter(aggregate='leads.processingupdate').values_list('aggregate_id', flat=True),
+            ArchivedProcessingUpdate.objects.values_list('id', flat=True),
+        )
+        self.assertFalse(archived.filter(aggregate='leads.remarkhistory').exists())
+
+        response = self.client.get(reverse('archived-lead-detail', args=[self.lead.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([update['status'] for update in response.data['processing_updates']], ['COMPLETED'])
+        self.assertEqual(
+            [(row['previous_remarks'], row['new_remarks']) for row in response.data['remark_history']],
+            [(None, 'Joined the course')],
+        )
+
+    def test_limit_caps_a_run(self):
+        self.assertEqual(archive.archive_closed_leads(90, batch_size=2, limit=1), 1)
+        self.assertEqual(ArchivedLead.objects.count(), 1)
+
+    def test_list_can_include_archived_leads(self):
+        archive.archive_closed_leads(90)
+
+        response = self.client.get(reverse('lead-list'), {'include_archived': 'true', 'page_size': 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        archived = {row['id'] for row in response.data['results'] if row['archived']}
+        self.assertEqual(archived, {lead.pk for lead in self.closed})
+        self.assertEqual(self.client.get(reverse('lead-list')).data['count'], 2)
+
+
+class RecordingSink:
+    """Outbox sink that keeps what it is sent, failing the first ``failures`` sends."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def send(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise SinkError("sink unavailable")
+        self.batches.append([event['id'] for event in events])
+
+
+class OutboxTests(TestCase):
+    def lead_events(self, lead_id):
+        return list(
+            OutboxEvent.objects.filter(aggregate='leads.lead', aggregate_id=lead_id).values_list('event_type', 'payload')
+        )
+
+    def test_lead_writes_record_one_event_each(self):
+        lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        lead.save()
+        lead.priority = 'HIGH'
+        lead.save()
+        lead_id = lead.pk
+        lead.delete()
+
+        (created, payload), *rest = self.lead_events(lead_id)
+        self.assertEqual((created, payload['name'], payload['status']), (OutboxEvent.CREATED, 'Anjali Nair', 'ENQUIRY'))
+        self.assertEqual([event_type for event_type, _ in rest], [OutboxEvent.UPDATED, OutboxEvent.DELETED])
+        self.assertEqual(set(rest[0][1]), {'priority', 'updated_at'})
+        self.assertEqual(rest[1][1], {})
+
+    def test_rolled_back_write_records_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+            raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_batch_inserts_once_and_only_on_success(self):
+        leads = Lead.objects.bulk_create([
+            Lead(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE') for index in range(3)
+        ])
+
+        with self.assertNumQueries(1), outbox.batch():
+            outbox.record_created(leads[:2])
+            outbox.record_updated(Lead, [leads[2].pk], {'priority': 'HIGH'})
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+
+        with self.assertRaises(RuntimeError), outbox.batch():
+            outbox.record_created(leads)
+            raise RuntimeError
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+
+    def test_relay_moves_the_offset_batch_by_batch(self):
+        Lead.objects.bulk_create([
+            Lead(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE') for index in range(3)
+        ])
+        outbox.record_created(Lead.objects.order_by('id'))
+        ids = list(OutboxEvent.objects.values_list('id', flat=True))
+        sink = RecordingSink()
+
+        self.assertEqual(relay.relay_batch('test', sink, batch_size=2), 2)
+        self.assertEqual(relay.relay_batch('test', sink, batch_size=2), 1)
+        self.assertEqual(relay.relay_batch('test', sink, batch_size=2), 0)
+        self.assertEqual(sink.batches, [ids[:2], ids[2:]])
+        self.assertEqual(RelayOffset.objects.get(sink='test').last_event_id, ids[-1])
+
+    def test_failed_send_is_retried_and_keeps_the_offset(self):
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        event_id = OutboxEvent.objects.get().id
+
+        with self.assertRaises(SinkError):
+            relay.relay_batch('test', RecordingSink(failures=2), retries=1, backoff=0)
+        self.assertFalse(RelayOffset.objects.filter(sink='test', last_event_id__gt=0).exists())
+
+        sink = RecordingSink(failures=1)
+        self.assertEqual(relay.relay_batch('test', sink, retries=1, backoff=0), 1)
+        self.assertEqual(sink.batches, [[event_id]])
+        self.assertEqual(RelayOffset.objects.get(sink='test').last_event_id, event_id)
+
+    def test_relay_sends_events_committed_behind_the_offset(self):
+        Lead.objects.bulk_create([
+            Lead(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE') for index in range(3)
+        ])
+        outbox.record_created(Lead.objects.order_by('id'))
+        first, late, last = OutboxEvent.objects.all()
+        # Not committed yet when the relay runs
+        OutboxEvent.objects.filter(pk=late.pk).delete()
+        sink = RecordingSink()
+
+        self.assertEqual(relay.relay_batch('test', sink), 2)
+        self.assertEqual(list(RelayOffset.objects.get(sink='test').gaps), [str(late.id)])
+
+        OutboxEvent.objects.bulk_create([late])
+        self.assertEqual(relay.relay_batch('test', sink), 1)
+        self.assertEqual(relay.relay_batch('test', sink), 0)
+        self.assertEqual(sink.batches, [[first.id, last.id], [late.id]])
+        offset = RelayOffset.objects.get(sink='test')
+        self.assertEqual((offset.last_event_id, offset.gaps), (last.id, {}))
+
+    def test_relay_gives_up_on_a_rolled_back_id(self):
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+        event_id = OutboxEvent.objects.get().id
+        long_ago = timezone.now() - datetime.timedelta(hours=2)
+        RelayOffset.objects.create(sink='test', last_event_id=event_id, gaps={str(event_id - 1): long_ago.isoformat()})
+
+        with self.assertLogs('outbox.relay', 'WARNING') as logs:
+            self.assertEqual(relay.relay_batch('test', RecordingSink()), 0)
+        self.assertIn(str(event_id - 1), logs.output[0])
+        self.assertEqual(RelayOffset.objects.get(sink='test').gaps, {})
+
+    @override_settings(OUTBOX_SINKS={'first': {}, 'second': {}})
+    def test_prune_waits_for_every_sink(self):
+        Lead.objects.bulk_create([
+            Lead(name=f'Lead {index}', phone=f'984701300{index}', source='WEBSITE') for index in range(3)
+        ])
+        outbox.record_created(Lead.objects.order_by('id'))
+        ids = list(OutboxEvent.objects.values_list('id', flat=True))
+        OutboxEvent.objects.update(created_at=timezone.now() - datetime.timedelta(days=10))
+
+        RelayOffset.objects.create(sink='first', last_event_id=ids[-1])
+        self.assertEqual(relay.prune(7), 0)
+
+        RelayOffset.objects.create(sink='second', last_event_id=ids[0])
+        self.assertEqual(relay.prune(7), 1)
+        self.assertEqual(list(OutboxEvent.objects.values_list('id', flat=True)), ids[1:])
+
+
+class RemarkDeltaChainTests(TestCase):
+    def setUp(self):
+        self.lead = Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE')
+
+    def edits(self, count):
+        """``count`` (previous, new) pairs: appends, mid-text edits, clears and one out-of-chain previous."""
+        edits, text = [], None
+        for index in range(count):
+            if index % 7 == 3:
+                new = None
+            elif index % 5 == 2 and text:
+                new = text[:len(text) // 2] + f'<edit {index}>' + text[len(text) // 2:]
+            else:
+                new = (text or '') + f' note {index}'
+            previous = 'edited elsewhere' if index == 20 else text
+            edits.append((previous, new))
+            text = new
+        return edits
+
+    def test_chain_decodes_to_the_encoded_edits(self):
+        edits = self.edits(40)
+        chain = list(deltas.encode_chain(edits))
+
+        self.assertEqual(list(deltas.decode_chain((p, n) for _, p, n in chain)), edits)
+        # Every checkpoint is self-contained, so decoding can start there
+        start = deltas.CHECKPOINT_INTERVAL * 2
+        self.assertTrue(deltas.self_contained(chain[start][1]))
+        self.assertEqual(list(deltas.decode_chain((p, n) for _, p, n in chain[start:])), edits[start:])
+
+    def test_diff_handles_repeated_characters(self):
+        for base, value in (('aaa', 'aaaa'), ('abcabc', 'abc'), ('', 'x'), ('same', 'same'), (None, 'text')):
+            self.assertEqual(deltas.patch(base, deltas.diff(base, value)), value)
+
+    def write_history(self, edits):
+        RemarkHistory.objects.bulk_create([
+            RemarkHistory(lead=self.lead, previous_remarks=previous, new_remarks=new) for previous, new in edits
+        ])
+
+    def test_stored_version_is_rebuilt_from_its_checkpoint(self):
+        edits = self.edits(40)
+        self.write_history(edits[:25])
+        # Appending reads only the chain tail
+        self.write_history(edits[25:])
+        row = RemarkHistory.objects.get(lead=self.lead, version=38)
+
+        with CaptureQueriesContext(connection) as queries:
+            remarks.materialize([row])
+
+        self.assertEqual((row.previous_remarks, row.new_remarks), edits[37])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"version" >= 33', queries[0]['sql'])
+
+    def test_chain_written_under_another_interval_is_still_read(self):
+        edits = self.edits(24)
+        with mock.patch.object(deltas, 'CHECKPOINT_INTERVAL', 5):
+            self.write_history(edits[:20])
+        self.write_history(edits[20:])
+
+        # Version 17 is a checkpoint now but was not when written
+        rows = list(RemarkHistory.objects.filter(lead=self.lead, version__in=[18, 22]).order_by('version'))
+        remarks.materialize(rows)
+        self.assertEqual([(row.previous_remarks, row.new_remarks) for row in rows], [edits[17], edits[21]])
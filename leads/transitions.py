@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import BooleanField, Case, Value, When
+from django.utils import timezone
+
+from outbox import events as outbox
+
+from . import cache, funnel
+from .models import Lead, ProcessingUpdate
+
+
+MAX_BULK_TRANSITION = 1000
+
+SKIP_NOT_FOUND = 'not_found'
+SKIP_ALREADY_IN_STATUS = 'already_in_status'
+SKIP_NOT_ALLOWED = 'transition_not_allowed'
+
+
+def bulk_transition(lead_ids, target, changed_by=None, executive=None, notes=''):
+    """
+    Move many leads to ``target`` processing status in one statement.
+
+    Eligibility (``Lead.TRANSITION_CONDITIONS``) is evaluated by the database:
+    one locking SELECT reads every requested lead with an ``eligible`` flag,
+    a single UPDATE repeats the same condition in its WHERE clause, and the
+    ProcessingUpdate rows are written with one ``bulk_create``.
+
+    Returns ``(updated_ids, skipped)`` where ``skipped`` is a list of
+    ``{'id', 'reason', 'processing_status'}`` dicts.
+    """
+    condition = Lead.TRANSITION_CONDITIONS[target]
+    lead_ids = list(dict.fromkeys(lead_ids))
+    now = timezone.now()
+
+    changes = {'processing_status': target, 'processing_status_date': now, 'updated_at': now}
+    if executive is not None:
+        changes['processing_executive'] = executive
+    if notes:
+        changes['processing_notes'] = notes
+
+    with transaction.atomic():
+        rows = list(
+            Lead.objects.select_for_update()
+            .filter(id__in=lead_ids)
+            .annotate(eligible=Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField()))
+            .order_by()
+            .values('id', 'eligible', 'processing_executive', *funnel.FUNNEL_FIELDS)
+        )
+        eligible = [row for row in rows if row['eligible']]
+        updated_ids = [row['id'] for row in eligible]
+        executive_id = executive.pk if executive is not None else None
+
+        if updated_ids:
+            Lead.objects.filter(condition, id__in=updated_ids).update(**changes)
+            updates = ProcessingUpdate.objects.bulk_create([
+                ProcessingUpdate(
+                    lead_id=row['id'],
+                    status=target,
+                    changed_by=changed_by,
+                    processing_executive_id=executive_id or row['processing_executive'],
+                    notes=notes or "Bulk status update",
+                )
+                for row in eligible
+            ])
+            # QuerySet.update() sends no post_save, so move the funnel counts here
+            funnel.record_moved(eligible, {'processing_status': target})
+            outbox.record_updated(Lead, updated_ids, changes)
+            outbox.record_created(updates)
+            cache.invalidate(Lead._meta.db_table)
+
+    found = {row['id']: row for row in rows}
+    skipped = []
+    for lead_id in lead_ids:
+        row = found.get(lead_id)
+        if row is None:
+            skipped.append({'id': lead_id, 'reason': SKIP_NOT_FOUND, 'processing_status': None})
+        elif not row['eligible']:
+            reason = SKIP_ALREADY_IN_STATUS if row['processing_status'] == target else SKIP_NOT_ALLOWED
+            skipped.append({'id': lead_id, 'reason': reason, 'processing_status': row['processing_status']})
+
+    return updated_ids, skipped
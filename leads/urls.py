@@ -1,20 +1,77 @@
 from django.urls import path
+from .async_views import AsyncLeadListView, AsyncLeadDetailView, AsyncLeadProcessingTimelineView
 from .views import (
     LeadListView,
+    LeadExportView,
     LeadCreateView,
+    LeadBulkImportView,
+    LeadWebhookView,
+    LeadBulkTransitionView,
+    LeadBulkAssignView,
     LeadDetailView,
-    LeadProcessingTimelineView
+    LeadDuplicatesView,
+    LeadMergeView,
+    ArchivedLeadListView,
+    ArchivedLeadDetailView,
+    LeadProcessingTimelineView,
+    LeadActivityFeedView,
+    LeadFunnelView,
+    ProcessingTimeMetricsView,
+    LeadListCacheStatsView
 )
 
 urlpatterns = [
     path('leads/', LeadListView.as_view(), name='lead-list'),
 
+    # Stream filtered leads as CSV/NDJSON
+    path('leads/export/', LeadExportView.as_view(), name='lead-export'),
+
     # Create a new lead
     path('leads/create/', LeadCreateView.as_view(), name='lead-create'),
 
+    # Bulk import leads from a CSV/JSONL upload
+    path('leads/import/', LeadBulkImportView.as_view(), name='lead-bulk-import'),
+
+    # WhatsApp/Instagram/automation webhooks, queued for process_lead_webhooks
+    path('leads/webhooks/<str:source>/', LeadWebhookView.as_view(), name='lead-webhook'),
+
+    # Move many leads to a new processing status at once
+    path('leads/bulk-transition/', LeadBulkTransitionView.as_view(), name='lead-bulk-transition'),
+
+    # Assign unassigned leads across the admission team
+    path('leads/bulk-assign/', LeadBulkAssignView.as_view(), name='lead-bulk-assign'),
+
+    # Clusters of possible duplicate leads
+    path('leads/duplicates/', LeadDuplicatesView.as_view(), name='lead-duplicates'),
+
+    # Read-only access to archived (closed) leads and their history
+    path('leads/archive/', ArchivedLeadListView.as_view(), name='archived-lead-list'),
+    path('leads/archive/<int:pk>/', ArchivedLeadDetailView.as_view(), name='archived-lead-detail'),
+
     # Retrieve, update, or delete a specific lead
     path('leads/<int:pk>/', LeadDetailView.as_view(), name='lead-detail'),
 
+    # Merge duplicate leads into this one
+    path('leads/<int:pk>/merge/', LeadMergeView.as_view(), name='lead-merge'),
+
     # Get the processing timeline for a specific lead
     path('leads/<int:lead_id>/timeline/', LeadProcessingTimelineView.as_view(), name='lead-processing-timeline'),
+
+    # Processing updates and remark edits in one feed, per lead or for all leads
+    path('leads/<int:lead_id>/activity/', LeadActivityFeedView.as_view(), name='lead-activity'),
+    path('leads/activity/', LeadActivityFeedView.as_view(), name='lead-activity-all'),
+
+    # Lead counts per funnel dimension from the summary table
+    path('leads/analytics/funnel/', LeadFunnelView.as_view(), name='lead-funnel'),
+
+    # Time spent in each processing stage from the daily rollups
+    path('leads/analytics/processing-times/', ProcessingTimeMetricsView.as_view(), name='lead-processing-times'),
+
+    # Hit/miss counts of the lead list response cache
+    path('leads/analytics/list-cache/', LeadListCacheStatsView.as_view(), name='lead-list-cache'),
+
+    # Native async variants for ASGI deployments
+    path('async/leads/', AsyncLeadListView.as_view(), name='async-lead-list'),
+    path('async/leads/<int:pk>/', AsyncLeadDetailView.as_view(), name='async-lead-detail'),
+    path('async/leads/<int:lead_id>/timeline/', AsyncLeadProcessingTimelineView.as_view(), name='async-lead-processing-timeline'),
 ]
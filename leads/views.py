@@ -1,60 +1,194 @@
-from rest_framework import generics, filters, status
-from rest_framework.permissions import IsAdminUser
-from rest_framework.pagination import PageNumberPagination
-from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, status
+from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Count, Max, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+import datetime
 
-from .models import Lead, ProcessingUpdate
+from backend.mixins import ConditionalGetMixin
+from users.models import User
+from . import assignment, cache, dedup, funnel, ingest, metrics, remarks
+from .models import ArchivedLead, DuplicateCandidate, Lead, ProcessingUpdate
+from .permissions import CanAccessLeads, CanCreateLead, has_full_lead_access, lead_scope, lead_scope_key
+from .transitions import bulk_transition
+from .importers import LeadImporter, IMPORT_FORMATS, detect_format
+from .exporters import EXPORT_FORMATS, FORMAT_CSV, stream_export
+from .activity import ActivityFeed
+from .pagination import ActivityFeedPagination, LeadPagination, LeadKeysetPagination
+from .filters import LeadFilterBackend, LeadSearchFilter, LeadOrderingFilter
+from .renderers import FastJSONRenderer
 from .serializers import (
     LeadListSerializer,
     LeadDetailSerializer,
+    ScopedLeadDetailSerializer,
     LeadCreateSerializer,
+    LeadBulkTransitionSerializer,
+    LeadBulkAssignSerializer,
+    LeadMergeSerializer,
+    ActivitySerializer,
+    ArchivedLeadSerializer,
+    ArchivedLeadDetailSerializer,
     ProcessingUpdateSerializer
 )
 
 
-# ------------------------- Pagination -------------------------
-class LeadPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 # ------------------------- Lead List View -------------------------
-class LeadListView(generics.ListAPIView):
-    queryset = Lead.objects.all().distinct()
+class LeadListView(cache.ResponseCacheMixin, ConditionalGetMixin, generics.ListAPIView):
+    queryset = Lead.objects.all()
+    cache_table = Lead._meta.db_table
     serializer_class = LeadListSerializer
-    permission_classes = [IsAdminUser]
+    permission_classes = [CanAccessLeads]
     pagination_class = LeadPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     filter_backends = [
-        DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter
+        LeadFilterBackend,
+        LeadSearchFilter,
+        LeadOrderingFilter
     ]
 
-    filterset_fields = [
-        'priority',
-        'status',
-        'source',
-        'processing_status',
-        'assigned_to',
-    ]
-    search_fields = ['name', 'phone', 'email', 'program']
+    search_fields = ['name', 'phone', 'email', 'program__name']
     ordering_fields = ['created_at', 'priority']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        # Scoped roles only see their own slice (leads.permissions)
+        return super().get_queryset().filter(lead_scope(self.request.user))
+
+    def get_cache_scope(self):
+        return lead_scope_key(self.request.user)
+
+    def include_archived(self):
+        return self.request.query_params.get('include_archived', '').lower() in ('true', '1')
+
+    @property
+    def paginator(self):
+        """
+        Page-number pagination by default; ``?pagination=cursor`` (or any
+        request carrying a ``cursor``) switches to keyset pagination, except
+        with ``?include_archived=true``, whose UNION cannot take a keyset.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.include_archived():
+                self._paginator = self.pagination_class()
+            elif params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = LeadKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        """
+        Fast path: fetch only the listed columns with values() (the assignee
+        name joined in SQL) and build each row without serializer field
+        instances, so a page costs the same few queries at any size.
+        """
+        lookups = self.serializer_class.row_lookups(request)
+        if self.include_archived():
+            lookups = {**lookups, 'archived': 'archived'}
+            queryset = self.with_archived(self.filter_queryset(self.get_queryset()), lookups)
+        else:
+            queryset = self.serializer_class.values_queryset(self.filter_queryset(self.get_queryset()), lookups)
+        rows = self.paginate_queryset(queryset)
+        if rows is None:
+            rows = queryset
+        data = [self.serializer_class.represent_row(row, lookups) for row in rows]
+        if self.paginator is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_archived_queryset(self):
+        """Archived leads through the same filters and search as the hot list."""
+        queryset = ArchivedLead.objects.filter(lead_scope(self.request.user))
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def with_archived(self, queryset, lookups):
+        """
+        UNION ALL of hot and archived rows, each flagged ``archived``. The
+        merged list is ordered by ``?ordering=`` (search relevance does not
+        carry across the two tables) with ``id`` as a tiebreaker.
+        """
+        parts = [
+            self.serializer_class.values_queryset(
+                part.order_by().annotate(archived=Value(flag, output_field=BooleanField())), lookups
+            )
+            for part, flag in ((queryset, False), (self.get_archived_queryset(), True))
+        ]
+        ordering = LeadOrderingFilter().get_ordering(self.request, queryset, self) or self.ordering
+        tiebreaker = '-id' if ordering[0].startswith('-') else 'id'
+        return parts[0].union(parts[1], all=True).order_by(*ordering, tiebreaker)
+
+    def get_validator_values(self):
+        last_modified, parts = super().get_validator_values()
+        parts = (*parts, lead_scope_key(self.request.user))
+        if not self.include_archived():
+            return last_modified, parts
+        # Rows only enter the archive, so its newest archived_at dates it
+        archived = self.get_archived_queryset().order_by().aggregate(
+            last_modified=Max('archived_at'), total=Count('pk')
+        )
+        if archived['last_modified'] and (last_modified is None or archived['last_modified'] > last_modified):
+            last_modified = archived['last_modified']
+        return last_modified, (*parts, archived['total'])
+
+
+# ------------------------- Lead Export View -------------------------
+class LeadExportView(LeadListView):
+    """
+    Stream every lead matching LeadListView's filters, search and ordering
+    as CSV (default) or NDJSON (``?file_format=ndjson``). Rows are read in
+    chunks as tuples, so memory stays flat regardless of export size.
+    """
+    response_cache_alias = None
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        # No validators: a conditional export would cost an extra aggregate
+        # over the whole filtered table just to answer 304
+        return self.list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', FORMAT_CSV)
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"file_format": [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, file_format)
+
 
 # ------------------------- Lead Create View -------------------------
 class LeadCreateView(generics.CreateAPIView):
     queryset = Lead.objects.all()
     serializer_class = LeadCreateSerializer
-    permission_classes = [IsAdminUser]
+    permission_classes = [IsAdminUser | CanCreateLead]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        lead = serializer.save()
+
+        strategy = settings.LEAD_ASSIGNMENT_STRATEGY
+        with transaction.atomic():
+            if not has_full_lead_access(request.user):
+                # Executives keep the leads they enter, so their scoped list shows them
+                lead = serializer.save(assigned_to=request.user, assigned_date=timezone.now())
+            elif strategy:
+                # Holds the assignee load rows until the new lead is counted
+                assignee = assignment.next_assignee(strategy)
+                lead = serializer.save(assigned_to_id=assignee, assigned_date=timezone.now() if assignee else None)
+            else:
+                lead = serializer.save()
 
         # Optional: create initial ProcessingUpdate if status is not PENDING
         if lead.processing_status != 'PENDING':
@@ -62,6 +196,7 @@ class LeadCreateView(generics.CreateAPIView):
                 lead=lead,
                 status=lead.processing_status,
                 changed_by=request.user,
+                processing_executive=lead.processing_executive,
                 notes="Initial status on lead creation"
             )
 
@@ -71,52 +206,359 @@ class LeadCreateView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+# ------------------------- Lead Bulk Import View -------------------------
+class LeadBulkImportView(APIView):
+    """
+    Bulk import leads from an uploaded CSV or JSONL file (multipart field
+    ``file``). The format is taken from ``file_format`` or the file name;
+    ``assign`` names an assignment strategy for the new leads.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or detect_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"file_format": [f"Must be one of: {', '.join(IMPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        strategy = request.data.get('assign') or None
+        if strategy is not None and strategy not in assignment.STRATEGIES:
+            return Response(
+                {"assign": [f"Must be one of: {', '.join(assignment.STRATEGIES)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        importer = LeadImporter(user=request.user, assignment_strategy=strategy)
+        result = importer.run(upload.open('rb'), file_format)
+
+        return Response({
+            "message": "Lead import finished",
+            **result
+        }, status=status.HTTP_200_OK)
+
+
+# ------------------------- Lead Webhook View -------------------------
+class LeadWebhookView(APIView):
+    """
+    Receive a WhatsApp, Instagram or automation webhook. The payload is
+    queued as-is and acknowledged at once; process_lead_webhooks turns
+    queued payloads into leads in batches.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    parser_classes = [JSONParser]
+
+    def post(self, request, source):
+        if not ingest.valid_token(request.headers.get('X-Webhook-Token')):
+            return Response({"message": "Invalid webhook token"}, status=status.HTTP_403_FORBIDDEN)
+        if source not in ingest.INGEST_SOURCES:
+            return Response({"message": f"Unknown webhook source '{source}'"}, status=status.HTTP_404_NOT_FOUND)
+
+        event = ingest.enqueue(ingest.INGEST_SOURCES[source], request.data)
+
+        return Response({
+            "message": "Webhook queued",
+            "event_id": event.id
+        }, status=status.HTTP_202_ACCEPTED)
+
+
 # ------------------------- Lead Detail View -------------------------
-class LeadDetailView(generics.RetrieveUpdateDestroyAPIView):
+class LeadDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Lead.objects.all()
     serializer_class = LeadDetailSerializer
-    permission_classes = [IsAdminUser]
+    permission_classes = [CanAccessLeads]
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(lead_scope(self.request.user))
+        if self.request.method in ('PUT', 'PATCH'):
+            # Concurrent editors queue on the row instead of overwriting each other
+            queryset = queryset.select_for_update()
+        return self.serializer_class.narrow_queryset(queryset, self.request)
+
+    def get_serializer_class(self):
+        if self.request.method in ('PUT', 'PATCH') and not has_full_lead_access(self.request.user):
+            return ScopedLeadDetailSerializer
+        return self.serializer_class
 
     def update(self, request, *args, **kwargs):
-        lead = self.get_object()
-        old_processing_status = lead.processing_status
-        old_remarks = lead.remarks
-
-        response = super().update(request, *args, **kwargs)
-        updated_lead = self.get_object()
-
-        # Track remarks history
-        if old_remarks != updated_lead.remarks:
-            from .models import RemarkHistory
-            RemarkHistory.objects.create(
-                lead=updated_lead,
-                previous_remarks=old_remarks,
-                new_remarks=updated_lead.remarks,
-                changed_by=request.user
-            )
+        partial = kwargs.pop('partial', False)
 
-        # Track processing status changes
-        if old_processing_status != updated_lead.processing_status:
-            ProcessingUpdate.objects.create(
-                lead=updated_lead,
-                status=updated_lead.processing_status,
-                changed_by=request.user,
-                notes="Status updated via API"
-            )
+        # One lock/read, one UPDATE and one batched insert per history table,
+        # committed together (history rows are written by the serializer)
+        with transaction.atomic():
+            lead = self.get_object()
+            serializer = self.get_serializer(lead, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
 
-        response.data = {"message": "Lead updated successfully"}
-        return response
+        return Response({"message": "Lead updated successfully"}, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
         super().destroy(request, *args, **kwargs)
         return Response({"message": "Lead deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
 
+# ------------------------- Lead Bulk Transition View -------------------------
+class LeadBulkTransitionView(APIView):
+    """
+    Move a batch of leads to a new processing status with one UPDATE.
+    Leads that are not eligible for the transition are reported as skipped.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = LeadBulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        updated, skipped = bulk_transition(
+            data['lead_ids'],
+            data['processing_status'],
+            changed_by=request.user,
+            executive=data.get('processing_executive'),
+            notes=data['notes'],
+        )
+
+        return Response({
+            "message": f"{len(updated)} lead(s) moved to {data['processing_status']}",
+            "updated": updated,
+            "skipped": skipped
+        }, status=status.HTTP_200_OK)
+
+
+# ------------------------- Lead Bulk Assign View -------------------------
+class LeadBulkAssignView(APIView):
+    """
+    Spread unassigned leads over the admission team. Leads that already
+    have an assignee are left alone and reported as skipped.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = LeadBulkAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lead_ids = list(dict.fromkeys(serializer.validated_data['lead_ids']))
+
+        assigned_ids = assignment.assign_existing(lead_ids, serializer.validated_data['strategy'])
+        assigned = set(assigned_ids)
+
+        return Response({
+            "message": f"{len(assigned_ids)} lead(s) assigned",
+            "assigned_ids": assigned_ids,
+            "skipped_ids": [lead_id for lead_id in lead_ids if lead_id not in assigned]
+        }, status=status.HTTP_200_OK)
+
+
+# ------------------------- Lead Duplicates View -------------------------
+class LeadDuplicatesView(APIView):
+    """
+    Clusters of leads recorded as possible duplicates (same canonical phone,
+    email, or phonetic name + phone suffix). Resolve them with the merge view.
+    """
+    permission_classes = [IsAdminUser]
+    lead_fields = ('id', 'name', 'phone', 'email', 'status', 'processing_status', 'created_at')
+    # Model attributes behind API fields whose column holds a lookup id
+    lead_attributes = {'status': 'status_code'}
+
+    def get(self, request):
+        clusters = dedup.candidate_clusters()
+        lead_ids = [lead_id for cluster in clusters for lead_id in cluster]
+        leads = Lead.objects.in_bulk(lead_ids)
+        reasons = {}
+        for lead_id, candidate_id, reason in DuplicateCandidate.objects.filter(
+            lead_id__in=lead_ids
+        ).values_list('lead_id', 'candidate_id', 'reason'):
+            reasons.setdefault(lead_id, set()).add(reason)
+            reasons.setdefault(candidate_id, set()).add(reason)
+
+        results = []
+        for cluster in clusters:
+            results.append({
+                "reasons": sorted(set().union(*(reasons.get(lead_id, ()) for lead_id in cluster))),
+                "leads": [
+                    {field: getattr(leads[lead_id], self.lead_attributes.get(field, field)) for field in self.lead_fields}
+                    for lead_id in cluster if lead_id in leads
+                ],
+            })
+
+        return Response({
+            "count": len(results),
+            "clusters": results
+        }, status=status.HTTP_200_OK)
+
+
+# ------------------------- Archived Lead Views -------------------------
+class ArchivedLeadListView(generics.ListAPIView):
+    """Read-only list of leads moved out of the hot tables by archive_closed_leads."""
+    queryset = ArchivedLead.objects.all()
+    serializer_class = ArchivedLeadSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = LeadPagination
+
+    filter_backends = [
+        LeadFilterBackend,
+        filters.SearchFilter,
+        filters.OrderingFilter
+    ]
+
+    search_fields = ['name', 'phone', 'email', 'program__name']
+    ordering_fields = ['created_at', 'priority', 'archived_at']
+    ordering = ['-created_at']
+
+
+class ArchivedLeadDetailView(generics.RetrieveAPIView):
+    """One archived lead with its processing updates and remark history."""
+    queryset = ArchivedLead.objects.prefetch_related('processing_updates', 'remark_history')
+    serializer_class = ArchivedLeadDetailSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_object(self):
+        archived_lead = super().get_object()
+        # Rebuild every remark version with one query instead of one per row
+        remarks.materialize(list(archived_lead.remark_history.all()))
+        return archived_lead
+
+
+# ------------------------- Lead Merge View -------------------------
+class LeadMergeView(APIView):
+    """
+    Merge duplicates into the lead at ``pk``; their history moves to it and
+    blank fields on it are filled from them before they are deleted.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, pk):
+        serializer = LeadMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        primary = generics.get_object_or_404(Lead, pk=pk)
+
+        primary, merged_ids = dedup.merge_leads(
+            primary, serializer.validated_data['duplicate_ids'], changed_by=request.user
+        )
+        if not merged_ids:
+            return Response({"message": "No duplicate leads found to merge"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": "Leads merged successfully",
+            "lead": LeadDetailSerializer(primary).data,
+            "merged_ids": merged_ids
+        }, status=status.HTTP_200_OK)
+
+
 # ------------------------- Lead Processing Timeline View -------------------------
 class LeadProcessingTimelineView(generics.ListAPIView):
     serializer_class = ProcessingUpdateSerializer
-    permission_classes = [IsAdminUser]
+    permission_classes = [CanAccessLeads]
 
     def get_queryset(self):
         lead_id = self.kwargs.get('lead_id')
-        return ProcessingUpdate.objects.filter(lead_id=lead_id).order_by('-timestamp')
+        scope = lead_scope(self.request.user, prefix='lead__')
+        return ProcessingUpdate.objects.filter(scope, lead_id=lead_id).order_by('-timestamp')
+
+
+# ------------------------- Lead Activity Feed View -------------------------
+class LeadActivityFeedView(generics.ListAPIView):
+    """
+    Processing updates and remark edits merged newest first, for one lead
+    (``lead_id`` in the URL) or across all leads. Cursor paginated; each
+    page costs one query per history table.
+    """
+    serializer_class = ActivitySerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = ActivityFeedPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        return ActivityFeed(lead_id=self.kwargs.get('lead_id'))
+
+
+# ------------------------- Lead Funnel Analytics View -------------------------
+class LeadFunnelView(APIView):
+    """
+    Lead counts by status, source, priority, processing status and assignee,
+    read from the LeadFunnelCount summary table rather than leads_lead.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        summary = funnel.summarize(funnel.stored_groups())
+
+        assignees = summary.pop('assigned_to')
+        usernames = dict(
+            User.objects.filter(id__in=[user_id for user_id in assignees if user_id])
+            .values_list('id', 'username')
+        )
+        summary['assigned_to'] = [
+            {
+                "id": user_id or None,
+                "username": usernames.get(user_id),
+                "count": count,
+            }
+            for user_id, count in assignees.items()
+        ]
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+# ------------------------- Lead List Cache Stats View -------------------------
+class LeadListCacheStatsView(APIView):
+    """Hit/miss counts of the lead list response cache in this worker process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "hits": cache.stats['hit'],
+            "misses": cache.stats['miss'],
+            "hit_ratio": cache.hit_ratio(),
+            "generation": cache.get_generation(Lead._meta.db_table)
+        }, status=status.HTTP_200_OK)
+
+
+# ------------------------- Processing Time Metrics View -------------------------
+class ProcessingTimeMetricsView(APIView):
+    """
+    Median/p90 time spent in each processing stage, read from the daily
+    ProcessingStageRollup table (see ``rollup_processing_metrics``).
+
+    Query params: ``from``/``to`` (YYYY-MM-DD, default last 30 days),
+    ``processing_executive`` (user id), ``group_by=processing_executive``.
+    """
+    permission_classes = [IsAdminUser]
+    default_days = 30
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            end = parse_date(params.get('to', '')) or timezone.localdate()
+        except ValueError:
+            return Response({"to": ["Not a valid date."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_date(params.get('from', '')) or end - datetime.timedelta(days=self.default_days - 1)
+        except ValueError:
+            return Response({"from": ["Not a valid date."]}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"from": ["Must not be after 'to'."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        executive = params.get('processing_executive')
+        if executive is not None and not executive.isdigit():
+            return Response({"processing_executive": ["Must be a user id."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = metrics.stage_report(
+            start,
+            end,
+            executive=int(executive) if executive else None,
+            by_executive=params.get('group_by') == 'processing_executive',
+        )
+
+        return Response({
+            "from": start,
+            "to": end,
+            "stages": report
+        }, status=status.HTTP_200_OK)
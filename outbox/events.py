@@ -0,0 +1,136 @@
+"""
+Recording outbox events.
+
+``OutboxMixin`` covers ``save()`` on tracked models and ``outbox.signals``
+covers deletes (including cascades). Bulk paths that bypass both call the
+``record_*`` helpers here inside their own transaction, the same way they
+call the lead funnel hooks.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import router, transaction
+
+from .models import OutboxEvent
+
+
+# Events held back by batch(), or None outside one
+pending_events = ContextVar('pending_events', default=None)
+
+
+def payload_item(field, value):
+    """
+    ``(key, value)`` for one column, keyed by attname. Foreign keys into
+    lookup tables (leads.models.LookupTable) are sent under the field name
+    as their API string, so ``status``/``program`` keep the shape they had
+    before those columns held ids.
+    """
+    related = field.related_model if field.is_relation else None
+    if related is not None and hasattr(related, 'display'):
+        return field.name, related.display(value)
+    return field.attname, value
+
+
+def snapshot(instance, fields=None):
+    """Payload for ``fields`` (names or attnames), or every concrete field."""
+    opts = instance._meta
+    fields = opts.concrete_fields if fields is None else [opts.get_field(name) for name in fields]
+    return dict(payload_item(field, getattr(instance, field.attname)) for field in fields)
+
+
+def event_for(instance, event_type, fields=None):
+    payload = {} if event_type in (OutboxEvent.DELETED, OutboxEvent.ARCHIVED) else snapshot(instance, fields)
+    return OutboxEvent(
+        aggregate=instance._meta.label_lower,
+        aggregate_id=instance.pk,
+        event_type=event_type,
+        payload=payload,
+    )
+
+
+@contextmanager
+def batch():
+    """
+    Hold back the events recorded inside the block and insert them with one
+    ``bulk_create`` at its end, still inside the caller's transaction. If
+    the block raises, nothing is inserted.
+    """
+    events = []
+    token = pending_events.set(events)
+    try:
+        yield
+    finally:
+        pending_events.reset(token)
+    store(events)
+
+
+def store(events, using=None):
+    pending = pending_events.get()
+    if pending is not None:
+        pending.extend(events)
+    elif len(events) == 1:
+        events[0].save(using=using)
+    elif events:
+        OutboxEvent.objects.db_manager(using).bulk_create(events)
+
+
+def record(instance, event_type, fields=None):
+    store([event_for(instance, event_type, fields)], using=instance._state.db)
+
+
+def record_created(instances):
+    """Events for rows inserted with ``bulk_create``."""
+    store([event_for(instance, OutboxEvent.CREATED) for instance in instances])
+
+
+def record_changed(instances, fields):
+    """Events for rows written with ``bulk_update(instances, fields)``."""
+    store([event_for(instance, OutboxEvent.UPDATED, fields) for instance in instances])
+
+
+def record_updated(model, ids, changes):
+    """Events for a ``QuerySet.update(**changes)`` over ``ids``."""
+    payload = dict(
+        payload_item(model._meta.get_field(name), value.pk if hasattr(value, 'pk') else value)
+        for name, value in changes.items()
+    )
+    store([
+        OutboxEvent(aggregate=model._meta.label_lower, aggregate_id=pk, event_type=OutboxEvent.UPDATED, payload=payload)
+        for pk in ids
+    ])
+
+
+def record_removed(model, ids, event_type=OutboxEvent.DELETED):
+    """Events for rows removed without delete signals (e.g. moved to the archive)."""
+    store([
+        OutboxEvent(aggregate=model._meta.label_lower, aggregate_id=pk, event_type=event_type)
+        for pk in ids
+    ])
+
+
+class OutboxMixin:
+    """
+    Write an outbox event in the same transaction as every ``save()``. With
+    DirtyFieldsMixin further down the MRO an update event carries only the
+    changed columns, and a save that changes nothing records nothing.
+    """
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        fields = kwargs.get('update_fields')
+        if not adding and fields is None and hasattr(self, 'get_dirty_fields'):
+            fields = list(self.get_dirty_fields())
+            if not fields:
+                return super().save(*args, **kwargs)
+            fields += [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in fields
+            ]
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            if adding:
+                record(self, OutboxEvent.CREATED)
+            else:
+                record(self, OutboxEvent.UPDATED, fields)
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from outbox import relay
+
+
+class Command(BaseCommand):
+    help = "Send new outbox events, in id order, to one of the sinks in OUTBOX_SINKS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('sink', help="Name of the sink in OUTBOX_SINKS")
+        parser.add_argument('--batch-size', type=int, default=relay.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--retries', type=int, default=3, help="Retries per batch before giving up")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events instead of exiting once caught up")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to wait between polls when caught up")
+        parser.add_argument('--prune-days', type=int, help="Afterwards delete events older than this that every sink has relayed")
+
+    def handle(self, *args, **options):
+        if options['sink'] not in getattr(settings, 'OUTBOX_SINKS', {}):
+            raise CommandError(f"Unknown sink '{options['sink']}'")
+        sink = relay.get_sink(options['sink'])
+
+        total = 0
+        while True:
+            try:
+                sent = relay.relay_batch(options['sink'], sink, options['batch_size'], options['retries'])
+            except relay.SinkError as exc:
+                raise CommandError(f"Sink '{options['sink']}' failed: {exc}")
+            total += sent
+            if sent:
+                self.stdout.write(f"Relayed {sent} events")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        if options['prune_days'] is not None:
+            self.stdout.write(f"Pruned {relay.prune(options['prune_days'])} events")
+        self.stdout.write(self.style.SUCCESS(f"Relayed: {total}"))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relayoffset',
+            name='gaps',
+            field=models.JSONField(blank=True, default=dict, help_text='Skipped event ids not yet committed: {id: first seen}'),
+        ),
+    ]
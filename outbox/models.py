@@ -0,0 +1,47 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    One change to a tracked row, written in the transaction that made the
+    change. Ids only grow, so consumers stream the table by id offset.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ARCHIVED = 'archived'
+
+    EVENT_TYPE_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+        (ARCHIVED, 'Archived'),
+    ]
+
+    aggregate = models.CharField(max_length=50, help_text="Model label, e.g. leads.lead")
+    aggregate_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES)
+    # Full row on create, only the changed columns on update, empty on delete
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['aggregate', 'aggregate_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.id}: {self.aggregate} {self.aggregate_id} {self.event_type}"
+
+
+class RelayOffset(models.Model):
+    """Last event id a sink has acknowledged, and the lower ids it still awaits."""
+    sink = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=dict, blank=True, help_text="Skipped event ids not yet committed: {id: first seen}")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sink}: {self.last_event_id}"
@@ -0,0 +1,168 @@
+"""
+Relaying outbox events to downstream sinks.
+
+Each sink named in ``settings.OUTBOX_SINKS`` keeps its own offset in
+``RelayOffset``. A relay run locks that row, reads the next events by id,
+hands them to the sink and only then moves the offset, so delivery is
+at-least-once: a batch whose acknowledgement was lost is sent again and
+consumers deduplicate on the event ``id``.
+"""
+import datetime
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent, RelayOffset
+
+
+DEFAULT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+class SinkError(Exception):
+    """A sink could not accept a batch; the offset is left where it was."""
+
+
+# ------------------------- Sinks -------------------------
+class FileSink:
+    """Append events as JSON lines to ``path``, fsynced before acknowledging."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        lines = ''.join(json.dumps(event, cls=DjangoJSONEncoder) + '\n' for event in events)
+        try:
+            with open(self.path, 'a', encoding='utf-8') as stream:
+                stream.write(lines)
+                stream.flush()
+                os.fsync(stream.fileno())
+        except OSError as exc:
+            raise SinkError(str(exc)) from exc
+
+
+class HTTPSink:
+    """
+    POST ``{"events": [...]}`` to ``url``. The ``Idempotency-Key`` header
+    names the batch's id range, so receivers can drop a resent batch.
+    """
+
+    def __init__(self, url, headers=None, timeout=10):
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def send(self, events):
+        body = json.dumps({'events': events}, cls=DjangoJSONEncoder).encode()
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Idempotency-Key': f"{events[0]['id']}-{events[-1]['id']}",
+            **self.headers,
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except (urllib.error.URLError, OSError) as exc:
+            raise SinkError(str(exc)) from exc
+
+
+def get_sink(name):
+    config = getattr(settings, 'OUTBOX_SINKS', {}).get(name)
+    if config is None:
+        raise ImproperlyConfigured(f"Outbox sink '{name}' is not configured in OUTBOX_SINKS")
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+# ------------------------- Relaying -------------------------
+def serialize(event):
+    return {
+        'id': event.id,
+        'aggregate': event.aggregate,
+        'aggregate_id': event.aggregate_id,
+        'type': event.event_type,
+        'payload': event.payload,
+        'created_at': event.created_at,
+    }
+
+
+def relay_batch(sink_name, sink, batch_size=DEFAULT_BATCH_SIZE, retries=3, backoff=1.0):
+    """
+    Send the next batch to ``sink`` and return how many events it held.
+
+    Ids are assigned at insert but become visible at commit, so a slower
+    transaction can commit a lower id after the offset has passed it. Ids
+    skipped over are kept in ``RelayOffset.gaps`` and their events sent
+    with a later batch once they show up. A gap still empty after
+    ``OUTBOX_RELAY_GAP_SECONDS`` is taken for a rolled-back insert and
+    dropped with a warning.
+    """
+    now = timezone.now()
+    expiry = now - datetime.timedelta(seconds=getattr(settings, 'OUTBOX_RELAY_GAP_SECONDS', 3600))
+    with transaction.atomic():
+        RelayOffset.objects.get_or_create(sink=sink_name)
+        # One relay per sink at a time: the offset row stays locked until the batch is acknowledged
+        offset = RelayOffset.objects.select_for_update().get(sink=sink_name)
+        gaps = dict(offset.gaps)
+        filled = list(OutboxEvent.objects.filter(id__in=[int(gap) for gap in gaps]).order_by('id'))
+        fresh = list(OutboxEvent.objects.filter(id__gt=offset.last_event_id).order_by('id')[:batch_size])
+
+        for event in filled:
+            del gaps[str(event.id)]
+        last_event_id = offset.last_event_id
+        for event in fresh:
+            # A new sink starts from the oldest event still kept
+            if last_event_id:
+                gaps.update((str(gap), now.isoformat()) for gap in range(last_event_id + 1, event.id))
+            last_event_id = event.id
+        expired = [gap for gap, seen in gaps.items() if parse_datetime(seen) < expiry]
+        if expired:
+            logger.warning("Outbox sink '%s' gave up waiting for events %s", sink_name, ', '.join(expired))
+            for gap in expired:
+                del gaps[gap]
+
+        events = filled + fresh
+        if events:
+            batch = [serialize(event) for event in events]
+            for attempt in range(retries + 1):
+                try:
+                    sink.send(batch)
+                    break
+                except SinkError:
+                    if attempt == retries:
+                        raise
+                    time.sleep(backoff * 2 ** attempt)
+        elif gaps == offset.gaps:
+            return 0
+
+        offset.last_event_id = last_event_id
+        offset.gaps = gaps
+        offset.save(update_fields=['last_event_id', 'gaps', 'updated_at'])
+    return len(events)
+
+
+def prune(older_than_days):
+    """Delete events every configured sink has acknowledged and that are older than the cutoff."""
+    sinks = list(getattr(settings, 'OUTBOX_SINKS', {}))
+    offsets = RelayOffset.objects.filter(sink__in=sinks)
+    if offsets.count() < len(sinks):
+        # A sink that never relayed still needs everything
+        return 0
+    # Events still awaited in a gap must survive until they are relayed
+    acknowledged = min(
+        (min([offset.last_event_id, *(int(gap) - 1 for gap in offset.gaps)]) for offset in offsets), default=0
+    )
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(id__lte=acknowledged, created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from leads.models import Lead, ProcessingUpdate
+from tasks.models import Task, TaskUpdate
+from users.models import User
+from . import events
+from .models import OutboxEvent
+
+
+TRACKED_MODELS = (Lead, ProcessingUpdate, Task, TaskUpdate)
+
+
+# ------------------------- Deletes -------------------------
+def record_delete(sender, instance, **kwargs):
+    # Runs inside the deletion's transaction, cascaded rows included
+    events.record(instance, OutboxEvent.DELETED)
+
+
+for model in TRACKED_MODELS:
+    post_delete.connect(record_delete, sender=model, dispatch_uid=f'outbox_delete_{model._meta.label_lower}')
+
+
+# ------------------------- User Deletes -------------------------
+@receiver(pre_delete, sender=User)
+def record_lead_unassignment(sender, instance, **kwargs):
+    """Lead FKs to users are SET_NULL with a bulk UPDATE that sends no Lead signals."""
+    for field in ('assigned_to', 'processing_executive'):
+        lead_ids = list(Lead.objects.filter(**{field: instance}).values_list('id', flat=True))
+        events.record_updated(Lead, lead_ids, {field: None})
@@ -1,8 +1,10 @@
 from django.db import models
 from django.utils import timezone
 from users.models import User
+from backend.mixins import DirtyFieldsManager, DirtyFieldsMixin
+from outbox.events import OutboxMixin
 
-class Task(models.Model):
+class Task(OutboxMixin, DirtyFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
         ('IN_PROGRESS', 'In Progress'),
@@ -38,6 +40,8 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DirtyFieldsManager()
     
     class Meta:
         ordering = ['-priority', '-created_at']
@@ -60,8 +64,7 @@ class Task(models.Model):
         elif self.status != 'COMPLETED' and self.completed_at:
             self.completed_at = None
         
-        
-        
+        # Existing rows are written with a single UPDATE of the changed columns
         super().save(*args, **kwargs)
     
     @property
@@ -117,7 +120,7 @@ class Task(models.Model):
         
         return updated_count
 
-class TaskUpdate(models.Model):
+class TaskUpdate(OutboxMixin, models.Model):
     """Model to track task status updates and notes"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='updates')
     updated_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -0,0 +1,36 @@
+from django.db.models import Q
+
+from backend.async_views import AsyncAPIView
+from .models import User
+from .serializers import StaffListSerializer
+from .views import StaffListView
+
+
+# ------------------------- Async Staff List View -------------------------
+class AsyncStaffListView(AsyncAPIView):
+    """Async twin of StaffListView (``?search=``, ``?ordering=``, sparse fieldsets)."""
+    serializer_class = StaffListSerializer
+    permission_classes = StaffListView.permission_classes
+    search_fields = StaffListView.search_fields
+    ordering_fields = StaffListView.ordering_fields
+    ordering = StaffListView.ordering
+
+    def filter_queryset(self, queryset):
+        params = self.request.GET
+        for term in params.get('search', '').replace(',', ' ').split():
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+
+        ordering = [
+            term for term in map(str.strip, params.get('ordering', '').split(','))
+            if term.lstrip('-') in self.ordering_fields
+        ]
+        return queryset.order_by(*(ordering or self.ordering))
+
+    async def get(self, request):
+        queryset = self.serializer_class.narrow_queryset(User.objects.filter(is_active=True), request)
+        serializer = self.serializer_class(context={'request': request})
+        data = await self.paginate(self.filter_queryset(queryset), serializer.to_representation)
+        return self.respond(data)
@@ -0,0 +1,128 @@
+"""
+JWT authentication without a user SELECT per request.
+
+``CachedJWTAuthentication`` keeps resolved users in the per-process
+``auth_users`` cache (bounded LRU with a short TTL). Entries are keyed on
+the user's generation token in the shared ``default`` cache. Any save or
+delete of the user bumps that token (see users.signals), which covers staff
+updates, deactivation, deletion and password changes. The next request in
+every worker then reads the fresh row, so a role change is never served
+stale.
+
+On a cache miss, tokens issued by LoginAPIView can stand in for the row.
+They carry the user's role, team and flags as claims, and a ``claims_at``
+time. The claims are used only while the user has not changed since
+``claims_at``. Fields the claims leave out load from the database the first
+time they are read.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+GENERATION_CACHE = 'default'
+GENERATION_KEY = 'generation:auth_user:{user_id}'
+USER_CACHE = 'auth_users'
+
+# User fields copied into tokens at login
+USER_CLAIMS = ('username', 'role', 'team', 'is_staff', 'is_superuser', 'is_active')
+CLAIMS_AT_CLAIM = 'claims_at'
+
+
+# ------------------------- Invalidation -------------------------
+def get_generation(user_id):
+    generation = caches[GENERATION_CACHE].get(GENERATION_KEY.format(user_id=user_id))
+    if generation is None:
+        generation = bump_generation(user_id)
+    return generation
+
+
+def bump_generation(user_id):
+    generation = time.time_ns()
+    caches[GENERATION_CACHE].set(GENERATION_KEY.format(user_id=user_id), generation, None)
+    return generation
+
+
+def invalidate(user_id):
+    """Forget ``user_id`` in every worker now and, inside a transaction, again once it commits."""
+    bump_generation(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_generation(user_id))
+
+
+# ------------------------- Token claims -------------------------
+def add_user_claims(token, user):
+    """Embed ``USER_CLAIMS`` in ``token``; access tokens made from a refresh token inherit them."""
+    for field in USER_CLAIMS:
+        token[field] = getattr(user, field)
+    token[CLAIMS_AT_CLAIM] = time.time()
+    return token
+
+
+def user_from_claims(user_model, user_id, validated_token, generation):
+    """
+    A user built from the token's claims, or None when the token has none or
+    the user changed after they were issued.
+    """
+    claims_at = validated_token.get(CLAIMS_AT_CLAIM)
+    if claims_at is None or any(field not in validated_token for field in USER_CLAIMS):
+        return None
+    if claims_at * 1e9 <= generation:
+        return None
+    # simplejwt stores the id claim as a string
+    user_id = user_model._meta.get_field(api_settings.USER_ID_FIELD).to_python(user_id)
+    values = {api_settings.USER_ID_FIELD: user_id, **{field: validated_token[field] for field in USER_CLAIMS}}
+    fields = [field for field in user_model._meta.concrete_fields if field.attname in values]
+    # The other fields stay deferred and load on first access
+    return user_model.from_db(
+        DEFAULT_DB_ALIAS, [field.attname for field in fields], [values[field.attname] for field in fields]
+    )
+
+
+# ------------------------- Authentication -------------------------
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users from the ``auth_users`` cache or the token's claims."""
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        key, user = self.get_cached_user(user_id, validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            caches[USER_CACHE].set(key, user)
+            return user
+        self.check_user(user, validated_token)
+        return user
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def get_cached_user(self, user_id, validated_token):
+        """``(cache key, user or None)``; a user built from claims is cached too."""
+        generation = get_generation(user_id)
+        key = f'{user_id}:{generation}'
+        user = caches[USER_CACHE].get(key)
+        # The revocation check compares the password hash, which claims don't carry
+        if user is None and not getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            user = user_from_claims(self.user_model, user_id, validated_token, generation)
+            if user is not None:
+                caches[USER_CACHE].set(key, user)
+        return key, user
+
+    def check_user(self, user, validated_token):
+        """The checks JWTAuthentication.get_user() makes after its lookup."""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed("User is inactive", code='user_inactive')
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise exceptions.AuthenticationFailed(
+                    "The user's password has been changed.", code='password_changed'
+                )
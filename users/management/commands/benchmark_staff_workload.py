@@ -0,0 +1,100 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from leads.models import Lead
+from tasks.models import Task
+from users import workload
+from users.models import User
+
+
+ROLES = ['ADM_EXEC', 'ADM_EXEC', 'ADM_EXEC', 'ADM_MANAGER', 'PROCESSING', 'MEDIA', 'CM']
+PROCESSING_STATUSES = [value for value, _ in Lead.PROCESSING_STATUS_CHOICES]
+TASK_STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the staff workload report, computed and cached, on synthetic data. "
+        "Rows are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=500)
+        parser.add_argument('--leads', type=int, default=1_000_000)
+        parser.add_argument('--tasks', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['staff'], options['leads'], options['tasks'])
+            since, now = workload.week_start(), timezone.now()
+
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    rows = workload.compute(since, now)
+                    timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"\n{options['staff']:,} staff, {options['leads']:,} leads, {options['tasks']:,} tasks"
+            )
+            self.stdout.write(f"{'report':<12}{'median ms':>12}{'queries':>10}{'rows':>8}")
+            self.stdout.write(f"{'computed':<12}{statistics.median(timings):>12.1f}{len(queries):>10}{len(rows):>8}")
+
+            workload.report()
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    workload.report()
+                    timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"{'cached':<12}{statistics.median(timings):>12.1f}{len(queries):>10}{len(rows):>8}")
+            transaction.set_rollback(True)
+        # Entries computed from rolled-back rows must not outlive them
+        caches[workload.WORKLOAD_CACHE].clear()
+
+    def seed(self, staff, leads, tasks, batch_size=5000):
+        rng = random.Random(leads)
+        User.objects.bulk_create([
+            User(username=f'workload-bench-{number}', role=ROLES[number % len(ROLES)], team=f'team-{number % 8}')
+            for number in range(staff)
+        ])
+        users = list(User.objects.filter(username__startswith='workload-bench-').values_list('id', 'role'))
+        assignees = [user_id for user_id, role in users if role in ('ADM_EXEC', 'ADM_MANAGER')]
+        executives = [user_id for user_id, role in users if role == 'PROCESSING']
+        now = timezone.now()
+
+        for offset in range(0, leads, batch_size):
+            batch = []
+            for number in range(offset, min(offset + batch_size, leads)):
+                processing_status = rng.choice(PROCESSING_STATUSES)
+                batch.append(Lead(
+                    name=f"Workload Lead {number}",
+                    phone=f"7{number * 104729 % 10**9:09d}",
+                    source='OTHER',
+                    processing_status=processing_status,
+                    assigned_to_id=rng.choice(assignees),
+                    assigned_date=now - datetime.timedelta(days=rng.randrange(60)),
+                    processing_executive_id=rng.choice(executives) if processing_status != 'PENDING' else None,
+                ))
+            Lead.objects.bulk_create(batch)
+
+        Task.objects.bulk_create([
+            Task(
+                title=f"Workload task {number}",
+                description='',
+                assigned_by_id=users[0][0],
+                assigned_to_id=rng.choice(assignees),
+                status=rng.choice(TASK_STATUSES),
+                deadline=now + datetime.timedelta(days=rng.randrange(-20, 20)),
+            )
+            for number in range(tasks)
+        ], batch_size=batch_size)
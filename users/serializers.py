@@ -1,5 +1,6 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
+from backend.mixins import SparseFieldsetsMixin
 from .models import User
 
 
@@ -47,7 +48,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 # ------------------------- Staff List Serializer -------------------------
-class StaffListSerializer(serializers.ModelSerializer):
+class StaffListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -62,7 +63,7 @@ class StaffListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 # ------------------------- Staff Detail Serializer -------------------------
-class StaffDetailSerializer(serializers.ModelSerializer):
+class StaffDetailSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -79,6 +80,21 @@ class StaffDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['date_joined', 'last_login']
 
+# ------------------------- Staff Summary Serializer -------------------------
+class StaffSummarySerializer(serializers.ModelSerializer):
+    """Compact user representation nested by ``?expand=`` elsewhere"""
+    class Meta:
+        model = User
+        fields = [
+            'id',
+            'username',
+            'first_name',
+            'last_name',
+            'role',
+            'team',
+        ]
+        read_only_fields = fields
+
 # ------------------------- Staff Create/Update Serializer -------------------------
 class StaffCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
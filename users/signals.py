@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from leads import cache
+from tasks.models import Task
+from . import authentication
+from .models import User
+
+
+# ------------------------- Cached JWT Users -------------------------
+@receiver(post_save, sender=User)
+def forget_user_on_save(sender, instance, update_fields=None, **kwargs):
+    # Logins only stamp last_login, which authentication never reads
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    authentication.invalidate(instance.pk)
+    cache.invalidate(User._meta.db_table)
+
+
+@receiver(post_delete, sender=User)
+def forget_user_on_delete(sender, instance, **kwargs):
+    authentication.invalidate(instance.pk)
+    cache.invalidate(User._meta.db_table)
+
+
+# ------------------------- Staff Workload -------------------------
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_workload_on_task_change(sender, instance, **kwargs):
+    # Lead writes already bump the lead table's generation (leads.cache)
+    cache.invalidate(Task._meta.db_table)
@@ -1,3 +1,204 @@
-from django.test import TestCase
+import re
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from leads.models import Lead
+from . import workload
+from .authentication import CachedJWTAuthentication
+from .models import User
+from .serializers import StaffDetailSerializer
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.executive = User.objects.create_user(username='exec', password='password', role='ADM_EXEC')
+        response = self.client.post(reverse('login'), {'username': 'exec', 'password': 'password'}, format='json')
+        self.token = response.data['access']
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def test_login_token_resolves_without_queries(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual((user.pk, user.role, user.is_staff), (self.executive.pk, 'ADM_EXEC', False))
+
+    def test_staff_update_is_seen_by_the_next_request(self):
+        self.authenticate()
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            reverse('staff-update', args=[self.executive.pk]), {'role': 'PROCESSING'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # One lookup after the change, then cached again
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().role, 'PROCESSING')
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_deleted_user_is_refused(self):
+        self.authenticate()
+        self.executive.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class StaffWorkloadTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='password', role='ADMIN', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.executive = User.objects.create_user(username='exec', password='password', role='ADM_EXEC')
+        self.url = reverse('staff-workload')
+        caches[workload.WORKLOAD_CACHE].clear()
+
+    def test_report_costs_three_queries_then_comes_from_cache(self):
+        Lead.objects.create(name='Anjali Nair', phone='9847012345', source='WEBSITE', assigned_to=self.executive)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        row = next(row for row in response.data['results'] if row['id'] == self.executive.pk)
+        self.assertEqual(row['assigned_leads']['PENDING'], 1)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_lead_write_refreshes_report(self):
+        self.client.get(self.url)
+        Lead.objects.create(name='Arjun Menon', phone='9847012346', source='WEBSITE', assigned_to=self.executive)
+
+        response = self.client.get(self.url)
+        row = next(row for row in response.data['results'] if row['id'] == self.executive.pk)
+        self.assertEqual(row['assigned_leads']['total'], 1)
+
+    def test_staff_missing_from_later_queries_count_zero(self):
+        # As if the user was activated after the processing and task counts ran
+        with mock.patch.object(workload, 'count_rows', return_value={}):
+            rows = workload.compute(workload.week_start(), timezone.now())
+
+        row = next(row for row in rows if row['id'] == self.executive.pk)
+        self.assertEqual((row['processing_leads']['total'], row['tasks']['total'], row['overdue_tasks']), (0, 0, 0))
+
+
+class AsyncStaffListTests(APITestCase):
+    def setUp(self):
+        User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        User.objects.create_user(username='exec', password='password', role='ADM_EXEC')
+        self.headers = {
+            username: {'Authorization': f"Bearer {self.login(username)}"} for username in ('admin', 'exec')
+        }
+
+    def login(self, username):
+        response = self.client.post(reverse('login'), {'username': username, 'password': 'password'}, format='json')
+        return response.data['access']
+
+    async def test_staff_list_follows_the_sync_view_permissions(self):
+        response = await self.async_client.get(reverse('async-staff-list'), headers=self.headers['exec'])
+        self.assertEqual(response.status_code, 403)
+
+        response = await self.async_client.get(reverse('async-staff-list'), headers=self.headers['admin'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+    async def test_spaced_ordering_matches_the_sync_view(self):
+        params = {'ordering': 'username, -date_joined'}
+        response = await self.async_client.get(reverse('async-staff-list'), params, headers=self.headers['admin'])
+        expected = await sync_to_async(self.client.get)(reverse('staff-list'), params, headers=self.headers['admin'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual([row['username'] for row in response.json()['results']], ['admin', 'exec'])
+
+
+class StaffConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.executive = User.objects.create_user(username='exec', password='password', role='ADM_EXEC')
+        self.client.force_authenticate(self.admin)
+
+    def assertNotModifiedUntilChanged(self, url, change):
+        etag = self.client.get(url)['ETag']
+
+        # Only the validator query runs; no rows are fetched
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_staff_list_is_not_modified_until_a_member_changes(self):
+        def change():
+            self.executive.first_name = 'Anjali'
+            self.executive.save()
+
+        self.assertNotModifiedUntilChanged(reverse('staff-list'), change)
+
+    def test_staff_list_is_not_modified_until_a_member_joins(self):
+        def change():
+            User.objects.create_user(username='proc', password='password', role='PROCESSING')
+
+        self.assertNotModifiedUntilChanged(reverse('staff-list'), change)
+
+    def test_staff_detail_is_not_modified_until_the_member_changes(self):
+        def change():
+            self.executive.role = 'CM'
+            self.executive.save()
+
+        self.assertNotModifiedUntilChanged(reverse('staff-detail', args=[self.executive.pk]), change)
+
+
+class StaffSparseFieldsetsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='ADMIN', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def fetch(self, url, params):
+        """The response and the columns its last users SELECT read."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries if query['sql'].startswith('SELECT')][-1]
+        select = re.match(r'SELECT (.*?) FROM ', sql, re.S).group(1)
+        return response, set(re.findall(r'"users_user"\."(\w+)"', select))
+
+    def test_list_fields_narrow_payload_and_columns(self):
+        response, columns = self.fetch(reverse('staff-list'), {'fields': 'id,username,bogus'})
+
+        self.assertEqual(response.data['results'], [{'id': self.admin.pk, 'username': 'admin'}])
+        self.assertEqual(columns, {'id', 'username'})
+
+    def test_list_exclude_drops_fields_and_columns(self):
+        response, columns = self.fetch(reverse('staff-list'), {'exclude': 'email,date_joined,bogus'})
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username', 'first_name', 'last_name', 'role'})
+        self.assertEqual(columns, {'id', 'username', 'first_name', 'last_name', 'role'})
+
+    def test_detail_fields_narrow_payload_and_columns(self):
+        response, columns = self.fetch(reverse('staff-detail', args=[self.admin.pk]), {'fields': 'role,team,bogus'})
+
+        self.assertEqual(response.data, {'role': 'ADMIN', 'team': ''})
+        self.assertEqual(columns, {'id', 'role', 'team'})
+
+    def test_unknown_expand_is_ignored(self):
+        response, columns = self.fetch(reverse('staff-detail', args=[self.admin.pk]), {'expand': 'bogus'})
+
+        self.assertEqual(set(response.data), set(StaffDetailSerializer.Meta.fields))
+        self.assertEqual(columns, set(StaffDetailSerializer.Meta.fields))
@@ -5,9 +5,11 @@ from .views import (
     StaffCreateView,
     StaffUpdateView,
     StaffDeleteView,
+    StaffWorkloadView,
     LoginAPIView, 
     RegisterAPIView
 )
+from .async_views import AsyncStaffListView
 
 
 urlpatterns = [
@@ -18,5 +20,9 @@ urlpatterns = [
     path('staffs/create/', StaffCreateView.as_view(), name='staff-create'),
     path('staffs/<int:pk>/update/', StaffUpdateView.as_view(), name='staff-update'),
     path('staffs/<int:pk>/delete/', StaffDeleteView.as_view(), name='staff-delete'),
+    path('staffs/workload/', StaffWorkloadView.as_view(), name='staff-workload'),
+
+    # Native async variant for ASGI deployments
+    path('async/staffs/', AsyncStaffListView.as_view(), name='async-staff-list'),
     
 ]
@@ -5,6 +5,9 @@ from rest_framework.permissions import AllowAny,IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import generics, filters, status
 from rest_framework.pagination import PageNumberPagination
+from backend.mixins import ConditionalGetMixin
+from . import workload
+from .authentication import add_user_claims
 from .models import User
 from .serializers import (
     StaffListSerializer,
@@ -25,6 +28,8 @@ class LoginAPIView(APIView):
 
         user = serializer.validated_data["user"]
         refresh = RefreshToken.for_user(user)
+        # Lets CachedJWTAuthentication skip the user lookup until the user changes
+        add_user_claims(refresh, user)
 
         return Response({
             "message": "Login successful",
@@ -68,7 +73,7 @@ class StaffPagination(PageNumberPagination):
 
 # ------------------------- Staff List View -------------------------
 
-class StaffListView(generics.ListAPIView):
+class StaffListView(ConditionalGetMixin, generics.ListAPIView):
     queryset = User.objects.filter(is_active=True)
     serializer_class = StaffListSerializer
     permission_classes = [IsAdminUser]
@@ -78,13 +83,19 @@ class StaffListView(generics.ListAPIView):
     ordering_fields = ['date_joined', 'username']
     ordering = ['-date_joined']
 
+    def get_queryset(self):
+        return self.serializer_class.narrow_queryset(super().get_queryset(), self.request)
+
 # ------------------------- Staff Detail View -------------------------
 
-class StaffDetailView(generics.RetrieveAPIView):
+class StaffDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = User.objects.all()
     serializer_class = StaffDetailSerializer
     permission_classes = [IsAdminUser]
 
+    def get_queryset(self):
+        return self.serializer_class.narrow_queryset(super().get_queryset(), self.request)
+
 # ------------------------- Staff Create View -------------------------
 
 class StaffCreateView(generics.CreateAPIView):
@@ -122,3 +133,22 @@ class StaffDeleteView(generics.DestroyAPIView):
     def destroy(self, request, *args, **kwargs):
         super().destroy(request, *args, **kwargs)
         return Response({"message": "Staff deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+# ------------------------- Staff Workload View -------------------------
+class StaffWorkloadView(APIView):
+    """
+    Every active staff member with open leads by processing status (as
+    assignee and as processing executive), leads assigned since Monday,
+    tasks by status and overdue tasks. Three queries when computed, then
+    served from cache until a lead, task or user changes.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        since, rows = workload.report()
+        return Response({
+            "week_start": since,
+            "count": len(rows),
+            "results": rows
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,116 @@
+"""
+Staff workload: per active user, open leads by processing status (as
+assignee and as processing executive), leads assigned this week, tasks by
+status and overdue tasks.
+
+Each relation is counted by its own query, with one conditional
+``Count(..., filter=Q(...))`` per column, and the results are merged by
+user id. Joining the three relations in one query would multiply each
+user's leads by their tasks before counting. The report therefore costs
+three queries for any number of staff. ``report()`` caches it in the
+shared cache for ``STAFF_WORKLOAD_CACHE_TIMEOUT`` seconds, keyed on the
+generations of the lead, task and user tables (see leads.cache), so a
+write shows up on the next request. Time-based columns (this week,
+overdue) go stale by at most the timeout.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from leads import cache
+from leads.funnel import CLOSED_PROCESSING_STATUSES
+from leads.models import Lead
+from tasks.models import Task
+from .models import User
+
+
+WORKLOAD_CACHE = 'default'
+
+OPEN_PROCESSING_STATUSES = [
+    value for value, _ in Lead.PROCESSING_STATUS_CHOICES if value not in CLOSED_PROCESSING_STATUSES
+]
+TASK_STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+# Same rule as Task.is_overdue
+OVERDUE_TASK_STATUSES = ('PENDING', 'IN_PROGRESS')
+
+STAFF_FIELDS = ('id', 'username', 'first_name', 'last_name', 'role', 'team')
+
+CACHE_TABLES = (Lead._meta.db_table, Task._meta.db_table, User._meta.db_table)
+
+
+def week_start():
+    today = timezone.localdate()
+    start = today - datetime.timedelta(days=today.weekday())
+    return timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+
+
+def status_counts(relation, field, statuses):
+    """``{'<relation>__<status>': Count(relation, filter=...)}`` for each status."""
+    return {
+        f'{relation}__{status}': Count(relation, filter=Q(**{f'{relation}__{field}': status}))
+        for status in statuses
+    }
+
+
+def active_staff():
+    return User.objects.filter(is_active=True).order_by()
+
+
+def count_rows(relation, annotations):
+    """``{user id: {column: count}}`` for active staff, one GROUP BY query over ``relation``."""
+    rows = active_staff().values('id').annotate(**annotations)
+    return {row.pop('id'): row for row in rows}
+
+
+def compute(since, now):
+    # The staff columns ride along with the first relation's counts
+    staff = list(active_staff().values(*STAFF_FIELDS).annotate(
+        **status_counts('assigned_leads', 'processing_status', OPEN_PROCESSING_STATUSES),
+        assigned_this_week=Count('assigned_leads', filter=Q(assigned_leads__assigned_date__gte=since)),
+    ).order_by('username'))
+    processing_columns = status_counts('processing_leads', 'processing_status', OPEN_PROCESSING_STATUSES)
+    task_columns = {
+        **status_counts('tasks', 'status', TASK_STATUSES),
+        'overdue_tasks': Count('tasks', filter=Q(tasks__status='OVERDUE') | Q(
+            tasks__status__in=OVERDUE_TASK_STATUSES, tasks__deadline__lt=now
+        )),
+    }
+    processing = count_rows('processing_leads', processing_columns)
+    tasks = count_rows('tasks', task_columns)
+    # Staff activated between the queries have no row in the later ones
+    no_processing, no_tasks = dict.fromkeys(processing_columns, 0), dict.fromkeys(task_columns, 0)
+
+    rows = []
+    for user in staff:
+        user_processing = processing.get(user['id'], no_processing)
+        user_tasks = tasks.get(user['id'], no_tasks)
+        rows.append({
+            **{field: user[field] for field in STAFF_FIELDS},
+            'assigned_leads': grouped(user, 'assigned_leads', OPEN_PROCESSING_STATUSES),
+            'assigned_this_week': user['assigned_this_week'],
+            'processing_leads': grouped(user_processing, 'processing_leads', OPEN_PROCESSING_STATUSES),
+            'tasks': grouped(user_tasks, 'tasks', TASK_STATUSES),
+            'overdue_tasks': user_tasks['overdue_tasks'],
+        })
+    return rows
+
+
+def grouped(row, relation, statuses):
+    counts = {status: row[f'{relation}__{status}'] for status in statuses}
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def report():
+    """``(week start, rows)``, from cache while no lead, task or user changed."""
+    since = week_start()
+    generations = ':'.join(str(cache.get_generation(table)) for table in CACHE_TABLES)
+    key = f'staff_workload:{generations}:{since.date()}'
+    rows = caches[WORKLOAD_CACHE].get(key)
+    if rows is None:
+        rows = compute(since, timezone.now())
+        caches[WORKLOAD_CACHE].set(key, rows, settings.STAFF_WORKLOAD_CACHE_TIMEOUT)
+    return since, rows